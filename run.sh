@@ -1,3 +1,3 @@
 poetry install
 poetry shell
-python src/dealsteal/runner.py
\ No newline at end of file
+dealsteal run
\ No newline at end of file
@@ -28,12 +28,10 @@ def load_environment_variables() -> str:
 
 
 def initialize() -> None:
+    """Configure logging and load the .env file, once the program starts running."""
     setup_logging()
     env_message = load_environment_variables()
     if "Loaded" in env_message:
         LOGGER.info(env_message)
     else:
         LOGGER.warning(env_message)
-
-
-initialize()
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+DICT_KEYS = (
+    "country",
+    "title",
+    "price",
+    "time_remaining",
+    "url",
+    "category",
+    "category_id",
+    "item_id",
+    "condition_id",
+    "condition_display_name",
+    "listing_type",
+    "start_time",
+    "end_time",
+    "seller_user_id",
+    "feedback_score",
+    "feedback_percentage",
+    "shipping_cost",
+    "location",
+    "gallery_url",
+)
+
+
+@dataclass(slots=True)
+class Auction:
+    """A single eBay auction with parsed numeric and time fields.
+
+    Prices are floats with their currency kept separately and ``end_time`` is an
+    aware datetime, so callers never have to parse display strings. The
+    formatted strings of the former dict representation are built only when
+    asked for, through :meth:`to_dict` or item access such as ``auction["price"]``.
+    """
+
+    item_id: str
+    title: str
+    country: str
+    price: float
+    currency: str
+    end_time: datetime
+    time_remaining: timedelta
+    shipping_cost: float = 0.0
+    shipping_currency: str = "USD"
+    url: str = "No URL available"
+    gallery_url: str = "No URL available"
+    category: str = "Unknown"
+    category_id: str = "Unknown"
+    condition_id: str = "Unknown"
+    condition_display_name: str = "Unknown"
+    listing_type: str = "Unknown"
+    start_time: str = "Unknown"
+    seller_user_id: str = "Unknown"
+    feedback_score: int = None
+    feedback_percentage: float = None
+    location: str = "Unknown"
+
+    @property
+    def price_display(self):
+        """Price with its currency, e.g. ``"12.5 EUR"``."""
+        return f"{self.price} {self.currency}"
+
+    @property
+    def shipping_display(self):
+        """Shipping cost with its currency, e.g. ``"5.0 EUR"``."""
+        return f"{self.shipping_cost} {self.shipping_currency}"
+
+    @property
+    def end_time_display(self):
+        """End time in the Finding API format, e.g. ``"2025-01-08T12:00:00.000Z"``."""
+        milliseconds = self.end_time.microsecond // 1000
+        return f"{self.end_time:%Y-%m-%dT%H:%M:%S}.{milliseconds:03d}Z"
+
+    def __getitem__(self, key):
+        if key not in DICT_KEYS:
+            raise KeyError(key)
+
+        if key == "price":
+            return self.price_display
+        if key == "shipping_cost":
+            return self.shipping_display
+        if key == "end_time":
+            return self.end_time_display
+        if key == "time_remaining":
+            return str(self.time_remaining)
+        if key in ("feedback_score", "feedback_percentage"):
+            value = getattr(self, key)
+            return "Unknown" if value is None else str(value)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """Return the auction in the string-formatted dict layout used before.
+
+        Returns:
+            dict: The auction as a dict with display strings for prices and times.
+        """
+        return {key: self[key] for key in DICT_KEYS}
@@ -0,0 +1,249 @@
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+LOGGER = logging.getLogger(__name__)
+
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(__file__), "fixtures", "find_items_advanced.json"
+)
+BASELINE_PATH = "store/bench_baseline.json"
+DEFAULT_ITEMS = 5000
+DEFAULT_REPEATS = 5
+DEFAULT_TOLERANCE = 0.25
+
+
+def load_fixture(path=FIXTURE_PATH):
+    """Load a recorded findItemsAdvanced response.
+
+    Args:
+        path (str, optional): Path of the fixture. Defaults to the bundled one.
+
+    Returns:
+        dict: The parsed response.
+    """
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def synthetic_response(item_count, template=None, now=None):
+    """Build a findItemsAdvanced response with ``item_count`` items.
+
+    Items are copies of the recorded ones with unique IDs and end times spread
+    over the next two days, so time filtering keeps roughly a fifth of them.
+
+    Args:
+        item_count (int): Number of items in the response.
+        template (dict, optional): Response to copy items from. Defaults to the bundled fixture.
+        now (datetime, optional): Reference time for end times. Defaults to the current UTC time.
+
+    Returns:
+        dict: The synthetic response.
+    """
+    template = template or load_fixture()
+    now = now or datetime.now(timezone.utc)
+    response = copy.deepcopy(template)
+    body = response["findItemsAdvancedResponse"][0]
+    recorded_items = body["searchResult"][0]["item"]
+
+    items = []
+    for index in range(item_count):
+        item = copy.deepcopy(recorded_items[index % len(recorded_items)])
+        end_time = now + timedelta(seconds=60 + index * 172_800 // max(item_count, 1))
+        item["itemId"] = [str(100_000_000_000 + index)]
+        item["listingInfo"][0]["endTime"] = [
+            end_time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        ]
+        items.append(item)
+
+    body["searchResult"][0] = {"@count": str(item_count), "item": items}
+    body["paginationOutput"][0]["totalEntries"] = [str(item_count)]
+    return response
+
+
+def measure(func, item_count, repeats=DEFAULT_REPEATS):
+    """Measure the throughput and memory of ``func``.
+
+    Args:
+        func (callable): Function processing ``item_count`` items per call. It
+            should return what it builds, so retained memory shows up in the peak.
+        item_count (int): Number of items processed per call.
+        repeats (int, optional): Number of timed calls; the fastest one counts. Defaults to 5.
+
+    Returns:
+        dict: ``items_per_sec`` and ``peak_bytes_per_item``.
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    return {
+        "items_per_sec": round(item_count / best, 1),
+        "peak_bytes_per_item": round(peak / item_count, 1),
+    }
+
+
+def run_benchmarks(item_count=DEFAULT_ITEMS, repeats=DEFAULT_REPEATS):
+    """Run all micro-benchmarks offline against synthetic responses.
+
+    Args:
+        item_count (int, optional): Items per synthetic response. Defaults to 5000.
+        repeats (int, optional): Timed calls per benchmark. Defaults to 5.
+
+    Returns:
+        dict: Measurements keyed by benchmark name.
+    """
+    from dealsteal.ebay import EbayAuctionSearcher
+    from dealsteal.seen import SeenItemStore
+    from dealsteal.todoist import TodoistClient
+
+    now = datetime.now(timezone.utc)
+    searcher = EbayAuctionSearcher("token", "app")
+    response = synthetic_response(item_count, now=now)
+    raw_response = json.dumps(response).encode()
+    items = searcher._extract_items(response)
+    end_times = [
+        searcher._parse_end_time(item["listingInfo"][0]["endTime"]) for item in items
+    ]
+    max_time_remaining = 36_000
+
+    def format_items():
+        return [
+            searcher._format_item(item, end_time, end_time - now)
+            for item, end_time in zip(items, end_times)
+        ]
+
+    def build_payloads():
+        return [
+            searcher._build_payload(f"gopro {index}", ["DE", "FR"], 500, 50, None, None)
+            for index in range(item_count)
+        ]
+
+    results = {
+        "extract_items": measure(
+            lambda: searcher._extract_items(json.loads(raw_response)),
+            item_count,
+            repeats,
+        ),
+        "decode_response": measure(
+            lambda: searcher._decode_response(raw_response), item_count, repeats
+        ),
+        "filter_items_by_time": measure(
+            lambda: searcher._filter_items_by_time(items, max_time_remaining, now),
+            item_count,
+            repeats,
+        ),
+        "format_item": measure(format_items, item_count, repeats),
+        "build_payload": measure(build_payloads, item_count, repeats),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        seen_items = SeenItemStore(os.path.join(directory, "items.txt"))
+        for item in items[::2]:
+            seen_items.add(item["itemId"][0])
+        client = TodoistClient("token", seen_items=seen_items)
+        item_ids = [item["itemId"][0] for item in items]
+
+        results["todoist_dedup"] = measure(
+            lambda: [client.is_item_used(item_id) for item_id in item_ids],
+            item_count,
+            repeats,
+        )
+
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Find benchmarks that got slower or allocate more than the baseline allows.
+
+    Args:
+        results (dict): Measurements from :func:`run_benchmarks`.
+        baseline (dict): Earlier measurements in the same format.
+        tolerance (float, optional): Allowed relative change. Defaults to 0.25.
+
+    Returns:
+        list: Human readable descriptions of the regressions.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if current["items_per_sec"] < previous["items_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['items_per_sec']} items/sec, baseline {previous['items_per_sec']}"
+            )
+        if current["peak_bytes_per_item"] > previous["peak_bytes_per_item"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{name}: {current['peak_bytes_per_item']} bytes/item, baseline {previous['peak_bytes_per_item']}"
+            )
+
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmarks, print the results and flag regressions.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: Exit status, 1 if a regression against the baseline was found.
+    """
+    parser = argparse.ArgumentParser(description="Offline dealsteal micro-benchmarks.")
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store the results as baseline."
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.items, args.repeats)
+    for name, measurement in results.items():
+        LOGGER.info(
+            f"{name}: {measurement['items_per_sec']:,.0f} items/sec, "
+            f"{measurement['peak_bytes_per_item']:,.0f} peak bytes/item"
+        )
+
+    if args.save_baseline:
+        directory = os.path.dirname(args.baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        LOGGER.info(f"Saved baseline to {args.baseline}.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        LOGGER.warning(f"No baseline at {args.baseline}, nothing to compare against.")
+        return 0
+
+    with open(args.baseline, "r") as file:
+        regressions = compare_to_baseline(results, json.load(file), args.tolerance)
+
+    for regression in regressions:
+        LOGGER.error(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
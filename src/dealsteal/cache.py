@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """TTL cache for API responses with LRU eviction and an optional disk backend.
+
+    Entries live in memory, bounded to ``max_entries`` with least recently used
+    eviction. When ``path`` is set, every entry is also written to a JSON file
+    in that directory, so cached responses survive process and container
+    restarts until their TTL runs out.
+    """
+
+    DEFAULT_TTL = 300
+    DEFAULT_MAX_ENTRIES = 1024
+
+    def __init__(
+        self,
+        ttl=DEFAULT_TTL,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        path=None,
+        clock=time.time,
+    ):
+        """Create the cache.
+
+        Args:
+            ttl (float, optional): Seconds an entry stays valid. Defaults to 300.
+            max_entries (int, optional): Maximum number of entries kept in memory. Defaults to 1024.
+            path (str, optional): Directory for the on-disk backend, None to keep entries in memory only. Defaults to None.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self.prune()
+
+    @staticmethod
+    def make_key(payload):
+        """Build a cache key from a request payload.
+
+        Args:
+            payload (dict): JSON-serializable request payload.
+
+        Returns:
+            str: A hex digest that is equal for payloads with equal content.
+        """
+        normalized = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None if missing or expired.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Any: The cached value, or None.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        if not self.path:
+            return None
+
+        entry = self._read_file(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= now:
+            self._remove_file(key)
+            return None
+
+        self._remember(key, expires_at, value)
+        return value
+
+    def set(self, key, value):
+        """Cache ``value`` under ``key`` for the configured TTL.
+
+        Args:
+            key (str): Cache key.
+            value (Any): JSON-serializable value.
+        """
+        expires_at = self.clock() + self.ttl
+        self._remember(key, expires_at, value)
+
+        if self.path:
+            temporary_path = f"{self._file_path(key)}.tmp"
+            with open(temporary_path, "w") as file:
+                json.dump({"expires_at": expires_at, "value": value}, file)
+            os.replace(temporary_path, self._file_path(key))
+
+    def prune(self):
+        """Remove expired entries from the disk backend.
+
+        Returns:
+            int: The number of removed files.
+        """
+        if not self.path:
+            return 0
+
+        now = self.clock()
+        removed = 0
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            key = name.removesuffix(".json")
+            entry = self._read_file(key)
+            if entry is None or entry[0] <= now:
+                self._remove_file(key)
+                removed += 1
+
+        return removed
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _file_path(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def _read_file(self, key):
+        try:
+            with open(self._file_path(key), "r") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"Ignoring unreadable cache entry {key}: {error}")
+            return None
+
+        return entry["expires_at"], entry["value"]
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._file_path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+LOGGER = logging.getLogger(__name__)
+
+CATEGORY_PATH = "store/categories.json"
+
+
+class CategoryHistogram:
+    """Learned ``primaryCategory`` histogram of each search's keywords.
+
+    While a search runs without a category restriction, the categories of its
+    results are counted. Once ``min_samples`` results are in, the search is
+    routed to the most common categories, at most ``MAX_CATEGORY_IDS`` as the
+    Finding API allows, if they cover ``coverage`` of the results; keywords
+    whose results are spread wider keep searching every category. A histogram
+    expires ``ttl_days`` after learning started, so the next search learns it
+    again from unrestricted results. The histograms, and the category names
+    they saw, are kept in a JSON file.
+    """
+
+    MAX_CATEGORY_IDS = 3
+    DEFAULT_MIN_SAMPLES = 50
+    DEFAULT_COVERAGE = 0.9
+    DEFAULT_TTL_DAYS = 7
+
+    def __init__(
+        self,
+        path=CATEGORY_PATH,
+        min_samples=DEFAULT_MIN_SAMPLES,
+        coverage=DEFAULT_COVERAGE,
+        ttl_days=DEFAULT_TTL_DAYS,
+        clock=time.time,
+    ):
+        """Load the histograms, dropping expired ones.
+
+        Args:
+            path (str, optional): Path of the JSON file, None to keep histograms in memory only.
+                Defaults to store/categories.json.
+            min_samples (int, optional): Results a search needs before it is routed. Defaults to 50.
+            coverage (float, optional): Share of the results, from 0 to 1, the routed categories
+                must cover. Defaults to 0.9.
+            ttl_days (float, optional): Days a histogram is used before it is learned again. Defaults to 7.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.path = path
+        self.min_samples = min_samples
+        self.coverage = coverage
+        self.ttl_days = ttl_days
+        self.clock = clock
+        self._histograms = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def record(self, keywords, auctions):
+        """Count the categories of an unrestricted search's results.
+
+        Args:
+            keywords (str): Keywords of the search.
+            auctions (list): :class:`Auction` records it returned.
+        """
+        counts = Counter(
+            auction.category_id
+            for auction in auctions
+            if auction.category_id and auction.category_id != "Unknown"
+        )
+        if not counts:
+            return
+
+        with self._lock:
+            histogram = self._fresh_histogram(_normalize(keywords))
+            if histogram is None:
+                histogram = self._histograms[_normalize(keywords)] = {
+                    "since": self.clock(),
+                    "counts": {},
+                }
+            for category_id, count in counts.items():
+                histogram["counts"][category_id] = (
+                    histogram["counts"].get(category_id, 0) + count
+                )
+            for auction in auctions:
+                if auction.category_id in counts:
+                    self._names[auction.category.lower()] = auction.category_id
+            self._save()
+
+    def route(self, keywords):
+        """Return the category IDs to restrict a search to.
+
+        Args:
+            keywords (str): Keywords of the search.
+
+        Returns:
+            list: Up to ``MAX_CATEGORY_IDS`` category IDs, or None while the histogram is
+            still learning or the results are spread over too many categories.
+        """
+        with self._lock:
+            histogram = self._fresh_histogram(_normalize(keywords))
+            if histogram is None:
+                return None
+            counts = Counter(histogram["counts"])
+
+        total = sum(counts.values())
+        if total < self.min_samples:
+            return None
+
+        category_ids = []
+        covered = 0
+        for category_id, count in counts.most_common(self.MAX_CATEGORY_IDS):
+            category_ids.append(category_id)
+            covered += count
+            if covered >= self.coverage * total:
+                return sorted(category_ids)
+        return None
+
+    def resolve(self, names):
+        """Look up the IDs of category names seen in past results.
+
+        Args:
+            names (list): Category names, matched case-insensitively.
+
+        Returns:
+            list: The IDs of the names, or None if any name has not been seen yet.
+        """
+        with self._lock:
+            category_ids = [self._names.get(name.lower()) for name in names]
+        if None in category_ids:
+            return None
+        return sorted(set(category_ids))
+
+    def _fresh_histogram(self, keywords):
+        histogram = self._histograms.get(keywords)
+        if histogram is None:
+            return None
+        if self.clock() - histogram["since"] > self.ttl_days * 86_400:
+            del self._histograms[keywords]
+            return None
+        return histogram
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except ValueError:
+            LOGGER.warning(f"Ignoring unreadable category histograms in {self.path}.")
+            return
+
+        self._names = data.get("names", {})
+        self._histograms = data.get("histograms", {})
+        for keywords in list(self._histograms):
+            self._fresh_histogram(keywords)
+
+    def _save(self):
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"names": self._names, "histograms": self._histograms}, file)
+        os.replace(temporary_path, self.path)
+
+
+def _normalize(keywords):
+    return " ".join(keywords.lower().split())
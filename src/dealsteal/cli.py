@@ -0,0 +1,111 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Taken before anything heavy is imported, so the startup report covers the
+# imports of the chosen command.
+STARTED = time.perf_counter()
+
+LOGGER = logging.getLogger(__name__)
+
+
+def build_parser():
+    """Build the parser of the ``dealsteal`` command.
+
+    Returns:
+        argparse.ArgumentParser: Parser with one subcommand per way to run.
+    """
+    parser = argparse.ArgumentParser(
+        prog="dealsteal",
+        description="Search eBay for auctions and add deals to Todoist.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("run", help="Search the watchlist once.")
+    subparsers.add_parser("daemon", help="Keep polling the watchlist.")
+    subparsers.add_parser("worker", help="Join runs shared through the work queue.")
+    workers = subparsers.add_parser(
+        "workers", help="Shard one run across local processes."
+    )
+    workers.add_argument("count", type=int)
+    subparsers.add_parser(
+        "reconcile", help="Complete or delete the tasks of ended auctions."
+    )
+    subparsers.add_parser(
+        "bench", help="Run the offline micro-benchmarks.", add_help=False
+    )
+    subparsers.add_parser(
+        "loadtest", help="Load test against fake services.", add_help=False
+    )
+    return parser
+
+
+def process_age():
+    """Return the seconds since the interpreter started, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/stat", "r") as file:
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as file:
+            uptime = float(file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+
+
+def report_startup(command):
+    """Log how long it took from process start until ``command`` was ready to run."""
+    startup_ms = (time.perf_counter() - STARTED) * 1000
+    age = process_age()
+    interpreter = f", {age * 1000:.0f} ms since process start" if age else ""
+    LOGGER.info(f"{command} ready in {startup_ms:.0f} ms{interpreter}.")
+
+
+def main(argv=None):
+    """Entry point of the ``dealsteal`` command.
+
+    Nothing is imported until a subcommand is chosen, and each one imports only
+    what it needs, so ``--help`` loads no HTTP client. The benchmarks and every
+    run mode still load ``requests`` through the eBay and Todoist clients.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: Exit status.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args, rest = build_parser().parse_known_args(argv)
+
+    if args.command == "bench":
+        from dealsteal import bench
+
+        logging.basicConfig(level=logging.INFO)
+        return bench.main(rest)
+
+    if args.command == "loadtest":
+        from dealsteal import loadtest
+
+        return loadtest.main(rest)
+
+    if rest:
+        build_parser().error(f"unrecognized arguments: {' '.join(rest)}")
+
+    from dealsteal import initialize, runner
+
+    initialize()
+    report_startup(args.command)
+
+    if args.command == "workers":
+        runner.run_workers(args.count)
+    elif args.command == "worker":
+        runner.work_from_environment()
+    elif args.command == "reconcile":
+        runner.reconcile_from_environment()
+    else:
+        runner.run_from_environment(daemon=args.command == "daemon")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,58 @@
+import functools
+import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import requests
 
-import dealsteal  # noqa
+from dealsteal.auction import Auction
+from dealsteal.filters import import_numpy
+from dealsteal.metrics import get_default_registry
+from dealsteal.transport import get_default_transport
 
 LOGGER = logging.getLogger(__name__)
 
+# Fields of a Finding API item that are read when it is parsed, with the
+# fields kept of the objects nested in them. Everything else is dropped as
+# soon as a response is decoded.
+ITEM_FIELDS = {
+    "itemId": (),
+    "title": (),
+    "country": (),
+    "viewItemURL": (),
+    "galleryURL": (),
+    "location": (),
+    "sellingStatus": ("currentPrice",),
+    "shippingInfo": ("shippingServiceCost",),
+    "primaryCategory": ("categoryId", "categoryName"),
+    "condition": ("conditionId", "conditionDisplayName"),
+    "listingInfo": ("listingType", "startTime", "endTime"),
+    "sellerInfo": ("sellerUserName", "feedbackScore", "positiveFeedbackPercent"),
+}
+
+
+class IncompleteSearchError(Exception):
+    """Raised by a strict search when a result page could not be fetched.
+
+    Attributes:
+        auctions (list): The :class:`Auction` records of the pages that were fetched.
+    """
+
+    def __init__(self, message, auctions):
+        super().__init__(message)
+        self.auctions = auctions
+
 
 class EbayAuctionSearcher:
+    DEFAULT_MAX_WORKERS = 8
+    ENTRIES_PER_PAGE = 50
+    MAX_PAGES = 100
+    MAX_LOCATED_IN_VALUES = 25
+    MAX_CATEGORY_IDS = 3
+    VECTORIZE_THRESHOLD = 256
     EBAY_API_URL = "https://svcs.ebay.com/services/search/FindingService/v1"
     EUROPEAN_COUNTRIES = [
         "AL",
@@ -57,16 +100,40 @@ class EbayAuctionSearcher:
         "VA",
     ]
 
-    def __init__(self, oauth_token, app_id):
+    def __init__(
+        self,
+        oauth_token,
+        app_id,
+        max_workers=DEFAULT_MAX_WORKERS,
+        transport=None,
+        cache=None,
+        metrics=None,
+        budget=None,
+        categories=None,
+    ):
         """
         Initializes the eBay API client with the provided OAuth token and application ID.
 
         Args:
             oauth_token (str): The OAuth token for authenticating API requests.
             app_id (str): The application ID for the eBay API.
+            max_workers (int, optional): Maximum number of concurrent requests per search.
+                A value of 1 searches countries sequentially. Defaults to 8.
+            transport (HttpTransport, optional): Pooled HTTP transport. Defaults to the shared one.
+            cache (ResponseCache, optional): Cache for responses, keyed on the request payload. Defaults to None.
+            metrics (MetricsRegistry, optional): Registry for request and item metrics. Defaults to the shared, disabled one.
+            budget (CallBudget, optional): Daily call quota every request is taken from. Defaults to None.
+            categories (CategoryHistogram, optional): Learns the categories of each search's results
+                and restricts later searches to them. Defaults to None.
         """
         self.oauth_token = oauth_token
         self.app_id = app_id
+        self.max_workers = max_workers
+        self.transport = transport or get_default_transport()
+        self.cache = cache
+        self.metrics = metrics or get_default_registry()
+        self.budget = budget
+        self.categories = categories
 
     def search_ebay_auctions(
         self,
@@ -78,6 +145,10 @@ class EbayAuctionSearcher:
         categories=None,
         category_ids=None,
         condition_ids=None,
+        max_workers=None,
+        priority=0,
+        start_time_from=None,
+        strict=False,
     ):
         """Search eBay auctions based on specified criteria.
 
@@ -87,36 +158,288 @@ class EbayAuctionSearcher:
             max_price (float, optional): Maximum price of the items to search for. Defaults to None.
             min_price (float, optional): Minimum price of the items to search for. Defaults to None.
             max_time_remaining (str, optional): Maximum time remaining for the auction. Defaults to None.
-            categories (list, optional): List of category names to search within. Defaults to None.
-            category_ids (list, optional): List of category IDs to search within. Defaults to None.
+            categories (list, optional): List of category names to search within, resolved through the
+                learned categories. Defaults to None.
+            category_ids (list, optional): List of up to 3 category IDs to search within. Defaults to None,
+                which uses the learned categories of the keywords, if any.
             condition_ids (list, optional): List of condition IDs to filter the items. Defaults to None.
+            max_workers (int, optional): Overrides the searcher's concurrency limit for this search. Defaults to None.
+            priority (int, optional): Priority of the search against the call budget. Every further
+                group of countries counts one level lower, so the first countries are kept longest. Defaults to 0.
+            start_time_from (datetime | dict, optional): Only return listings started at or after this time, either
+                one time for all countries or a time per country code. Defaults to None.
+            strict (bool, optional): Raise instead of returning partial results when a page fails
+                or the call budget refuses it. Defaults to False.
 
         Returns:
-            list: List of filtered auction items based on the search criteria.
+            list: List of :class:`Auction` records matching the search criteria, ordered by country.
+
+        Raises:
+            IncompleteSearchError: If ``strict`` is set and not every page could be fetched.
         """
         countries = countries or self.EUROPEAN_COUNTRIES
-        results = []
+        max_workers = max_workers or self.max_workers
+        category_ids = self._route_categories(keywords, categories, category_ids)
+        headers = self._build_headers()
+        groups = self._plan_country_groups(countries)
+        group_size = len(groups[0])
 
-        for country in countries:
-            headers = self._build_headers()
+        def search_group(group):
             payload = self._build_payload(
                 keywords,
-                country,
+                group,
                 max_price,
                 min_price,
-                categories,
                 category_ids,
                 condition_ids,
+                _group_start_time(start_time_from, group),
+            )
+            failures = []
+            items = list(
+                self._iter_pages(
+                    headers,
+                    payload,
+                    max_time_remaining,
+                    priority=priority - countries.index(group[0]) // group_size,
+                    failures=failures,
+                )
             )
-            response = self._make_request(headers, payload)
+            return items, bool(failures)
 
-            if response:
-                items = self._extract_items(response)
-                filtered_items = self._filter_items_by_time(items, max_time_remaining)
-                results.extend(filtered_items)
+        group_results = self._map_concurrently(search_group, groups, max_workers)
 
+        results = []
+        failed_groups = 0
+        for group_items, failed in group_results:
+            results.extend(group_items)
+            failed_groups += failed
+
+        if self.categories and not category_ids:
+            self.categories.record(keywords, results)
+        if strict and failed_groups:
+            raise IncompleteSearchError(
+                f"{failed_groups} of {len(groups)} country groups of {keywords!r} "
+                f"could not be searched completely.",
+                results,
+            )
         return results
 
+    def iter_auctions(
+        self,
+        keywords,
+        countries=None,
+        max_price=None,
+        min_price=None,
+        max_time_remaining=None,
+        categories=None,
+        category_ids=None,
+        condition_ids=None,
+        priority=0,
+    ):
+        """Lazily iterate over eBay auctions, fetching result pages on demand.
+
+        Results are requested sorted by ``EndTimeSoonest``, so once an item ends
+        later than ``max_time_remaining`` no further pages are fetched for that
+        country group. Only one page of items is held in memory at a time.
+
+        Args:
+            keywords (str): Keywords to search for in the auction titles.
+            countries (list, optional): List of country codes to search within. Defaults to European countries.
+            max_price (float, optional): Maximum price of the items to search for. Defaults to None.
+            min_price (float, optional): Minimum price of the items to search for. Defaults to None.
+            max_time_remaining (int, optional): Maximum time remaining for the auction in seconds. Defaults to None.
+            categories (list, optional): List of category names to search within, resolved through the
+                learned categories. Defaults to None.
+            category_ids (list, optional): List of up to 3 category IDs to search within. Defaults to None,
+                which uses the learned categories of the keywords, if any.
+            condition_ids (list, optional): List of condition IDs to filter the items. Defaults to None.
+            priority (int, optional): Priority of the search against the call budget, one level lower
+                for every further group of countries. Defaults to 0.
+
+        Yields:
+            Auction: Matching auctions, ending soonest first within each country group.
+        """
+        countries = countries or self.EUROPEAN_COUNTRIES
+        category_ids = self._route_categories(keywords, categories, category_ids)
+        on_page = None
+        if self.categories is not None and not category_ids:
+            # Learn page by page, so no page is kept once it has been consumed.
+            on_page = functools.partial(self.categories.record, keywords)
+        headers = self._build_headers()
+
+        for position, group in enumerate(self._plan_country_groups(countries)):
+            payload = self._build_payload(
+                keywords,
+                group,
+                max_price,
+                min_price,
+                category_ids,
+                condition_ids,
+            )
+            yield from self._iter_pages(
+                headers,
+                payload,
+                max_time_remaining,
+                priority=priority - position,
+                on_page=on_page,
+            )
+
+    def _route_categories(self, keywords, categories, category_ids):
+        """Pick the category IDs a search is restricted to.
+
+        Explicit IDs win, then the IDs of the category names, then the learned
+        categories of the keywords. Names not seen in past results yet cannot be
+        resolved, so such a search runs unrestricted.
+
+        Args:
+            keywords (str): Keywords of the search.
+            categories (list): Category names, or None.
+            category_ids (list): Category IDs, or None.
+
+        Returns:
+            list: Up to ``MAX_CATEGORY_IDS`` category IDs, or None for no restriction.
+        """
+        if not category_ids and categories:
+            if self.categories:
+                category_ids = self.categories.resolve(categories)
+            if not category_ids:
+                LOGGER.warning(
+                    f"Categories {categories} of {keywords!r} are not known yet, "
+                    f"searching all categories."
+                )
+                return None
+        elif not category_ids and self.categories:
+            category_ids = self.categories.route(keywords)
+            if category_ids:
+                self.metrics.inc("dealsteal_category_routed_total")
+
+        if not category_ids:
+            return None
+        category_ids = [str(category_id) for category_id in category_ids]
+        if len(category_ids) > self.MAX_CATEGORY_IDS:
+            LOGGER.warning(
+                f"Only the first {self.MAX_CATEGORY_IDS} of {len(category_ids)} "
+                f"categories of {keywords!r} are searched."
+            )
+        return category_ids[: self.MAX_CATEGORY_IDS]
+
+    def _iter_pages(
+        self,
+        headers,
+        payload,
+        max_time_remaining,
+        first_response=None,
+        priority=0,
+        failures=None,
+        on_page=None,
+    ):
+        """Yield filtered items from consecutive result pages of a single search.
+
+        Args:
+            headers (dict): Request headers.
+            payload (dict): Request payload for the first page.
+            max_time_remaining (int): Maximum time remaining in seconds, or None.
+            first_response (dict, optional): Already fetched first page. Defaults to None.
+            priority (int, optional): Priority of the page requests against the call budget. Defaults to 0.
+            failures (list, optional): The number of the page that could not be fetched is appended
+                to it, if any. Defaults to None.
+            on_page (callable, optional): Called with the matching auctions of every page
+                before they are yielded. Defaults to None.
+
+        Yields:
+            Auction: Matching auctions.
+        """
+        response = first_response
+        page_number = 1
+
+        while True:
+            if response is None:
+                payload = {
+                    **payload,
+                    "paginationInput": {
+                        **payload["paginationInput"],
+                        "pageNumber": page_number,
+                    },
+                }
+                response = self._make_request(headers, payload, priority)
+                if not response:
+                    if failures is not None:
+                        failures.append(page_number)
+                    return
+
+            items = self._extract_items(response)
+            filtered_items = self._filter_items_by_time(items, max_time_remaining)
+            self.metrics.inc("dealsteal_items_returned_total", len(items))
+            self.metrics.inc("dealsteal_items_kept_total", len(filtered_items))
+            if on_page:
+                on_page(filtered_items)
+            yield from filtered_items
+
+            if len(filtered_items) < len(items) or page_number >= min(
+                self._total_pages(response), self.MAX_PAGES
+            ):
+                return
+
+            page_number += 1
+            response = None
+
+    def _plan_country_groups(self, countries):
+        """Pack countries into as few ``LocatedIn`` filters as the API allows.
+
+        Countries are split into contiguous, evenly sized groups of at most
+        ``MAX_LOCATED_IN_VALUES`` codes, so a search over all European countries
+        needs two requests instead of one per country.
+
+        Args:
+            countries (list): Country codes to search within.
+
+        Returns:
+            list: A list of country code lists, one per request.
+        """
+        countries = list(countries)
+        group_count = -(-len(countries) // self.MAX_LOCATED_IN_VALUES)
+        group_size = -(-len(countries) // max(group_count, 1))
+        return [
+            countries[start : start + group_size]
+            for start in range(0, len(countries), group_size)
+        ]
+
+    def _total_pages(self, data):
+        """Read the total number of result pages from a response.
+
+        Args:
+            data (dict): Parsed findItemsAdvanced response, or None.
+
+        Returns:
+            int: The number of result pages, 0 if the response is empty.
+        """
+        if not data:
+            return 0
+
+        response_data = data.get("findItemsAdvancedResponse", [{}])[0]
+        pagination = response_data.get("paginationOutput", [{}])[0]
+        return int(pagination.get("totalPages", ["1"])[0])
+
+    def _map_concurrently(self, func, args, max_workers):
+        """Apply ``func`` to every element of ``args`` using a bounded thread pool.
+
+        Results are returned in the order of ``args`` regardless of which request
+        finishes first, so the output is deterministic.
+
+        Args:
+            func (callable): Function to call for each argument.
+            args (list): Arguments to map over.
+            max_workers (int): Maximum number of calls running at the same time.
+
+        Returns:
+            list: The results of ``func`` in the order of ``args``.
+        """
+        if max_workers <= 1 or len(args) <= 1:
+            return [func(arg) for arg in args]
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(args))) as executor:
+            return list(executor.map(func, args))
+
     def _build_headers(self):
         """Build the headers required for making requests to the eBay API.
 
@@ -134,16 +457,16 @@ class EbayAuctionSearcher:
     def _build_payload(
         self,
         keywords,
-        country,
+        countries,
         max_price,
         min_price,
-        categories,
         category_ids,
         condition_ids,
+        start_time_from=None,
     ):
         item_filters = [
             {"name": "ListingType", "value": "Auction"},
-            {"name": "LocatedIn", "value": country},
+            {"name": "LocatedIn", "value": countries},
         ]
 
         if max_price:
@@ -152,29 +475,139 @@ class EbayAuctionSearcher:
         if min_price:
             item_filters.append({"name": "MinPrice", "value": str(min_price)})
 
-        if categories:
-            payload["categoryId"] = categories
-
-        if category_ids:
-            item_filters.append({"name": "CategoryId", "value": category_ids})
-
         if condition_ids:
             item_filters.append({"name": "Condition", "value": condition_ids})
 
-        return {
+        if start_time_from:
+            item_filters.append(
+                {"name": "StartTimeFrom", "value": _format_time(start_time_from)}
+            )
+
+        payload = {
             "keywords": keywords,
-            "paginationInput": {"entriesPerPage": 50},
+            "paginationInput": {"entriesPerPage": self.ENTRIES_PER_PAGE},
+            "sortOrder": "EndTimeSoonest",
             "itemFilter": item_filters,
         }
+        if category_ids:
+            payload["categoryId"] = category_ids
+        return payload
+
+    def _make_request(self, headers, payload, priority=0):
+        cache_key = self.cache.make_key(payload) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.metrics.inc("dealsteal_cache_hits_total")
+                return cached
+
+        if not self._acquire_call(payload, priority):
+            return None
 
-    def _make_request(self, headers, payload):
+        response = None
+        started = time.perf_counter()
         try:
-            response = requests.post(self.EBAY_API_URL, headers=headers, json=payload)
+            # Searches do not change anything, so they are safe to retry, and
+            # every retry is one more call taken from the budget.
+            response = self.transport.post(
+                self.EBAY_API_URL,
+                headers=headers,
+                json=payload,
+                retry=True,
+                before_retry=lambda: self._acquire_call(payload, priority),
+            )
             response.raise_for_status()
-            return response.json()
+            data = self._decode_response(response.content)
         except requests.exceptions.RequestException as error:
             LOGGER.error(f"Error: {error}")
             return None
+        except ValueError as error:
+            LOGGER.error(f"Undecodable response: {error}")
+            return None
+        finally:
+            if self.metrics.enabled:
+                self._record_request(payload, response, time.perf_counter() - started)
+
+        if cache_key:
+            self.cache.set(cache_key, data)
+        return data
+
+    def _acquire_call(self, payload, priority):
+        """Take one call from the budget, logging when it is exhausted.
+
+        Args:
+            payload (dict): Payload of the request the call is for.
+            priority (int): Priority of the search against the budget.
+
+        Returns:
+            bool: True if the request may be sent.
+        """
+        if not self.budget or self.budget.try_acquire(priority):
+            return True
+
+        LOGGER.warning(
+            f"Call budget exhausted for priority {priority}, skipping search "
+            f"for {payload['keywords']!r}."
+        )
+        self.metrics.inc("dealsteal_budget_denied_total")
+        return False
+
+    def _record_request(self, payload, response, elapsed):
+        """Record the outcome, latency and size of one Finding API call.
+
+        Args:
+            payload (dict): Request payload, used for the country label.
+            response (requests.Response): The response, or None if the call failed.
+            elapsed (float): Wall time of the call in seconds.
+        """
+        country = ",".join(
+            next(
+                (
+                    item_filter["value"]
+                    for item_filter in payload["itemFilter"]
+                    if item_filter["name"] == "LocatedIn"
+                ),
+                [],
+            )
+        )
+        status = "error" if response is None else str(response.status_code)
+        self.metrics.inc(
+            "dealsteal_requests_total",
+            endpoint="ebay_finding",
+            country=country,
+            status=status,
+        )
+        self.metrics.observe(
+            "dealsteal_request_seconds",
+            elapsed,
+            endpoint="ebay_finding",
+            country=country,
+        )
+        if response is not None:
+            self.metrics.inc(
+                "dealsteal_response_bytes_total",
+                len(response.content),
+                endpoint="ebay_finding",
+            )
+
+    def _decode_response(self, content):
+        """Decode a Finding API response, keeping only the item fields that are parsed.
+
+        Items are reduced to :data:`ITEM_FIELDS` right away, so pages held
+        while they are parsed or kept in the response cache take less memory.
+        Decoding itself is no faster.
+
+        Args:
+            content (bytes): Body of the response.
+
+        Returns:
+            dict: The response in the list-wrapped Finding API layout.
+        """
+        data = json.loads(content)
+        items = self._extract_items(data)
+        for index, item in enumerate(items):
+            items[index] = _slim_item(item)
+        return data
 
     def _extract_items(self, data):
         response_data = data.get("findItemsAdvancedResponse", [])
@@ -184,26 +617,85 @@ class EbayAuctionSearcher:
         search_result = response_data[0].get("searchResult", [{}])[0]
         return search_result.get("item", [])
 
-    def _filter_items_by_time(self, items, max_time_remaining):
-        filtered_items = []
-        for item in items:
-            end_time = item.get("listingInfo", [{}])[0].get("endTime", "")
-            end_datetime = self._parse_end_time(end_time)
-            time_remaining = end_datetime - datetime.now(timezone.utc)
+    def _filter_items_by_time(self, items, max_time_remaining, now=None):
+        """Drop items ending later than ``max_time_remaining`` and format the rest.
 
-            if max_time_remaining and time_remaining > timedelta(
-                seconds=max_time_remaining
-            ):
-                continue
+        The whole page is compared against a single clock snapshot, so every
+        item of a response sees the same "now". Large pages are parsed and
+        compared in one vectorized NumPy step when NumPy is installed.
 
-            filtered_items.append(self._format_item(item, time_remaining))
+        Args:
+            items (list): Raw items from one response page.
+            max_time_remaining (int): Maximum time remaining in seconds, or None.
+            now (datetime, optional): Reference time. Defaults to the current UTC time.
+
+        Returns:
+            list: :class:`Auction` records for the kept items, in page order.
+        """
+        now = now or datetime.now(timezone.utc)
+        raw_end_times = [
+            _first(_first(item, "listingInfo", {}), "endTime", "") for item in items
+        ]
+        end_times = [None] * len(items)
+
+        if not max_time_remaining:
+            keep = [True] * len(items)
+        else:
+            cutoff = now + timedelta(seconds=max_time_remaining)
+            keep = self._end_before_vectorized(raw_end_times, cutoff)
+            if keep is None:
+                end_times = [self._parse_end_time(end) for end in raw_end_times]
+                keep = [end_time <= cutoff for end_time in end_times]
+
+        filtered_items = []
+        for item, raw_end_time, end_time, kept in zip(
+            items, raw_end_times, end_times, keep
+        ):
+            if not kept:
+                continue
+            end_time = end_time or self._parse_end_time(raw_end_time)
+            filtered_items.append(self._format_item(item, end_time, end_time - now))
 
         return filtered_items
 
+    def _end_before_vectorized(self, raw_end_times, cutoff):
+        """Compare a page of end times against ``cutoff`` in one NumPy operation.
+
+        Args:
+            raw_end_times (list): End times as Finding API timestamp strings.
+            cutoff (datetime): Latest end time to keep.
+
+        Returns:
+            numpy.ndarray: Boolean keep mask, or None if the page is too small,
+            NumPy is not installed or a timestamp could not be parsed.
+        """
+        if len(raw_end_times) < self.VECTORIZE_THRESHOLD:
+            return None
+
+        numpy = import_numpy()
+        if numpy is None:
+            return None
+
+        try:
+            end_times = numpy.array(
+                [end_time.rstrip("Z") for end_time in raw_end_times],
+                dtype="datetime64[ms]",
+            )
+        except ValueError:
+            return None
+
+        utc_cutoff = cutoff.astimezone(timezone.utc).replace(tzinfo=None)
+        return end_times <= numpy.datetime64(utc_cutoff, "ms")
+
     def _parse_end_time(self, end_time: str) -> datetime:
         if isinstance(end_time, list):
             end_time = end_time[0]
 
+        try:
+            return datetime.fromisoformat(end_time)
+        except ValueError:
+            pass
+
         try:
             return datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S.%fZ").replace(
                 tzinfo=timezone.utc
@@ -213,44 +705,91 @@ class EbayAuctionSearcher:
                 tzinfo=timezone.utc
             )
 
-    def _format_item(self, item, time_remaining):
-        return {
-            "country": item.get("country", "Unknown")[0],
-            "title": item.get("title", "No title")[0],
-            "price": f"{item.get('sellingStatus', [{}])[0].get('currentPrice', [{}])[0].get('__value__', '0')} {item.get('sellingStatus', [{}])[0].get('currentPrice', [{}])[0].get('@currencyId', 'USD')}",
-            "time_remaining": str(time_remaining),
-            "url": item.get("viewItemURL", "No URL available")[0],
-            "category": item.get("primaryCategory", [{}])[0].get(
-                "categoryName", "Unknown"
-            )[0],
-            "category_id": item.get("primaryCategory", [{}])[0].get(
-                "categoryId", "Unknown"
-            ),
-            "item_id": item.get("itemId", "Unknown")[0],
-            "condition_id": item.get("condition", [{}])[0].get(
-                "conditionId", "Unknown"
-            )[0],
-            "condition_display_name": item.get("condition", [{}])[0].get(
-                "conditionDisplayName", "Unknown"
-            )[0],
-            "listing_type": item.get("listingInfo", [{}])[0].get(
-                "listingType", "Unknown"
-            )[0],
-            "start_time": item.get("listingInfo", [{}])[0].get("startTime", "Unknown"),
-            "end_time": item.get("listingInfo", [{}])[0].get("endTime", "Unknown")[0],
-            "seller_user_id": item.get("sellerInfo", [{}])[0].get(
-                "sellerUserName", "Unknown"
-            ),
-            "feedback_score": item.get("sellerInfo", [{}])[0].get(
-                "feedbackScore", "Unknown"
-            ),
-            "feedback_percentage": item.get("sellerInfo", [{}])[0].get(
-                "positiveFeedbackPercent", "Unknown"
+    def _format_item(self, item, end_time, time_remaining):
+        """Build an :class:`Auction` from a raw item, visiting each nested field once.
+
+        Args:
+            item (dict): Raw, list-wrapped item from the Finding API.
+            end_time (datetime): Parsed end time of the auction.
+            time_remaining (timedelta): Time left until the auction ends.
+
+        Returns:
+            Auction: The parsed auction.
+        """
+        selling_status = _first(item, "sellingStatus", {})
+        current_price = _first(selling_status, "currentPrice", {})
+        shipping_info = _first(item, "shippingInfo", {})
+        shipping_cost = _first(shipping_info, "shippingServiceCost", {})
+        category = _first(item, "primaryCategory", {})
+        condition = _first(item, "condition", {})
+        listing_info = _first(item, "listingInfo", {})
+        seller_info = _first(item, "sellerInfo", {})
+        feedback_score = _first(seller_info, "feedbackScore", None)
+        feedback_percentage = _first(seller_info, "positiveFeedbackPercent", None)
+
+        return Auction(
+            item_id=_first(item, "itemId", "Unknown"),
+            title=_first(item, "title", "No title"),
+            country=_first(item, "country", "Unknown"),
+            price=float(current_price.get("__value__", 0)),
+            currency=current_price.get("@currencyId", "USD"),
+            end_time=end_time,
+            time_remaining=time_remaining,
+            shipping_cost=float(shipping_cost.get("__value__", 0)),
+            shipping_currency=shipping_cost.get("@currencyId", "USD"),
+            url=_first(item, "viewItemURL", "No URL available"),
+            gallery_url=_first(item, "galleryURL", "No URL available"),
+            category=_first(category, "categoryName", "Unknown"),
+            category_id=_first(category, "categoryId", "Unknown"),
+            condition_id=_first(condition, "conditionId", "Unknown"),
+            condition_display_name=_first(condition, "conditionDisplayName", "Unknown"),
+            listing_type=_first(listing_info, "listingType", "Unknown"),
+            start_time=_first(listing_info, "startTime", "Unknown"),
+            seller_user_id=_first(seller_info, "sellerUserName", "Unknown"),
+            feedback_score=None if feedback_score is None else int(feedback_score),
+            feedback_percentage=(
+                None if feedback_percentage is None else float(feedback_percentage)
             ),
-            "shipping_cost": f"{item.get('shippingInfo', [{}])[0].get('shippingServiceCost', [{}])[0].get('__value__', '0')} {item.get('shippingInfo', [{}])[0].get('shippingServiceCost', [{}])[0].get('@currencyId', 'USD')}",
-            "location": item.get("location", "Unknown")[0],
-            "gallery_url": item.get("galleryURL", "No URL available"),
-        }
+            location=_first(item, "location", "Unknown"),
+        )
+
+
+def _slim_item(item):
+    """Copy the fields of a raw item listed in :data:`ITEM_FIELDS`."""
+    slim = {}
+    for key, nested_keys in ITEM_FIELDS.items():
+        value = item.get(key)
+        if not value:
+            continue
+        if nested_keys and isinstance(value, list) and isinstance(value[0], dict):
+            value = [{name: value[0][name] for name in nested_keys if name in value[0]}]
+        slim[key] = value
+    return slim
+
+
+def _group_start_time(start_time_from, group):
+    """Pick the ``StartTimeFrom`` of a country group, the earliest of its countries."""
+    if not isinstance(start_time_from, dict):
+        return start_time_from
+
+    start_times = [start_time_from.get(country) for country in group]
+    if None in start_times:
+        return None
+    return min(start_times)
+
+
+def _format_time(value):
+    """Format an aware datetime as a Finding API timestamp."""
+    value = value.astimezone(timezone.utc)
+    return f"{value:%Y-%m-%dT%H:%M:%S}.{value.microsecond // 1000:03d}Z"
+
+
+def _first(data, key, default):
+    """Unwrap a Finding API field, which holds its value in a one-element list."""
+    value = data.get(key)
+    if not value:
+        return default
+    return value[0] if isinstance(value, list) else value
 
 
 # Example usage
@@ -0,0 +1,389 @@
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dealsteal.bench import load_fixture
+
+LOGGER = logging.getLogger(__name__)
+
+EBAY_PATH = "/ebay/finding"
+TODOIST_API_PATH = "/todoist/rest/v2"
+TODOIST_SYNC_PATH = "/todoist/sync/v9/sync"
+STATS_PATH = "/_stats"
+
+
+@dataclass
+class FakeServiceConfig:
+    """Behaviour of the fake services.
+
+    Attributes:
+        latency (float): Seconds added to every response.
+        latency_jitter (float): Maximum random seconds added on top of ``latency``.
+        error_rate (float): Fraction of requests answered with a 500.
+        throttle_rps (float): Requests per second allowed before answering 429, None for no limit.
+        items_per_country (int): Matching auctions per searched country.
+        end_spacing (float): Seconds between the end times of consecutive auctions.
+        seed (int): Seed for latency jitter and injected errors.
+    """
+
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rps: float = None
+    items_per_country: int = 5
+    end_spacing: float = 600.0
+    seed: int = 0
+
+
+class FakeServices:
+    """Local stand-in for the eBay Finding API and the Todoist REST and Sync APIs.
+
+    All services are served by one threaded HTTP server. Search results are
+    generated deterministically from the request, so repeated searches return
+    the same auctions, and created tasks are kept in memory. Request counts per
+    endpoint and status are available through :attr:`stats` or ``GET /_stats``.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        """Create the server without starting it.
+
+        Args:
+            config (FakeServiceConfig, optional): Service behaviour. Defaults to an ideal service.
+            host (str, optional): Interface to bind. Defaults to 127.0.0.1.
+            port (int, optional): Port to bind, 0 for a free one. Defaults to 0.
+        """
+        self.config = config or FakeServiceConfig()
+        self.tasks = {}
+        self.calls = Counter()
+        self.statuses = Counter()
+        self.epoch = datetime.now(timezone.utc)
+        self._random = random.Random(self.config.seed)
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tokens = self.config.throttle_rps or 0
+        self._refilled_at = time.monotonic()
+        self._template_item = load_fixture()["findItemsAdvancedResponse"][0][
+            "searchResult"
+        ][0]["item"][0]
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def ebay_url(self):
+        return f"{self.base_url}{EBAY_PATH}"
+
+    @property
+    def todoist_api_url(self):
+        return f"{self.base_url}{TODOIST_API_PATH}"
+
+    @property
+    def todoist_sync_url(self):
+        return f"{self.base_url}{TODOIST_SYNC_PATH}"
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "statuses": {str(code): count for code, count in self.statuses.items()},
+                "tasks": len(self.tasks),
+            }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        LOGGER.info(f"Fake services listening on {self.base_url}.")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def point(self, searcher=None, client=None):
+        """Point an eBay searcher and a Todoist client at these fake services."""
+        point_at(self.base_url, searcher, client)
+
+    def _admit(self, endpoint):
+        """Count a request and decide whether it is throttled or fails.
+
+        Returns:
+            int: 429 or 500 to reject the request, None to serve it.
+        """
+        with self._lock:
+            self.calls[endpoint] += 1
+            delay = self.config.latency + self._random.uniform(
+                0, self.config.latency_jitter
+            )
+            failed = self._random.random() < self.config.error_rate
+            throttled = False
+
+            if self.config.throttle_rps:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.config.throttle_rps,
+                    self._tokens + (now - self._refilled_at) * self.config.throttle_rps,
+                )
+                self._refilled_at = now
+                throttled = self._tokens < 1
+                if not throttled:
+                    self._tokens -= 1
+
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            return 429
+        if failed:
+            return 500
+        return None
+
+    def _record_status(self, status):
+        with self._lock:
+            self.statuses[status] += 1
+
+    def _find_items(self, payload):
+        filters = {
+            item["name"]: item["value"] for item in payload.get("itemFilter", [])
+        }
+        countries = filters.get("LocatedIn") or ["DE"]
+        countries = [countries] if isinstance(countries, str) else countries
+        min_price = float(filters.get("MinPrice") or 1)
+        max_price = float(filters.get("MaxPrice") or min_price + 1000)
+        pagination = payload.get("paginationInput", {})
+        per_page = int(pagination.get("entriesPerPage", 100))
+        page_number = int(pagination.get("pageNumber", 1))
+        total = self.config.items_per_country * len(countries)
+        first = (page_number - 1) * per_page
+        indices = range(first, min(first + per_page, total))
+
+        items = [
+            self._make_item(
+                payload.get("keywords", ""),
+                countries[index % len(countries)],
+                index,
+                min_price,
+                max_price,
+            )
+            for index in indices
+        ]
+        return {
+            "findItemsAdvancedResponse": [
+                {
+                    "ack": ["Success"],
+                    "searchResult": [{"@count": str(len(items)), "item": items}],
+                    "paginationOutput": [
+                        {
+                            "pageNumber": [str(page_number)],
+                            "entriesPerPage": [str(per_page)],
+                            "totalPages": [str(max(-(-total // per_page), 1))],
+                            "totalEntries": [str(total)],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _make_item(self, keywords, country, index, min_price, max_price):
+        digest = hashlib.sha1(f"{keywords}|{country}|{index}".encode()).hexdigest()
+        end_time = self.epoch + timedelta(seconds=(index + 1) * self.config.end_spacing)
+        price = min_price + (index * 7.31) % max(max_price - min_price, 1)
+
+        item = copy.deepcopy(self._template_item)
+        item["itemId"] = [str(int(digest[:12], 16))]
+        item["title"] = [f"{keywords} #{index}"]
+        item["country"] = [country]
+        item["listingInfo"][0]["endTime"] = [
+            end_time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        ]
+        item["sellingStatus"][0]["currentPrice"][0]["__value__"] = f"{price:.2f}"
+        return item
+
+    def _create_task(self, args):
+        with self._lock:
+            task_id = str(next(self._task_ids))
+            self.tasks[task_id] = {"id": task_id, **args}
+            return task_id
+
+    def _sync(self, commands):
+        sync_status = {}
+        temp_id_mapping = {}
+
+        for command in commands:
+            args = command.get("args", {})
+            if command["type"] == "item_add":
+                task_id = self._create_task(args)
+                temp_id_mapping[command["temp_id"]] = task_id
+                sync_status[command["uuid"]] = "ok"
+            elif command["type"] in ("item_delete", "item_close"):
+                with self._lock:
+                    found = self.tasks.pop(str(args.get("id")), None)
+                sync_status[command["uuid"]] = (
+                    "ok" if found else {"error": "Item not found"}
+                )
+            else:
+                sync_status[command["uuid"]] = {"error": "Unknown command"}
+
+        return {"sync_status": sync_status, "temp_id_mapping": temp_id_mapping}
+
+
+def point_at(base_url, searcher=None, client=None):
+    """Point an eBay searcher and a Todoist client at fake services.
+
+    Args:
+        base_url (str): Base URL of the fake services, e.g. ``http://127.0.0.1:8080``.
+        searcher (EbayAuctionSearcher, optional): Searcher whose EBAY_API_URL is replaced.
+        client (TodoistClient, optional): Client whose REST and Sync URLs are replaced.
+    """
+    if searcher is not None:
+        searcher.EBAY_API_URL = f"{base_url}{EBAY_PATH}"
+    if client is not None:
+        client.api_url = f"{base_url}{TODOIST_API_PATH}"
+        client.url = f"{client.api_url}/tasks"
+        client.sync_url = f"{base_url}{TODOIST_SYNC_PATH}"
+
+
+def _handler_for(services):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):  # noqa: N802
+            path, query = self._route()
+            if path == STATS_PATH:
+                return self._respond(200, services.stats, count=False)
+
+            rejected = services._admit(f"GET {self._endpoint(path)}")
+            if rejected:
+                return self._respond(rejected, {"error": "injected"})
+
+            if path == f"{TODOIST_API_PATH}/projects":
+                return self._respond(200, [{"id": "1", "name": "Deals"}])
+
+            if path == f"{TODOIST_API_PATH}/tasks":
+                project_id = query.get("project_id", [None])[0]
+                with services._lock:
+                    tasks = [
+                        task
+                        for task in services.tasks.values()
+                        if project_id is None
+                        or str(task.get("project_id")) == project_id
+                    ]
+                return self._respond(200, tasks)
+
+            if path.startswith(f"{TODOIST_API_PATH}/tasks/"):
+                task = services.tasks.get(path.rsplit("/", 1)[1])
+                return self._respond(200 if task else 404, task or {})
+
+            return self._respond(404, {})
+
+        def do_POST(self):  # noqa: N802
+            path, _ = self._route()
+            body = self._read_json()
+            rejected = services._admit(f"POST {self._endpoint(path)}")
+            if rejected:
+                return self._respond(rejected, {"error": "injected"})
+
+            if path == EBAY_PATH:
+                return self._respond(200, services._find_items(body))
+
+            if path == f"{TODOIST_API_PATH}/tasks":
+                task_id = services._create_task(body)
+                return self._respond(200, services.tasks[task_id])
+
+            if path == TODOIST_SYNC_PATH:
+                return self._respond(200, services._sync(body.get("commands", [])))
+
+            return self._respond(404, {})
+
+        def do_DELETE(self):  # noqa: N802
+            path, _ = self._route()
+            rejected = services._admit(f"DELETE {self._endpoint(path)}")
+            if rejected:
+                return self._respond(rejected, {"error": "injected"})
+
+            with services._lock:
+                found = services.tasks.pop(path.rsplit("/", 1)[1], None)
+            return self._respond(204 if found else 404, None)
+
+        def log_message(self, *args):
+            pass
+
+        def _route(self):
+            parsed = urlparse(self.path)
+            return parsed.path, parse_qs(parsed.query)
+
+        def _endpoint(self, path):
+            if path.startswith(f"{TODOIST_API_PATH}/tasks/"):
+                return f"{TODOIST_API_PATH}/tasks/{{id}}"
+            return path
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _respond(self, status, payload, count=True):
+            if count:
+                services._record_status(status)
+            body = b"" if payload is None else json.dumps(payload).encode()
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main(argv=None):
+    """Serve the fake services until interrupted."""
+    parser = argparse.ArgumentParser(description="Fake eBay and Todoist services.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    for name, value in asdict(FakeServiceConfig()).items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=type(value) if value is not None else float,
+            default=value,
+        )
+    args = vars(parser.parse_args(argv))
+    host, port = args.pop("host"), args.pop("port")
+
+    logging.basicConfig(level=logging.INFO)
+    services = FakeServices(FakeServiceConfig(**args), host=host, port=port)
+    LOGGER.info(
+        f"eBay: {services.ebay_url}, Todoist: {services.todoist_api_url}, "
+        f"Sync: {services.todoist_sync_url}"
+    )
+    try:
+        services._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        services._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
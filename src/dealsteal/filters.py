@@ -0,0 +1,231 @@
+import functools
+import logging
+import operator
+import re
+
+LOGGER = logging.getLogger(__name__)
+
+# Numeric fields a filter can bound with "min" and "max". A missing value, such
+# as an unknown feedback score, fails every bound.
+NUMERIC_FIELDS = {
+    "price": operator.attrgetter("price"),
+    "shipping_cost": operator.attrgetter("shipping_cost"),
+    "total_price": lambda auction: auction.price + auction.shipping_cost,
+    "feedback_score": operator.attrgetter("feedback_score"),
+    "feedback_percentage": operator.attrgetter("feedback_percentage"),
+    "time_remaining": lambda auction: auction.time_remaining.total_seconds(),
+}
+# Text fields a filter can restrict with "in" and "not_in" (exact values) and
+# "match" and "exclude" (case-insensitive regular expressions).
+TEXT_FIELDS = (
+    "title",
+    "country",
+    "category",
+    "category_id",
+    "condition_id",
+    "condition_display_name",
+    "listing_type",
+    "seller_user_id",
+    "location",
+)
+NUMERIC_OPERATORS = {"min": operator.ge, "max": operator.le}
+TEXT_OPERATORS = ("in", "not_in", "match", "exclude")
+# Below this many auctions, building NumPy columns costs more than it saves.
+VECTORIZE_THRESHOLD = 64
+
+
+class FilterError(ValueError):
+    """Raised when a watchlist entry's filters cannot be compiled."""
+
+
+class Rule:
+    """The compiled filters of one watchlist entry.
+
+    A rule is the conjunction of numeric bounds and text conditions. Over a
+    batch of auctions the bounds are evaluated column-wise with NumPy, each
+    column extracted once per batch and shared by every rule; text conditions
+    use regular expressions compiled once, when the rule is built.
+    """
+
+    def __init__(self, bounds, conditions):
+        """Create the rule, usually through :func:`compile_rule`.
+
+        Args:
+            bounds (list): ``(field, operator name, value)`` numeric bounds.
+            conditions (list): ``(field, operator name, value)`` text conditions, with
+                value sets for "in" and "not_in" and compiled patterns otherwise.
+        """
+        self.bounds = bounds
+        self.conditions = conditions
+
+    def matches(self, auction):
+        """Check a single auction against the rule."""
+        for field, name, value in self.bounds:
+            actual = NUMERIC_FIELDS[field](auction)
+            if actual is None or not NUMERIC_OPERATORS[name](actual, value):
+                return False
+        return all(
+            _check_condition(getattr(auction, field), name, value)
+            for field, name, value in self.conditions
+        )
+
+    def evaluate(self, auctions, columns=None):
+        """Check a batch of auctions against the rule.
+
+        Args:
+            auctions (list): The auctions.
+            columns (Columns, optional): Numeric columns of ``auctions`` shared between rules.
+                Defaults to None, which evaluates auction by auction.
+
+        Returns:
+            list: One bool per auction.
+        """
+        if columns is None:
+            return [self.matches(auction) for auction in auctions]
+
+        mask = columns.true()
+        for field, name, value in self.bounds:
+            mask &= NUMERIC_OPERATORS[name](columns[field], value)
+
+        keep = mask.tolist()
+        if self.conditions:
+            for index, auction in enumerate(auctions):
+                if keep[index]:
+                    keep[index] = all(
+                        _check_condition(getattr(auction, field), name, value)
+                        for field, name, value in self.conditions
+                    )
+        return keep
+
+
+class Columns:
+    """Numeric columns of a batch of auctions, extracted on first use.
+
+    Missing values become NaN, which fails every comparison, so they behave as
+    in :meth:`Rule.matches`.
+    """
+
+    def __init__(self, auctions, numpy):
+        self.auctions = auctions
+        self.numpy = numpy
+        self._columns = {}
+
+    def __getitem__(self, field):
+        column = self._columns.get(field)
+        if column is None:
+            getter = NUMERIC_FIELDS[field]
+            values = [getter(auction) for auction in self.auctions]
+            column = self.numpy.array(
+                [float("nan") if value is None else value for value in values],
+                dtype=float,
+            )
+            self._columns[field] = column
+        return column
+
+    def true(self):
+        """Return an all-True mask for the batch."""
+        return self.numpy.ones(len(self.auctions), dtype=bool)
+
+
+def compile_rule(entry):
+    """Compile the price range and ``filters`` of a watchlist entry into a rule.
+
+    ``filters`` maps field names to operators, e.g.::
+
+        {
+            "total_price": {"max": 150},
+            "feedback_score": {"min": 100},
+            "condition_id": {"in": ["1000", "3000"]},
+            "title": {"exclude": ["defe[ck]t", "hero ?3\\\\b"]},
+        }
+
+    Args:
+        entry (dict): The watchlist entry.
+
+    Returns:
+        Rule: The compiled rule.
+
+    Raises:
+        FilterError: If a field or operator is unknown or a value is invalid.
+    """
+    bounds = []
+    conditions = []
+    for name in ("min", "max"):
+        value = entry.get(f"{name}_price") or None
+        if value is not None:
+            try:
+                bounds.append(("price", name, float(value)))
+            except (TypeError, ValueError) as error:
+                raise FilterError(f"Invalid {name}_price: {error}") from error
+
+    filters = entry.get("filters") or {}
+    if not isinstance(filters, dict):
+        raise FilterError(f"Filters of {entry.get('keywords')!r} must be an object.")
+
+    for field, spec in filters.items():
+        if not isinstance(spec, dict):
+            raise FilterError(f"Filter on {field!r} must be an object of operators.")
+
+        for name, value in spec.items():
+            numeric = field in NUMERIC_FIELDS and name in NUMERIC_OPERATORS
+            if not numeric and not (field in TEXT_FIELDS and name in TEXT_OPERATORS):
+                raise FilterError(f"Unknown filter {name!r} on {field!r}.")
+
+            try:
+                if numeric:
+                    bounds.append((field, name, float(value)))
+                else:
+                    conditions.append((field, name, _compile_condition(name, value)))
+            except (TypeError, ValueError, re.error) as error:
+                raise FilterError(
+                    f"Invalid value for {name!r} on {field!r}: {error}"
+                ) from error
+
+    return Rule(bounds, conditions)
+
+
+def evaluate_rules(rules, auctions):
+    """Check a batch of auctions against several rules.
+
+    Args:
+        rules (list): :class:`Rule` objects.
+        auctions (list): The auctions.
+
+    Returns:
+        list: Per rule, one bool per auction.
+    """
+    columns = None
+    if len(auctions) >= VECTORIZE_THRESHOLD and any(rule.bounds for rule in rules):
+        numpy = import_numpy()
+        if numpy is not None:
+            columns = Columns(auctions, numpy)
+    return [rule.evaluate(auctions, columns) for rule in rules]
+
+
+def _compile_condition(name, value):
+    values = value if isinstance(value, list) else [value]
+    if name in ("in", "not_in"):
+        return {str(item) for item in values}
+    return re.compile("|".join(f"(?:{item})" for item in values), re.IGNORECASE)
+
+
+def _check_condition(actual, name, value):
+    if name == "in":
+        return str(actual) in value
+    if name == "not_in":
+        return str(actual) not in value
+    found = value.search(str(actual)) is not None
+    return found if name == "match" else not found
+
+
+@functools.cache
+def import_numpy():
+    """Import NumPy on first use, returning None when it is not installed.
+
+    Shared by the vectorized paths of the filters and the eBay searcher.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
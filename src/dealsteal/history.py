@@ -0,0 +1,300 @@
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from dealsteal.workqueue import connect
+
+LOGGER = logging.getLogger(__name__)
+
+HISTORY_PATH = "store/history.sqlite3"
+
+# SQLite allows at most 999 parameters per statement in older builds.
+_LOOKUP_CHUNK = 500
+
+
+class AuctionHistory:
+    """Local record of the auctions every search returned, with price statistics.
+
+    Auctions are kept in SQLite, keyed by item ID and search and indexed by end
+    time. Next to them, each search has a price histogram per currency with
+    logarithmic buckets ``BUCKET_GROWTH`` apart, so quantiles are accurate to
+    about half that ratio. A recorded batch only moves the buckets of the items
+    that are new or changed price, and pruning ended auctions moves them back,
+    so the statistics never need a rescan of the history. The histograms are
+    also held in memory, which makes scoring a price independent of how much
+    history there is.
+
+    With ``deal_percentile`` set, :meth:`is_deal` accepts only auctions priced
+    at or below that percentile of their search's history, once the search has
+    ``min_samples`` prices.
+    """
+
+    BUCKET_GROWTH = 1.05
+    DEFAULT_RETENTION_DAYS = 30
+    DEFAULT_MIN_SAMPLES = 20
+
+    def __init__(
+        self,
+        path=HISTORY_PATH,
+        retention_days=DEFAULT_RETENTION_DAYS,
+        deal_percentile=None,
+        min_samples=DEFAULT_MIN_SAMPLES,
+        clock=time.time,
+    ):
+        """Open the history, creating its tables if needed.
+
+        Args:
+            path (str, optional): Database file. Defaults to store/history.sqlite3.
+            retention_days (float, optional): Days an ended auction is kept. Defaults to 30.
+            deal_percentile (float, optional): Highest price percentile, from 0 to 1, that
+                counts as a deal. Defaults to None, which accepts every auction.
+            min_samples (int, optional): Prices a search needs before it filters deals. Defaults to 20.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.retention_days = retention_days
+        self.deal_percentile = deal_percentile
+        self.min_samples = min_samples
+        self.clock = clock
+        self._connection = connect(path)
+        self._lock = threading.Lock()
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS auctions ("
+            " item_id TEXT, query TEXT, country TEXT, price REAL, currency TEXT,"
+            " end_time REAL, recorded_at REAL, PRIMARY KEY (item_id, query));"
+            "CREATE INDEX IF NOT EXISTS auctions_query ON auctions (query, end_time);"
+            "CREATE INDEX IF NOT EXISTS auctions_end_time ON auctions (end_time);"
+            "CREATE TABLE IF NOT EXISTS price_buckets ("
+            " query TEXT, currency TEXT, bucket INTEGER, count INTEGER,"
+            " PRIMARY KEY (query, currency, bucket));"
+        )
+        self._histograms = {}
+        self._cumulative = {}
+        for query, currency, bucket, count in self._connection.execute(
+            "SELECT query, currency, bucket, count FROM price_buckets"
+        ):
+            self._histograms.setdefault((query, currency), Counter())[bucket] = count
+
+    def record(self, key, auctions):
+        """Store the auctions a search returned in one transaction.
+
+        Auctions seen before have their price updated, and only changed prices
+        move the search's histogram.
+
+        Args:
+            key (str | tuple): Identity of the search, e.g. ``CoalescedQuery.key``.
+            auctions (list): :class:`Auction` records it returned.
+
+        Returns:
+            int: Number of auctions that were not in the history yet.
+        """
+        query = _query_name(key)
+        now = self.clock()
+        rows = {
+            str(auction.item_id): (
+                str(auction.item_id),
+                query,
+                auction.country,
+                auction.price,
+                auction.currency,
+                auction.end_time.timestamp(),
+                now,
+            )
+            for auction in auctions
+            if auction.price and auction.price > 0
+        }
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                previous = self._previous_prices(query, list(rows))
+                deltas = Counter()
+                for item_id, (_, _, _, price, currency, _, _) in rows.items():
+                    old = previous.get(item_id)
+                    new_bucket = (currency, _bucket(price))
+                    if old is not None:
+                        old_bucket = (old[1], _bucket(old[0]))
+                        if old_bucket == new_bucket:
+                            continue
+                        deltas[old_bucket] -= 1
+                    deltas[new_bucket] += 1
+
+                self._connection.executemany(
+                    "INSERT INTO auctions VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (item_id, query) DO UPDATE SET price = excluded.price,"
+                    " currency = excluded.currency, end_time = excluded.end_time,"
+                    " recorded_at = excluded.recorded_at",
+                    rows.values(),
+                )
+                self._apply(query, deltas)
+            finally:
+                self._connection.execute("COMMIT")
+
+        return len(rows) - len(previous)
+
+    def prune(self, now=None):
+        """Drop auctions that ended more than ``retention_days`` ago from the statistics.
+
+        Args:
+            now (float, optional): Reference time in seconds. Defaults to the clock.
+
+        Returns:
+            int: Number of pruned auctions.
+        """
+        cutoff = (now or self.clock()) - self.retention_days * 86_400
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._connection.execute(
+                    "SELECT query, currency, price FROM auctions WHERE end_time < ?",
+                    (cutoff,),
+                ).fetchall()
+                deltas = {}
+                for query, currency, price in rows:
+                    deltas.setdefault(query, Counter())[(currency, _bucket(price))] -= 1
+                for query, query_deltas in deltas.items():
+                    self._apply(query, query_deltas)
+                self._connection.execute(
+                    "DELETE FROM auctions WHERE end_time < ?", (cutoff,)
+                )
+            finally:
+                self._connection.execute("COMMIT")
+
+        if rows:
+            LOGGER.info(f"Pruned {len(rows)} ended auctions from the history.")
+        return len(rows)
+
+    def count(self, key, currency):
+        """Number of prices recorded for a search in ``currency``."""
+        cumulative = self._cumulative_for(_query_name(key), currency)
+        return cumulative[1][-1] if cumulative else 0
+
+    def percentile(self, key, currency, price):
+        """Share of a search's recorded prices below ``price``.
+
+        Prices in the same bucket count as half below, half above.
+
+        Args:
+            key (str | tuple): Identity of the search.
+            currency (str): Currency of the price.
+            price (float): Price to score.
+
+        Returns:
+            float: Percentile from 0 to 1, or None if the search has no prices in ``currency``.
+        """
+        cumulative = self._cumulative_for(_query_name(key), currency)
+        if not cumulative or price is None or price <= 0:
+            return None
+
+        buckets, totals = cumulative
+        bucket = _bucket(price)
+        position = bisect.bisect_left(buckets, bucket)
+        below = totals[position - 1] if position else 0
+        same = 0
+        if position < len(buckets) and buckets[position] == bucket:
+            same = totals[position] - below
+        return (below + same / 2) / totals[-1]
+
+    def quantile(self, key, currency, q):
+        """Estimate a price quantile of a search, e.g. ``q=0.5`` for the median.
+
+        Args:
+            key (str | tuple): Identity of the search.
+            currency (str): Currency of the prices.
+            q (float): Quantile from 0 to 1.
+
+        Returns:
+            float: The estimated price, or None if the search has no prices in ``currency``.
+        """
+        cumulative = self._cumulative_for(_query_name(key), currency)
+        if not cumulative:
+            return None
+
+        buckets, totals = cumulative
+        rank = min(max(q, 0.0), 1.0) * totals[-1]
+        position = min(bisect.bisect_left(totals, rank), len(buckets) - 1)
+        return self.BUCKET_GROWTH ** (buckets[position] + 0.5)
+
+    def is_deal(self, key, auction):
+        """Check whether an auction's price is an outlier worth a notification.
+
+        Args:
+            key (str | tuple): Identity of the search that found it.
+            auction (Auction): The auction.
+
+        Returns:
+            bool: True unless the search has enough history and the price is above ``deal_percentile``.
+        """
+        if self.deal_percentile is None:
+            return True
+        if self.count(key, auction.currency) < self.min_samples:
+            return True
+
+        percentile = self.percentile(key, auction.currency, auction.price)
+        return percentile is None or percentile <= self.deal_percentile
+
+    def _previous_prices(self, query, item_ids):
+        previous = {}
+        for start in range(0, len(item_ids), _LOOKUP_CHUNK):
+            chunk = item_ids[start : start + _LOOKUP_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            for item_id, price, currency in self._connection.execute(
+                "SELECT item_id, price, currency FROM auctions"
+                f" WHERE query = ? AND item_id IN ({placeholders})",
+                (query, *chunk),
+            ):
+                previous[item_id] = (price, currency)
+        return previous
+
+    def _apply(self, query, deltas):
+        deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        self._connection.executemany(
+            "INSERT INTO price_buckets VALUES (?, ?, ?, ?) ON CONFLICT"
+            " (query, currency, bucket) DO UPDATE SET count = count + excluded.count",
+            [
+                (query, currency, bucket, delta)
+                for (currency, bucket), delta in deltas.items()
+            ],
+        )
+        self._connection.execute(
+            "DELETE FROM price_buckets WHERE query = ? AND count <= 0", (query,)
+        )
+
+        for (currency, bucket), delta in deltas.items():
+            histogram = self._histograms.setdefault((query, currency), Counter())
+            histogram[bucket] += delta
+            if histogram[bucket] <= 0:
+                del histogram[bucket]
+            self._cumulative.pop((query, currency), None)
+
+    def _cumulative_for(self, query, currency):
+        with self._lock:
+            cumulative = self._cumulative.get((query, currency))
+            if cumulative is None:
+                histogram = self._histograms.get((query, currency))
+                if not histogram:
+                    return None
+                buckets = sorted(histogram)
+                totals = []
+                total = 0
+                for bucket in buckets:
+                    total += histogram[bucket]
+                    totals.append(total)
+                cumulative = self._cumulative[(query, currency)] = (buckets, totals)
+            return cumulative
+
+
+def _query_name(key):
+    return key if isinstance(key, str) else json.dumps(key)
+
+
+def _bucket(price):
+    return math.floor(math.log(price) / math.log(AuctionHistory.BUCKET_GROWTH))
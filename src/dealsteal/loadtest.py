@@ -0,0 +1,179 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, fields
+from datetime import datetime, timedelta, timezone
+
+from dealsteal.fakes import STATS_PATH, FakeServiceConfig, FakeServices, point_at
+from dealsteal.transport import HttpTransport
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_QUERIES = 500
+DEFAULT_SEEN_ITEMS = 20_000
+DEFAULT_MAX_TIME_REMAINING = 36_000
+
+
+class RecordingTransport(HttpTransport):
+    """HTTP transport that records the wall time of every call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self._latencies_lock = threading.Lock()
+
+    def request(self, method, url, timeout=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().request(method, url, timeout=timeout, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._latencies_lock:
+                self.latencies.append(elapsed)
+
+
+def run_load_test(
+    queries=DEFAULT_QUERIES,
+    seen_items=DEFAULT_SEEN_ITEMS,
+    config=None,
+    max_workers=8,
+    max_time_remaining=DEFAULT_MAX_TIME_REMAINING,
+):
+    """Drive a full runner pass against fake services and measure it.
+
+    The fake services run in a child process, so the reported peak RSS belongs
+    to the runner alone.
+
+    Args:
+        queries (int, optional): Number of watchlist entries, each with its own keywords. Defaults to 500.
+        seen_items (int, optional): Number of pre-seeded entries in the seen-item store. Defaults to 20000.
+        config (FakeServiceConfig, optional): Behaviour of the fake services. Defaults to an ideal service.
+        max_workers (int, optional): Concurrency of the eBay searcher. Defaults to 8.
+        max_time_remaining (int, optional): Maximum time remaining in seconds. Defaults to 36000.
+
+    Returns:
+        dict: Wall time, calls made, client-side latency percentiles and peak RSS.
+    """
+    from dealsteal.ebay import EbayAuctionSearcher
+    from dealsteal.runner import run_once
+    from dealsteal.seen import SeenItemStore
+    from dealsteal.todoist import TodoistClient
+
+    config = config or FakeServiceConfig()
+    parent_connection, child_connection = multiprocessing.Pipe()
+    server = multiprocessing.Process(
+        target=_serve, args=(asdict(config), child_connection), daemon=True
+    )
+    server.start()
+    base_url = parent_connection.recv()
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            pattern = _write_watchlist(directory, queries)
+            items_file = _write_seen_items(directory, seen_items)
+
+            transport = RecordingTransport(pool_size=max_workers + 1)
+            searcher = EbayAuctionSearcher(
+                "token", "app", max_workers=max_workers, transport=transport
+            )
+            client = TodoistClient(
+                "token", seen_items=SeenItemStore(items_file), transport=transport
+            )
+            point_at(base_url, searcher, client)
+
+            started = time.perf_counter()
+            run_once(searcher, client, max_time_remaining, "1", pattern=pattern)
+            wall_time = time.perf_counter() - started
+            stats = transport.get(f"{base_url}{STATS_PATH}").json()
+            transport.close()
+    finally:
+        server.terminate()
+        server.join()
+
+    latencies = sorted(transport.latencies)
+    return {
+        "queries": queries,
+        "seen_items": seen_items,
+        "wall_time_sec": round(wall_time, 3),
+        "calls": stats["calls"],
+        "statuses": stats["statuses"],
+        "tasks_created": stats["tasks"],
+        "latency_p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mib": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def _serve(config, connection):
+    services = FakeServices(FakeServiceConfig(**config))
+    connection.send(services.base_url)
+    services._server.serve_forever()
+
+
+def _write_watchlist(directory, queries):
+    path = os.path.join(directory, "watchlist.json")
+    entries = [
+        {"keywords": f"load item {index}", "min_price": 10, "max_price": 500}
+        for index in range(queries)
+    ]
+    with open(path, "w") as file:
+        json.dump(entries, file)
+    return os.path.join(directory, "*.json")
+
+
+def _write_seen_items(directory, count):
+    path = os.path.join(directory, "items.txt")
+    end_time = (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+    with open(path, "w") as file:
+        file.writelines(f"seen-{index}\t{end_time}\n" for index in range(count))
+    return path
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def main(argv=None):
+    """Run the load test and print its report as JSON."""
+    parser = argparse.ArgumentParser(
+        description="Load test the runner against fake services."
+    )
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--seen-items", type=int, default=DEFAULT_SEEN_ITEMS)
+    parser.add_argument("--max-workers", type=int, default=8)
+    for field in fields(FakeServiceConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=int if field.type == "int" or field.type is int else float,
+            default=field.default,
+        )
+    args = vars(parser.parse_args(argv))
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_load_test(
+        queries=args.pop("queries"),
+        seen_items=args.pop("seen_items"),
+        max_workers=args.pop("max_workers"),
+        config=FakeServiceConfig(**args),
+    )
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
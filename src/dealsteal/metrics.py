@@ -0,0 +1,294 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOGGER = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+SUMMARY_PATH = "/summary"
+DEFAULT_PORT = 5000
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = {
+    "dealsteal_requests_total": "HTTP requests by endpoint, country and status.",
+    "dealsteal_request_seconds": "HTTP request latency by endpoint and country.",
+    "dealsteal_response_bytes_total": "Response body bytes by endpoint.",
+    "dealsteal_cache_hits_total": "Searches answered from the response cache.",
+    "dealsteal_budget_denied_total": "Searches skipped because the call budget ran low.",
+    "dealsteal_category_routed_total": "Searches restricted to their learned categories.",
+    "dealsteal_items_returned_total": "Items returned by eBay before filtering.",
+    "dealsteal_items_kept_total": "Items kept after the time filter.",
+    "dealsteal_dedup_hits_total": "Tasks skipped because the item was already used.",
+    "dealsteal_todoist_submits_total": "Todoist task submissions by outcome.",
+    "dealsteal_span_seconds": "Duration of timed run phases.",
+}
+
+
+class MetricsRegistry:
+    """In-process counters and histograms for searches and submissions.
+
+    Metrics are keyed by name and a sorted tuple of label pairs. A disabled
+    registry returns from every method before touching a lock or building a
+    label key, so instrumented hot paths cost one attribute check. Counters
+    accumulate for the life of the process; :meth:`start_run` marks the start
+    of a run so :meth:`summary` can report what happened since.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS, clock=time.time):
+        """Create an empty registry.
+
+        Args:
+            enabled (bool, optional): Whether to record anything. Defaults to True.
+            buckets (tuple, optional): Upper bounds of the histogram buckets in seconds. Defaults to 5ms to 30s.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.clock = clock
+        self._counters = {}
+        self._histograms = {}
+        self._run_counters = {}
+        self._run_spans = {}
+        self._run_started_at = None
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        """Add ``amount`` to a counter.
+
+        Args:
+            name (str): Metric name.
+            amount (float, optional): Value to add. Defaults to 1.
+            **labels: Label values of the series.
+        """
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram.
+
+        Args:
+            name (str): Metric name.
+            value (float): Observed value, usually seconds.
+            **labels: Label values of the series.
+        """
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    @contextmanager
+    def span(self, name):
+        """Time a block as a named phase of the current run.
+
+        Args:
+            name (str): Name of the phase, e.g. ``"search"`` or ``"submit"``.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe("dealsteal_span_seconds", elapsed, span=name)
+            with self._lock:
+                count, total, longest = self._run_spans.get(name, (0, 0.0, 0.0))
+                self._run_spans[name] = (
+                    count + 1,
+                    total + elapsed,
+                    max(longest, elapsed),
+                )
+
+    def start_run(self):
+        """Mark the start of a run for :meth:`summary`."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._run_counters = dict(self._counters)
+            self._run_spans = {}
+            self._run_started_at = self.clock()
+
+    def summary(self):
+        """Summarize the current run.
+
+        Returns:
+            dict: Start time, timed phases and counter increases since :meth:`start_run`.
+        """
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                increase = value - self._run_counters.get((name, labels), 0)
+                if increase:
+                    series = ",".join(f"{label}={text}" for label, text in labels)
+                    counters[f"{name}{{{series}}}" if series else name] = increase
+
+            return {
+                "started_at": self._run_started_at,
+                "duration_sec": (
+                    None
+                    if self._run_started_at is None
+                    else round(self.clock() - self._run_started_at, 3)
+                ),
+                "spans": {
+                    name: {
+                        "count": count,
+                        "total_sec": round(total, 6),
+                        "max_sec": round(longest, 6),
+                    }
+                    for name, (count, total, longest) in self._run_spans.items()
+                },
+                "counters": counters,
+            }
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(buckets), count, total))
+                for key, (buckets, count, total) in self._histograms.items()
+            )
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (buckets, count, total) in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(labels + (("le", f"{bound}"),))
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(
+                f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}"
+            )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_summary(self, path):
+        """Write :meth:`summary` to ``path`` as JSON.
+
+        Args:
+            path (str): Output file.
+        """
+        if not self.enabled:
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+class MetricsServer:
+    """Serves a registry as Prometheus text on ``/metrics`` and JSON on ``/summary``."""
+
+    def __init__(self, registry, host="0.0.0.0", port=DEFAULT_PORT):  # noqa: S104
+        """Bind the server without starting it.
+
+        Args:
+            registry (MetricsRegistry): Registry to expose.
+            host (str, optional): Interface to bind. Defaults to all interfaces.
+            port (int, optional): Port to bind, 0 for a free one. Defaults to 5000.
+        """
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), _handler_for(registry))
+        self._server.daemon_threads = True
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        LOGGER.info(f"Serving metrics on port {self.port}.")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{label}="{_escape(str(value))}"' for label, value in labels)
+    return f"{{{pairs}}}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _handler_for(registry):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            if self.path == METRICS_PATH:
+                body = registry.render_prometheus().encode()
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == SUMMARY_PATH:
+                body = json.dumps(registry.summary()).encode()
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+_default_registry = MetricsRegistry(enabled=False)
+
+
+def get_default_registry():
+    """Return the process-wide registry, disabled unless enabled explicitly.
+
+    Returns:
+        MetricsRegistry: The shared registry.
+    """
+    return _default_registry
@@ -0,0 +1,360 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+OUTBOX_PATH = "store/outbox.jsonl"
+
+
+class Outbox:
+    """Durable journal of tasks waiting to be delivered to Todoist.
+
+    Matched auctions are appended to a JSON lines file before anything is sent,
+    and deliveries are recorded as acknowledgement lines, so a crash or a
+    Todoist outage loses nothing and the next run picks up where the last one
+    stopped without searching eBay again. Once enough entries are acknowledged
+    the file is compacted down to the pending ones.
+
+    A task whose command Todoist rejects, e.g. for an invalid project, is not
+    retried within the same flush, and the rejection is journaled. After
+    ``max_rejections`` of them, counted across runs, the task is moved to a
+    dead-letter file instead of being sent again on every run.
+    """
+
+    DEFAULT_COMPACT_AFTER = 500
+    DEFAULT_MAX_REJECTIONS = 3
+    DEFAULT_ATTEMPTS = 4
+    DEFAULT_BACKOFF = 1.0
+    DEFAULT_MAX_BACKOFF = 60.0
+
+    def __init__(
+        self,
+        path=OUTBOX_PATH,
+        compact_after=DEFAULT_COMPACT_AFTER,
+        max_rejections=DEFAULT_MAX_REJECTIONS,
+        dead_letter_path=None,
+    ):
+        """Open the journal, replaying it to find the pending tasks.
+
+        Args:
+            path (str, optional): Path of the journal. Defaults to store/outbox.jsonl.
+            compact_after (int, optional): Acknowledged entries that trigger a compaction. Defaults to 500.
+            max_rejections (int, optional): Rejections after which a task is dead-lettered. Defaults to 3.
+            dead_letter_path (str, optional): Where dead-lettered tasks are appended.
+                Defaults to the journal path with a ``.dead`` suffix.
+        """
+        self.path = path
+        self.compact_after = compact_after
+        self.max_rejections = max_rejections
+        self.dead_letter_path = dead_letter_path or f"{path}.dead"
+        self._pending = {}
+        self._pending_item_ids = set()
+        self._rejections = {}
+        self._acknowledged = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def append(self, tasks):
+        """Durably record tasks for delivery, skipping items that are already pending.
+
+        Args:
+            tasks (list): Task dicts with the keyword arguments of ``TodoistClient.submit_task``.
+
+        Returns:
+            int: Number of tasks added.
+        """
+        return len(self._append(tasks))
+
+    def deliver(self, client, tasks):
+        """Journal tasks and try to deliver just them, once.
+
+        Older pending entries are left to :meth:`flush`, so a backlog is not
+        sent again with every new batch.
+
+        Args:
+            client (TodoistClient): Client to deliver through.
+            tasks (list): Task dicts with the keyword arguments of ``TodoistClient.submit_task``.
+
+        Returns:
+            int: Number of the tasks delivered.
+        """
+        return self._deliver(client, self._append(tasks), attempts=1)
+
+    def flush(
+        self,
+        client,
+        attempts=DEFAULT_ATTEMPTS,
+        backoff=DEFAULT_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+    ):
+        """Deliver pending tasks in Sync API batches, retrying failed ones with backoff.
+
+        Tasks whose item is already used count as delivered. A round stops at
+        the first batch that fails completely, as Todoist is then most likely
+        down. Only tasks whose request failed are retried in the next round;
+        rejected ones wait for the next flush. Tasks that still fail after
+        ``attempts`` rounds stay in the journal.
+
+        Args:
+            client (TodoistClient): Client to deliver through.
+            attempts (int, optional): Delivery rounds before giving up for now. Defaults to 4.
+            backoff (float, optional): Seconds to wait after the first failed round, doubled after each. Defaults to 1.
+            max_backoff (float, optional): Longest wait between rounds in seconds. Defaults to 60.
+
+        Returns:
+            int: Number of tasks still pending.
+        """
+        self._deliver(client, None, attempts, backoff, max_backoff)
+
+        remaining = len(self)
+        if remaining:
+            LOGGER.error(f"{remaining} tasks stay in the outbox for the next run.")
+        return remaining
+
+    def acknowledge(self, entry_ids):
+        """Record delivered entries, compacting the journal once enough have piled up.
+
+        Args:
+            entry_ids (list): IDs of the delivered entries.
+        """
+        with self._lock:
+            entry_ids = self._remove(entry_ids)
+            if entry_ids:
+                self._write_removal({"ack": entry_ids})
+
+    def _append(self, tasks):
+        entry_ids = []
+        lines = []
+        with self._lock:
+            for task in tasks:
+                item_id = task.get("item_id")
+                if item_id and item_id in self._pending_item_ids:
+                    continue
+
+                entry_id = self._next_id
+                self._next_id += 1
+                entry_ids.append(entry_id)
+                self._pending[entry_id] = task
+                if item_id:
+                    self._pending_item_ids.add(item_id)
+                lines.append(json.dumps({"id": entry_id, "task": task}) + "\n")
+
+            if lines:
+                self._write(lines)
+        return entry_ids
+
+    def _deliver(
+        self,
+        client,
+        entry_ids,
+        attempts,
+        backoff=DEFAULT_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+    ):
+        """Deliver the given entries, or all pending ones, in up to ``attempts`` rounds.
+
+        Returns:
+            int: Number of entries delivered.
+        """
+        retrying = None if entry_ids is None else set(entry_ids)
+        delivered_count = 0
+        for attempt in range(attempts):
+            with self._lock:
+                pending = [
+                    (entry_id, task)
+                    for entry_id, task in self._pending.items()
+                    if retrying is None or entry_id in retrying
+                ]
+            if not pending:
+                break
+
+            delivered = []
+            rejected = {}
+            for start in range(0, len(pending), client.SYNC_BATCH_SIZE):
+                batch = pending[start : start + client.SYNC_BATCH_SIZE]
+                unsent = []
+                for entry_id, task in batch:
+                    item_id = task.get("item_id")
+                    if item_id and client.is_item_used(item_id):
+                        delivered.append(entry_id)
+                    else:
+                        unsent.append((entry_id, task))
+
+                if not unsent:
+                    continue
+
+                errors = {}
+                results = client.submit_tasks(
+                    [task for _, task in unsent], rejected=errors
+                )
+                for position, ((entry_id, _), result) in enumerate(
+                    zip(unsent, results)
+                ):
+                    if result is not None:
+                        delivered.append(entry_id)
+                    elif position in errors:
+                        rejected[entry_id] = errors[position]
+                if not errors and all(result is None for result in results):
+                    break
+
+            self.acknowledge(delivered)
+            self._reject(rejected)
+            delivered_count += len(delivered)
+            retrying = (
+                {entry_id for entry_id, _ in pending} - set(delivered) - rejected.keys()
+            )
+            if not retrying:
+                break
+
+            if attempt + 1 < attempts:
+                delay = min(backoff * 2**attempt, max_backoff)
+                delay += random.uniform(0, delay / 2)
+                LOGGER.warning(
+                    f"{len(retrying)} tasks could not be delivered, retrying in {delay:.1f}s."
+                )
+                time.sleep(delay)
+
+        return delivered_count
+
+    def _reject(self, rejected):
+        """Count rejections of entries, dead-lettering those rejected too often.
+
+        Args:
+            rejected (dict): Error of every rejected entry, by entry ID.
+        """
+        with self._lock:
+            counted = []
+            dead = []
+            for entry_id, error in rejected.items():
+                if entry_id not in self._pending:
+                    continue
+                self._rejections[entry_id] = self._rejections.get(entry_id, 0) + 1
+                if self._rejections[entry_id] >= self.max_rejections:
+                    dead.append((entry_id, error))
+                else:
+                    counted.append(entry_id)
+
+            if counted:
+                self._write([json.dumps({"rejected": counted}) + "\n"])
+            if not dead:
+                return
+
+            self._write(
+                [
+                    json.dumps(
+                        {
+                            "id": entry_id,
+                            "task": self._pending[entry_id],
+                            "error": error,
+                        }
+                    )
+                    + "\n"
+                    for entry_id, error in dead
+                ],
+                self.dead_letter_path,
+            )
+            self._write_removal(
+                {"dead": self._remove(entry_id for entry_id, _ in dead)}
+            )
+
+        LOGGER.error(
+            f"Moved {len(dead)} tasks Todoist keeps rejecting to {self.dead_letter_path}."
+        )
+
+    def _remove(self, entry_ids):
+        """Drop entries from the pending ones; the caller holds the lock.
+
+        Returns:
+            list: IDs of the entries that were pending.
+        """
+        entry_ids = [entry_id for entry_id in entry_ids if entry_id in self._pending]
+        for entry_id in entry_ids:
+            task = self._pending.pop(entry_id)
+            self._pending_item_ids.discard(task.get("item_id"))
+            self._rejections.pop(entry_id, None)
+        self._acknowledged += len(entry_ids)
+        return entry_ids
+
+    def _write_removal(self, record):
+        if self._acknowledged >= self.compact_after or not self._pending:
+            self._compact()
+        else:
+            self._write([json.dumps(record) + "\n"])
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as file:
+            lines = file.readlines()
+
+        if lines and not lines[-1].endswith(b"\n"):
+            # A crash mid-append leaves a partial last line; cut it off so the
+            # next append starts on a line of its own.
+            LOGGER.warning(f"Dropping a torn last line from {self.path}.")
+            with open(self.path, "r+b") as file:
+                file.truncate(sum(len(line) for line in lines[:-1]))
+            lines.pop()
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                LOGGER.warning(f"Skipping an unreadable line in {self.path}.")
+                continue
+
+            if "task" in record:
+                self._pending[record["id"]] = record["task"]
+                self._next_id = max(self._next_id, record["id"] + 1)
+                if record.get("rejections"):
+                    self._rejections[record["id"]] = record["rejections"]
+            for entry_id in record.get("rejected", []):
+                if entry_id in self._pending:
+                    self._rejections[entry_id] = self._rejections.get(entry_id, 0) + 1
+            for entry_id in [*record.get("ack", []), *record.get("dead", [])]:
+                if self._pending.pop(entry_id, None) is not None:
+                    self._rejections.pop(entry_id, None)
+                    self._acknowledged += 1
+
+        self._pending_item_ids = {
+            task["item_id"] for task in self._pending.values() if task.get("item_id")
+        }
+        if self._pending:
+            LOGGER.info(f"{len(self._pending)} tasks pending in {self.path}.")
+
+    def _write(self, lines, path=None):
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, "a") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _compact(self):
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            file.writelines(
+                json.dumps(self._entry_record(entry_id, task)) + "\n"
+                for entry_id, task in self._pending.items()
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        self._acknowledged = 0
+
+    def _entry_record(self, entry_id, task):
+        record = {"id": entry_id, "task": task}
+        if self._rejections.get(entry_id):
+            record["rejections"] = self._rejections[entry_id]
+        return record
@@ -0,0 +1,272 @@
+import itertools
+import logging
+import queue
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class SearchPipeline:
+    """Streams auctions from eBay to Todoist through bounded queues.
+
+    Three stages run concurrently:
+
+    * search: ``search_workers`` threads take queries and put every auction on
+      the first queue as soon as its result page has been parsed,
+    * filter: one thread takes whatever auctions are queued, checks them in
+      batches against the filters of each search's entries, turns them into
+      tasks for the entries they match and drops items that are already used or already queued, and,
+      with a history, those whose price is not a deal,
+    * submit: one thread collects tasks into Sync API batches and sends a
+      batch when it is full or the queue runs dry. With an outbox, batches are
+      journaled first and delivered through it, so failed ones are kept for
+      the flush after the run.
+
+    The queues are bounded, so a slow stage blocks the one before it and memory
+    stays flat however many auctions a run finds. Every stage passes a sentinel
+    on when it is done, so the submit stage flushes its last batch before
+    :meth:`run` returns, also when a search failed.
+    """
+
+    DEFAULT_QUEUE_SIZE = 256
+    DEFAULT_FLUSH_INTERVAL = 1.0
+    HISTORY_BATCH_SIZE = 50
+
+    def __init__(
+        self,
+        searcher,
+        client,
+        build_task,
+        max_time_remaining=None,
+        project_id=None,
+        incremental=None,
+        outbox=None,
+        history=None,
+        search_workers=None,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+    ):
+        """Create the pipeline.
+
+        Args:
+            searcher (EbayAuctionSearcher): Searcher for the search stage.
+            client (TodoistClient): Client for the submit stage.
+            build_task (callable): Builds a task dict from an auction and a project ID.
+            max_time_remaining (int, optional): Maximum time remaining for the auction in seconds. Defaults to None.
+            project_id (str, optional): Todoist project of the tasks. Defaults to None.
+            incremental (IncrementalSearcher, optional): Serves searches from local state when set. Defaults to None.
+            outbox (Outbox, optional): Journal batches are written to before delivery. Defaults to None.
+            history (AuctionHistory, optional): Records every search's auctions and scores their prices. Defaults to None.
+            search_workers (int, optional): Number of concurrent searches. Defaults to the searcher's max_workers.
+            queue_size (int, optional): Capacity of each queue between stages. Defaults to 256.
+            flush_interval (float, optional): Seconds the submit stage waits for more tasks before
+                sending a partial batch. Defaults to 1.
+        """
+        self.searcher = searcher
+        self.client = client
+        self.build_task = build_task
+        self.max_time_remaining = max_time_remaining
+        self.project_id = project_id
+        self.incremental = incremental
+        self.outbox = outbox
+        self.history = history
+        self.search_workers = search_workers or searcher.max_workers
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self._stats_lock = threading.Lock()
+
+    def run(self, queries, on_searched=None):
+        """Run all queries through the pipeline and wait until every task is submitted.
+
+        Args:
+            queries (list): :class:`CoalescedQuery` objects, searched in this order.
+            on_searched (callable, optional): Called with each query, the number of its
+                auctions and when the first of them ends, once its search finished. Defaults to None.
+
+        Returns:
+            dict: Number of ``auctions`` found, ``tasks`` queued and ``submitted`` tasks.
+        """
+        pending_queries = queue.Queue()
+        for query in queries:
+            pending_queries.put(query)
+
+        auctions = queue.Queue(self.queue_size)
+        tasks = queue.Queue(self.queue_size)
+        stats = {"auctions": 0, "tasks": 0, "submitted": 0}
+        errors = []
+
+        search_threads = [
+            threading.Thread(
+                target=self._search_stage,
+                args=(pending_queries, auctions, on_searched, stats, errors),
+                name=f"search-{number}",
+            )
+            for number in range(max(min(self.search_workers, len(queries)), 1))
+        ]
+        filter_thread = threading.Thread(
+            target=self._filter_stage,
+            args=(auctions, tasks, stats, errors),
+            name="filter",
+        )
+        submit_thread = threading.Thread(
+            target=self._submit_stage, args=(tasks, stats, errors), name="submit"
+        )
+
+        for thread in [*search_threads, filter_thread, submit_thread]:
+            thread.start()
+        for thread in search_threads:
+            thread.join()
+        auctions.put(_DONE)
+        filter_thread.join()
+        submit_thread.join()
+
+        LOGGER.info(
+            f"Pipeline found {stats['auctions']} auctions, queued {stats['tasks']} "
+            f"tasks and submitted {stats['submitted']}."
+        )
+        if errors:
+            raise errors[0]
+        return stats
+
+    def _search_stage(self, pending_queries, auctions, on_searched, stats, errors):
+        while True:
+            try:
+                query = pending_queries.get_nowait()
+            except queue.Empty:
+                return
+
+            count = 0
+            soonest_end = None
+            recording = []
+            try:
+                with self.searcher.metrics.span("search"):
+                    for auction in self._search(query):
+                        auctions.put((query, auction))
+                        count += 1
+                        if soonest_end is None or auction.end_time < soonest_end:
+                            soonest_end = auction.end_time
+                        if self.history:
+                            recording.append(auction)
+                            if len(recording) >= self.HISTORY_BATCH_SIZE:
+                                self._record_history(query, recording)
+                                recording = []
+                        with self._stats_lock:
+                            stats["auctions"] += 1
+            except Exception as error:
+                LOGGER.exception(f"Search for {query.keywords!r} failed.")
+                errors.append(error)
+            finally:
+                if on_searched:
+                    on_searched(query, count, soonest_end)
+
+            if recording:
+                self._record_history(query, recording)
+
+    def _record_history(self, query, auctions):
+        try:
+            self.history.record(query.key, auctions)
+        except Exception:
+            LOGGER.exception(f"Recording auctions of {query.keywords!r} failed.")
+
+    def _search(self, query):
+        if self.incremental:
+            return self.incremental.search(
+                query.key,
+                self.max_time_remaining,
+                **query.search_kwargs,
+                priority=query.priority,
+            )
+        return self.searcher.iter_auctions(
+            **query.search_kwargs,
+            max_time_remaining=self.max_time_remaining,
+            priority=query.priority,
+        )
+
+    def _filter_stage(self, auctions, tasks, stats, errors):
+        queued_item_ids = set()
+        done = False
+        try:
+            while not done:
+                batch = [auctions.get()]
+                while len(batch) < self.queue_size:
+                    try:
+                        batch.append(auctions.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+
+                for query, items in itertools.groupby(batch, key=lambda item: item[0]):
+                    query_auctions = [auction for _, auction in items]
+                    for auction, matched in zip(
+                        query_auctions, query.matches_any(query_auctions)
+                    ):
+                        if matched:
+                            self._queue_task(
+                                query, auction, queued_item_ids, tasks, stats
+                            )
+        except Exception as error:
+            LOGGER.exception("Filtering auctions failed.")
+            errors.append(error)
+        finally:
+            tasks.put(_DONE)
+
+        # Keep the searches from blocking on a full queue until they are done.
+        while not done:
+            done = auctions.get() is _DONE
+
+    def _queue_task(self, query, auction, queued_item_ids, tasks, stats):
+        item_id = str(auction.item_id)
+        if item_id in queued_item_ids or self.client.is_item_used(item_id):
+            return
+        if self.history and not self.history.is_deal(query.key, auction):
+            LOGGER.debug(f"Item {item_id} at {auction.price} is not a deal.")
+            return
+
+        try:
+            task = self.build_task(auction, self.project_id)
+        except Exception:
+            LOGGER.exception(f"Building a task for item {item_id} failed.")
+            return
+
+        queued_item_ids.add(item_id)
+        tasks.put(task)
+        stats["tasks"] += 1
+
+    def _submit_stage(self, tasks, stats, errors):
+        batch = []
+        done = False
+        while not done:
+            try:
+                task = tasks.get(timeout=self.flush_interval if batch else None)
+            except queue.Empty:
+                task = None
+
+            if task is _DONE:
+                done = True
+            elif task is not None:
+                batch.append(task)
+
+            if batch and (
+                done or task is None or len(batch) >= self.client.SYNC_BATCH_SIZE
+            ):
+                try:
+                    with self.client.metrics.span("submit"):
+                        stats["submitted"] += self._submit(batch)
+                except Exception as error:
+                    LOGGER.exception(f"Submitting {len(batch)} tasks failed.")
+                    errors.append(error)
+                batch = []
+
+        self.client.close()
+
+    def _submit(self, batch):
+        if self.outbox is None:
+            results = self.client.submit_tasks(batch)
+            return sum(result is not None for result in results)
+
+        # Only this batch is sent; the backlog is left to the final flush.
+        return self.outbox.deliver(self.client, batch)
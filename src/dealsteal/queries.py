@@ -0,0 +1,185 @@
+import functools
+import glob
+import json
+import logging
+from dataclasses import dataclass, field
+
+from dealsteal.filters import FilterError, compile_rule, evaluate_rules
+
+LOGGER = logging.getLogger(__name__)
+
+QUERY_FILES = "store/item_queries/*.json"
+SEARCH_FIELDS = ("countries", "categories", "category_ids", "condition_ids")
+
+
+@dataclass
+class CoalescedQuery:
+    """One upstream search that serves several watchlist entries.
+
+    Attributes:
+        keywords (str): Keywords shared by all entries.
+        min_price (float): Lowest ``min_price`` of the entries, None if any entry is unbounded.
+        max_price (float): Highest ``max_price`` of the entries, None if any entry is unbounded.
+        options (dict): Other search arguments shared by all entries.
+        entries (list): The original watchlist entries.
+    """
+
+    keywords: str
+    min_price: float = None
+    max_price: float = None
+    options: dict = field(default_factory=dict)
+    entries: list = field(default_factory=list)
+
+    @property
+    def key(self):
+        """Identity of the search, equal for all entries it can serve."""
+        return _query_key(self.keywords, self.options)
+
+    @property
+    def priority(self):
+        """Highest ``priority`` of the entries, 0 when none sets one."""
+        return max(int(entry.get("priority") or 0) for entry in self.entries)
+
+    @property
+    def search_kwargs(self):
+        """Keyword arguments for ``EbayAuctionSearcher.search_ebay_auctions``."""
+        return {
+            "keywords": self.keywords,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            **self.options,
+        }
+
+    @functools.cached_property
+    def rules(self):
+        """Compiled price range and ``filters`` of each entry, see :func:`compile_rule`."""
+        return [compile_rule(entry) for entry in self.entries]
+
+    def entries_for(self, auction):
+        """Return the entries whose own price range and filters accept ``auction``."""
+        return [
+            entry
+            for entry, rule in zip(self.entries, self.rules)
+            if rule.matches(auction)
+        ]
+
+    def matches_any(self, auctions):
+        """Check a batch of auctions against every entry at once.
+
+        Args:
+            auctions (list): Auctions returned by the merged search.
+
+        Returns:
+            list: One bool per auction, True if at least one entry accepts it.
+        """
+        masks = evaluate_rules(self.rules, auctions)
+        return [any(matches) for matches in zip(*masks)] if masks else []
+
+    def fan_out(self, auctions):
+        """Split the merged search results back into per-entry results.
+
+        Args:
+            auctions (list): Auctions returned by the merged search.
+
+        Yields:
+            tuple: An entry and the auctions its own price range and filters accept.
+        """
+        masks = evaluate_rules(self.rules, auctions)
+        for entry, mask in zip(self.entries, masks):
+            yield entry, [auction for auction, keep in zip(auctions, mask) if keep]
+
+
+def load_queries(pattern=QUERY_FILES):
+    """Load all watchlist entries from the query files.
+
+    Each file holds either a single entry or a list of entries.
+
+    Args:
+        pattern (str, optional): Glob pattern of the query files. Defaults to store/item_queries/*.json.
+
+    Returns:
+        list: The watchlist entries, in file order.
+    """
+    entries = []
+    for json_file in sorted(glob.glob(pattern)):
+        entries.extend(load_query_file(json_file))
+
+    return entries
+
+
+def load_query_file(path):
+    """Load the watchlist entries of one query file.
+
+    Args:
+        path (str): Path of the query file.
+
+    Returns:
+        list: The watchlist entries of the file.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not valid JSON.
+    """
+    with open(path, "r") as file:
+        data = json.load(file)
+
+    return data if isinstance(data, list) else [data]
+
+
+def coalesce_queries(entries):
+    """Merge watchlist entries that can share one upstream search.
+
+    Entries are compatible when their normalized keywords and remaining search
+    options are equal. The merged search covers the union of their price ranges;
+    ``filters`` are applied locally, so they never split a search. Entries
+    without keywords, or whose filters do not compile, are logged and skipped.
+
+    Args:
+        entries (list): Watchlist entries as loaded by :func:`load_queries`.
+
+    Returns:
+        list: One :class:`CoalescedQuery` per distinct search, in first-seen order.
+    """
+    queries = {}
+
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("keywords"), str):
+            LOGGER.error(f"Skipping watchlist entry without keywords: {entry!r}")
+            continue
+
+        try:
+            compile_rule(entry)
+        except FilterError as error:
+            LOGGER.error(f"Skipping watchlist entry {entry.get('keywords')!r}: {error}")
+            continue
+
+        options = {name: entry[name] for name in SEARCH_FIELDS if entry.get(name)}
+        key = _query_key(entry["keywords"], options)
+        min_price = entry.get("min_price") or None
+        max_price = entry.get("max_price") or None
+
+        query = queries.get(key)
+        if query is None:
+            queries[key] = CoalescedQuery(
+                entry["keywords"], min_price, max_price, options, [entry]
+            )
+            continue
+
+        query.entries.append(entry)
+        query.min_price = _merge_bound(query.min_price, min_price, min)
+        query.max_price = _merge_bound(query.max_price, max_price, max)
+
+    LOGGER.info(
+        f"Coalesced {len(entries)} watchlist entries into {len(queries)} searches."
+    )
+    return list(queries.values())
+
+
+def _query_key(keywords, options):
+    return " ".join(keywords.lower().split()), json.dumps(options, sort_keys=True)
+
+
+def _merge_bound(current, new, pick):
+    if current is None or new is None:
+        return None
+    return pick(current, new)
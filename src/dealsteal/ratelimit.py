@@ -0,0 +1,170 @@
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86_400
+
+
+class CallBudget:
+    """Daily call quota with token-bucket pacing, persisted across restarts.
+
+    Every Finding API call takes one token. Tokens refill at the rate that
+    spreads ``daily_limit`` calls evenly over the day, and the bucket holds at
+    most ``burst`` of them, so a large watchlist cannot spend the whole quota in
+    the morning. Independently, no more than ``daily_limit`` calls are admitted
+    per UTC day.
+
+    Calls with a negative priority must leave a reserve behind, a growing share
+    of both the bucket and the remaining daily quota for every level below
+    zero, so as the budget runs low the least important searches are skipped
+    first while priority 0 and above keep running until the budget is empty.
+
+    With ``path`` set, the budget is shared by every process using the file:
+    each call re-reads the state under an exclusive file lock before it takes
+    a token, so worker processes draw from one quota instead of one each.
+    """
+
+    DEFAULT_DAILY_LIMIT = 5000
+    DEFAULT_BURST_HOURS = 1
+    LOW_PRIORITY_RESERVE = 0.1
+
+    def __init__(
+        self,
+        daily_limit=DEFAULT_DAILY_LIMIT,
+        burst=None,
+        path=None,
+        clock=time.time,
+    ):
+        """Create the budget, restoring its state from ``path`` if it exists.
+
+        Args:
+            daily_limit (int, optional): Calls allowed per UTC day. Defaults to 5000.
+            burst (float, optional): Bucket capacity in calls. Defaults to one hour's share of the daily limit.
+            path (str, optional): JSON file the state is kept in, None to keep it in memory only. Defaults to None.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.daily_limit = daily_limit
+        self.burst = burst or max(daily_limit * self.DEFAULT_BURST_HOURS / 24, 1)
+        self.rate = daily_limit / SECONDS_PER_DAY
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        now = self.clock()
+        self._day = _utc_day(now)
+        self._used = 0
+        self._tokens = self.burst
+        self._updated_at = now
+        with self._locked():
+            pass
+
+    @property
+    def used(self):
+        """Calls made today."""
+        with self._locked():
+            return self._used
+
+    @property
+    def remaining(self):
+        """Calls left today."""
+        return max(self.daily_limit - self.used, 0)
+
+    def try_acquire(self, priority=0):
+        """Take one call from the budget if it is available for ``priority``.
+
+        Args:
+            priority (int, optional): Priority of the call; below zero keeps a reserve. Defaults to 0.
+
+        Returns:
+            bool: True if the call may be made.
+        """
+        reserve = min(max(-priority, 0) * self.LOW_PRIORITY_RESERVE, 0.9)
+
+        with self._locked():
+            if self._tokens - 1 < self.burst * reserve:
+                return False
+            if self.daily_limit - self._used - 1 < self.daily_limit * reserve:
+                return False
+
+            self._tokens -= 1
+            self._used += 1
+            self._save()
+            return True
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the budget, across processes when it has a file, with its state up to date."""
+        with self._lock:
+            if not self.path:
+                self._refill(self.clock())
+                yield
+                return
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._load()
+                    self._refill(self.clock())
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refill(self, now):
+        day = _utc_day(now)
+        if day != self._day:
+            LOGGER.info(
+                f"Used {self._used} of {self.daily_limit} calls on {self._day}."
+            )
+            self._day = day
+            self._used = 0
+
+        elapsed = max(now - self._updated_at, 0)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as file:
+                state = json.load(file)
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"Ignoring unreadable call budget {self.path}: {error}")
+            return
+
+        self._day = state.get("day", self._day)
+        self._used = state.get("used", 0)
+        self._tokens = min(state.get("tokens", self.burst), self.burst)
+        self._updated_at = state.get("updated_at", self._updated_at)
+
+    def _save(self):
+        if not self.path:
+            return
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(
+                {
+                    "day": self._day,
+                    "used": self._used,
+                    "tokens": self._tokens,
+                    "updated_at": self._updated_at,
+                },
+                file,
+            )
+        os.replace(temporary_path, self.path)
+
+
+def _utc_day(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).date().isoformat()
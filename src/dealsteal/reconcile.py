@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+from dealsteal.seen import _to_utc
+
+LOGGER = logging.getLogger(__name__)
+
+TASK_MAP_PATH = "store/tasks.txt"
+
+
+class TaskMap:
+    """Todoist task of every submitted item, kept until the task is cleaned up.
+
+    Each line holds an item ID, its task ID and, optionally, the auction end
+    time, separated by tabs. Like :class:`~dealsteal.seen.SeenItemStore`, new
+    entries are buffered and appended in batches, and removals rewrite the
+    file. Entries outlive the seen-item store's eviction on purpose: they are
+    what finds a task again once its auction has ended.
+    """
+
+    DEFAULT_FLUSH_EVERY = 50
+
+    def __init__(self, path=TASK_MAP_PATH, flush_every=DEFAULT_FLUSH_EVERY):
+        """Load the map from disk.
+
+        Args:
+            path (str, optional): Path of the backing file. Defaults to store/tasks.txt.
+            flush_every (int, optional): Buffered entries that trigger an append. Defaults to 50.
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self._entries = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, item_id, task_id, end_time=None):
+        """Record the task created for an item.
+
+        Args:
+            item_id (str): ID of the item.
+            task_id (str): ID of its Todoist task.
+            end_time (datetime | str, optional): When the auction ends. Defaults to None.
+        """
+        if end_time is not None:
+            end_time = _to_utc(end_time)
+
+        with self._lock:
+            self._entries[item_id] = (str(task_id), end_time)
+            self._pending.append(item_id)
+            should_flush = len(self._pending) >= self.flush_every
+
+        if should_flush:
+            self.flush()
+
+    def tasks(self):
+        """Return ``(item_id, task_id, end_time)`` for every entry."""
+        with self._lock:
+            return [
+                (item_id, task_id, end_time)
+                for item_id, (task_id, end_time) in self._entries.items()
+            ]
+
+    def remove(self, item_ids):
+        """Forget entries and rewrite the backing file.
+
+        Args:
+            item_ids (list): IDs of the items to forget.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        with self._lock:
+            removed = [
+                item_id
+                for item_id in item_ids
+                if self._entries.pop(item_id, None) is not None
+            ]
+            if removed:
+                self._pending = []
+                self._rewrite()
+        return len(removed)
+
+    def flush(self):
+        """Append all buffered entries to the backing file."""
+        with self._lock:
+            pending = [item_id for item_id in self._pending if item_id in self._entries]
+            self._pending = []
+            if not pending:
+                return
+            self._ensure_directory()
+            with open(self.path, "a") as file:
+                file.writelines(self._format_line(item_id) for item_id in pending)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as file:
+            for line in file:
+                item_id, task_id, end_time = (line.rstrip("\n").split("\t") + [""])[:3]
+                if item_id and task_id:
+                    self._entries[item_id] = (
+                        task_id,
+                        _to_utc(end_time) if end_time else None,
+                    )
+
+    def _rewrite(self):
+        self._ensure_directory()
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            file.writelines(self._format_line(item_id) for item_id in self._entries)
+        os.replace(temporary_path, self.path)
+
+    def _format_line(self, item_id):
+        task_id, end_time = self._entries[item_id]
+        if end_time is None:
+            return f"{item_id}\t{task_id}\n"
+        return f"{item_id}\t{task_id}\t{end_time.isoformat()}\n"
+
+    def _ensure_directory(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+def reconcile_tasks(client, task_map, project_id=None, delete=False, now=None):
+    """Clean up the Todoist tasks of ended auctions.
+
+    The open tasks are listed in one request and matched to items through the
+    task map. Tasks whose auction has ended are completed, or deleted, through
+    the Sync API, 100 per request. Entries whose task is gone, because it was
+    cleaned up or completed by hand, are dropped from the map as well.
+
+    Args:
+        client (TodoistClient): Client to list and close tasks with.
+        task_map (TaskMap): Task of every submitted item.
+        project_id (str, optional): Project the tasks were added to. Defaults to None, all projects.
+        delete (bool, optional): Delete the tasks instead of completing them. Defaults to False.
+        now (datetime, optional): Reference time. Defaults to the current UTC time.
+
+    Returns:
+        int: Number of tasks completed or deleted, or None if the tasks could not be listed.
+    """
+    now = now or datetime.now(timezone.utc)
+    open_tasks = client.get_tasks(project_id)
+    if open_tasks is None:
+        return None
+
+    open_task_ids = {str(task["id"]) for task in open_tasks}
+    gone = []
+    expired = {}
+    for item_id, task_id, end_time in task_map.tasks():
+        if task_id not in open_task_ids:
+            gone.append(item_id)
+        elif end_time is not None and end_time <= now:
+            expired[task_id] = item_id
+
+    closed = client.close_tasks(expired, delete=delete) if expired else []
+    task_map.remove(gone + [expired[task_id] for task_id in closed])
+
+    LOGGER.info(
+        f"Reconciled {len(open_tasks)} tasks: {len(closed)} of {len(expired)} "
+        f"expired ones {'deleted' if delete else 'completed'}, "
+        f"{len(gone)} already gone."
+    )
+    return len(closed)
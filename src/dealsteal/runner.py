@@ -1,62 +1,536 @@
-import glob
 import json
 import logging
+import multiprocessing
 import os
-from datetime import datetime
+import sys
+import time
+from dataclasses import asdict
 
-from ebay import EbayAuctionSearcher
-from todoist import TodoistClient
+from dealsteal import initialize
+from dealsteal.cache import ResponseCache
+from dealsteal.categories import CATEGORY_PATH, CategoryHistogram
+from dealsteal.ebay import EbayAuctionSearcher
+from dealsteal.history import HISTORY_PATH, AuctionHistory
+from dealsteal.metrics import MetricsRegistry, MetricsServer
+from dealsteal.outbox import OUTBOX_PATH, Outbox
+from dealsteal.pipeline import SearchPipeline
+from dealsteal.queries import (
+    QUERY_FILES,
+    CoalescedQuery,
+    coalesce_queries,
+    load_queries,
+)
+from dealsteal.ratelimit import CallBudget
+from dealsteal.reconcile import TASK_MAP_PATH, TaskMap, reconcile_tasks
+from dealsteal.scheduler import QueryScheduler
+from dealsteal.seen import SEEN_ITEMS_PATH
+from dealsteal.todoist import TodoistClient
+from dealsteal.transport import HttpTransport
+from dealsteal.watermarks import IncrementalSearcher
+from dealsteal.workqueue import (
+    WORKQUEUE_PATH,
+    SharedSeenItemStore,
+    WorkQueue,
+    worker_id,
+)
 
-TODOIST_API_TOKEN = os.environ.get("TODOIST_TOKEN")
-PROJECT_ID = os.environ.get("TODOIST_PROJECT")
-EBAY_OAUTH_TOKEN = os.environ.get("EBAY_OAUTH_TOKEN")
-EBAY_APP_ID = os.environ.get("EBAY_APP_ID")
-MAX_TIME_REMAINING = int(os.environ.get("MAX_TIME_REMAINING"))
+LOGGER = logging.getLogger(__name__)
 
-client = TodoistClient(TODOIST_API_TOKEN)
-searcher = EbayAuctionSearcher(EBAY_OAUTH_TOKEN, EBAY_APP_ID)
+DAEMON_RELOAD_INTERVAL = 10
+RUN_SUMMARY_PATH = "store/run_summary.json"
+CALL_BUDGET_PATH = "store/ebay_budget.json"
+WORKER_RUN_INTERVAL = 600
+RECONCILE_INTERVAL = 3600
+DEFAULT_MAX_TIME_REMAINING = 36_000
 
-LOGGER = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
-json_files = glob.glob("store/item_queries/*.json")
+def build_task(auction, project_id=None):
+    title = f"{auction.country} - {auction.title} - {auction.price_display}"
+    description = (
+        f"Time remaining: {auction.time_remaining}\n"
+        f"URL: {auction.url}\n"
+        f"Category: {auction.category}"
+    )
+    due_date = auction.end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "title": title,
+        "description": description,
+        "due_date": due_date,
+        "project_id": project_id,
+        "item_id": str(auction.item_id),
+        "end_time": due_date,
+    }
 
-for json_file in json_files:
-    with open(json_file, "r") as file:
-        data = json.load(file)
 
-        if isinstance(data, list):
-            json_list = data
+def run_query(searcher, query, max_time_remaining, project_id=None, incremental=None):
+    """Search one coalesced query and return its auctions with the tasks to submit."""
+    LOGGER.info(query.search_kwargs)
+    with searcher.metrics.span("search"):
+        if incremental:
+            auctions = incremental.search(
+                query.key,
+                max_time_remaining,
+                **query.search_kwargs,
+                priority=query.priority,
+            )
         else:
-            json_list = [data]
-
-        for item in json_list:
-            LOGGER.info(item)
             auctions = searcher.search_ebay_auctions(
-                item["keywords"],
-                max_price=item["max_price"],
-                min_price=item["min_price"],
-                max_time_remaining=MAX_TIME_REMAINING,
+                **query.search_kwargs,
+                max_time_remaining=max_time_remaining,
+                priority=query.priority,
             )
-            for auction in auctions:
-                LOGGER.info(auction)
-                title = (
-                    f"{auction['country']} - {auction['title']} - {auction['price']}"
-                )
-                description = (
-                    f"Time remaining: {auction['time_remaining']}\n"
-                    f"URL: {auction['url']}\n"
-                    f"Category: {auction['category']}"
-                )
-                end_time = datetime.strptime(
-                    auction["end_time"], "%Y-%m-%dT%H:%M:%S.%fZ"
-                )
-                due_date = end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-                item_id = str(auction["item_id"])
-                client.submit_task(
-                    title=title,
-                    description=description,
-                    due_date=due_date,
-                    project_id=PROJECT_ID,
-                    item_id=item_id,
-                )
+    tasks = []
+    for item, item_auctions in query.fan_out(auctions):
+        LOGGER.info(item)
+        for auction in item_auctions:
+            LOGGER.info(auction)
+            tasks.append(build_task(auction, project_id))
+    return auctions, tasks
+
+
+def run_once(
+    searcher,
+    client,
+    max_time_remaining,
+    project_id=None,
+    pattern=QUERY_FILES,
+    run_timeout=None,
+    summary_path=None,
+    incremental=None,
+    outbox=None,
+    history=None,
+    expired_tasks=None,
+):
+    """Search every watchlist entry once, submitting matching auctions as they stream in."""
+    searcher.transport.start_run(run_timeout)
+    searcher.metrics.start_run()
+    pipeline = SearchPipeline(
+        searcher,
+        client,
+        build_task,
+        max_time_remaining,
+        project_id,
+        incremental,
+        outbox,
+        history,
+    )
+    with searcher.metrics.span("run"):
+        queries = coalesce_queries(load_queries(pattern))
+        pipeline.run(sorted(queries, key=lambda query: -query.priority))
+        if outbox is not None:
+            outbox.flush(client)
+            client.close()
+        if history is not None:
+            history.prune()
+        if expired_tasks:
+            clean_up_tasks(client, project_id, expired_tasks)
+    report_run(searcher.metrics, summary_path)
+
+
+def clean_up_tasks(client, project_id=None, expired_tasks="complete"):
+    """Complete or delete the tasks of ended auctions, see :func:`reconcile_tasks`."""
+    if client.task_map is None:
+        return None
+    with client.metrics.span("reconcile"):
+        return reconcile_tasks(
+            client,
+            client.task_map,
+            project_id,
+            delete=expired_tasks == "delete",
+        )
+
+
+def submit_tasks(client, tasks):
+    """Submit the tasks of a run and flush the seen items."""
+    with client.metrics.span("submit"):
+        client.submit_tasks(tasks)
+        client.close()
+
+
+def report_run(metrics, summary_path=None):
+    """Log the summary of the finished run and optionally write it to a file."""
+    if not metrics.enabled:
+        return
+
+    summary = metrics.summary()
+    LOGGER.info(f"Run summary: {json.dumps(summary)}")
+    if summary_path:
+        metrics.write_summary(summary_path)
+
+
+def run_daemon(
+    searcher,
+    client,
+    max_time_remaining,
+    project_id=None,
+    pattern=QUERY_FILES,
+    run_timeout=None,
+    min_interval=QueryScheduler.DEFAULT_MIN_INTERVAL,
+    max_interval=QueryScheduler.DEFAULT_MAX_INTERVAL,
+    summary_path=None,
+    incremental=None,
+    outbox=None,
+    history=None,
+    expired_tasks=None,
+):
+    """Keep polling the watchlist, each search at its own adaptive interval."""
+    searcher.cache = None
+    scheduler = QueryScheduler(
+        pattern, min_interval=min_interval, max_interval=max_interval
+    )
+    pipeline = SearchPipeline(
+        searcher,
+        client,
+        build_task,
+        max_time_remaining,
+        project_id,
+        incremental,
+        outbox,
+        history,
+    )
+
+    next_clean_up = 0
+    while True:
+        if expired_tasks and time.time() >= next_clean_up:
+            clean_up_tasks(client, project_id, expired_tasks)
+            next_clean_up = time.time() + RECONCILE_INTERVAL
+
+        scheduler.reload_if_changed()
+        wait = scheduler.seconds_until_next()
+        if wait is None or wait > 0:
+            time.sleep(min(wait or DAEMON_RELOAD_INTERVAL, DAEMON_RELOAD_INTERVAL))
+            continue
+
+        searcher.transport.start_run(run_timeout)
+        searcher.metrics.start_run()
+        searched = []
+        try:
+            pipeline.run(
+                scheduler.pop_due(),
+                on_searched=lambda *result: searched.append(result),
+            )
+        except Exception:
+            LOGGER.exception("Some searches failed.")
+        if outbox is not None:
+            outbox.flush(client)
+            client.close()
+        if history is not None:
+            history.prune()
+        client.seen_items.evict_expired()
+
+        for query, count, soonest_end in searched:
+            interval = scheduler.record_result(query, count, soonest_end)
+            if interval is not None:
+                LOGGER.info(f"Next search for {query.keywords!r} in {interval:.0f}s.")
+        report_run(searcher.metrics, summary_path)
+
+
+def run_worker(
+    searcher,
+    client,
+    max_time_remaining,
+    queue,
+    run_id,
+    project_id=None,
+    pattern=QUERY_FILES,
+    run_timeout=None,
+    summary_path=None,
+    incremental=None,
+):
+    """Help drain one shared run: enqueue the watchlist, then claim searches until none is left.
+
+    Every worker enqueues the same run, which only the first one actually
+    does. Tasks are submitted right after each search, before the job is marked
+    done, so a job reclaimed after a crash resubmits at most what the shared
+    seen-item store has not recorded yet.
+
+    Returns:
+        int: Number of searches this worker ran.
+    """
+    owner = worker_id()
+    client.seen_items.evict_expired()
+    queries = coalesce_queries(load_queries(pattern))
+    queue.enqueue(
+        run_id,
+        [
+            (json.dumps(query.key), asdict(query))
+            for query in sorted(queries, key=lambda query: -query.priority)
+        ],
+    )
+
+    searcher.transport.start_run(run_timeout)
+    searcher.metrics.start_run()
+    completed = 0
+    with searcher.metrics.span("run"):
+        while True:
+            claimed = queue.claim(run_id, owner)
+            if claimed is None:
+                break
+
+            key, payload = claimed
+            _, tasks = run_query(
+                searcher,
+                CoalescedQuery(**payload),
+                max_time_remaining,
+                project_id,
+                incremental,
+            )
+            submit_tasks(client, tasks)
+            if queue.complete(run_id, key, owner):
+                completed += 1
+
+    LOGGER.info(f"Worker {owner} ran {completed} searches of run {run_id}.")
+    report_run(searcher.metrics, summary_path)
+    return completed
+
+
+def build_from_environment(seen_items=None, metrics_port=None, task_map=None):
+    """Build the searcher and Todoist client from environment variables.
+
+    Args:
+        seen_items (SeenItemStore, optional): Seen-item store of the client. Defaults to store/items.txt.
+        metrics_port (int, optional): Overrides METRICS_PORT, 0 disables metrics. Defaults to None.
+        task_map (TaskMap, optional): Task map of the client. Defaults to None.
+
+    Returns:
+        tuple: The searcher, the Todoist client, the incremental searcher (or None) and a dict of run settings.
+    """
+    todoist_api_token = os.environ.get("TODOIST_TOKEN")
+    ebay_oauth_token = os.environ.get("EBAY_OAUTH_TOKEN")
+    ebay_app_id = os.environ.get("EBAY_APP_ID")
+    ebay_max_workers = int(
+        os.environ.get("EBAY_MAX_WORKERS", EbayAuctionSearcher.DEFAULT_MAX_WORKERS)
+    )
+    ebay_cache_ttl = int(os.environ.get("EBAY_CACHE_TTL", ResponseCache.DEFAULT_TTL))
+    if metrics_port is None:
+        metrics_port = int(os.environ.get("METRICS_PORT", 0))
+    watermark_refresh_interval = float(
+        os.environ.get(
+            "WATERMARK_REFRESH_INTERVAL", IncrementalSearcher.DEFAULT_REFRESH_INTERVAL
+        )
+    )
+    ebay_daily_call_limit = int(
+        os.environ.get("EBAY_DAILY_CALL_LIMIT", CallBudget.DEFAULT_DAILY_LIMIT)
+    )
+    category_path = os.environ.get("CATEGORY_PATH", CATEGORY_PATH)
+    category_ttl_days = float(
+        os.environ.get("CATEGORY_TTL_DAYS", CategoryHistogram.DEFAULT_TTL_DAYS)
+    )
+    settings = {
+        "project_id": os.environ.get("TODOIST_PROJECT"),
+        "max_time_remaining": int(
+            os.environ.get("MAX_TIME_REMAINING", DEFAULT_MAX_TIME_REMAINING)
+        ),
+        "run_timeout": float(os.environ.get("RUN_TIMEOUT", 0)) or None,
+        "summary_path": os.environ.get("RUN_SUMMARY_PATH", RUN_SUMMARY_PATH),
+        "min_interval": float(
+            os.environ.get("DAEMON_MIN_INTERVAL", QueryScheduler.DEFAULT_MIN_INTERVAL)
+        ),
+        "max_interval": float(
+            os.environ.get("DAEMON_MAX_INTERVAL", QueryScheduler.DEFAULT_MAX_INTERVAL)
+        ),
+        "worker_run_interval": float(
+            os.environ.get("WORKER_RUN_INTERVAL", WORKER_RUN_INTERVAL)
+        ),
+        "expired_tasks": os.environ.get("EXPIRED_TASKS", "complete"),
+    }
+
+    metrics = MetricsRegistry(enabled=bool(metrics_port))
+    if metrics_port:
+        MetricsServer(metrics, port=metrics_port).start()
+
+    # One connection per concurrent search plus one for the submit stage.
+    transport = HttpTransport(pool_size=ebay_max_workers + 1)
+    client = TodoistClient(
+        todoist_api_token,
+        seen_items=seen_items,
+        transport=transport,
+        metrics=metrics,
+        task_map=task_map,
+    )
+    cache = (
+        ResponseCache(ebay_cache_ttl, path="store/cache") if ebay_cache_ttl else None
+    )
+    budget = (
+        CallBudget(ebay_daily_call_limit, path=CALL_BUDGET_PATH)
+        if ebay_daily_call_limit
+        else None
+    )
+    searcher = EbayAuctionSearcher(
+        ebay_oauth_token,
+        ebay_app_id,
+        max_workers=ebay_max_workers,
+        transport=transport,
+        cache=cache,
+        metrics=metrics,
+        budget=budget,
+        categories=(
+            CategoryHistogram(category_path, ttl_days=category_ttl_days)
+            if category_path
+            else None
+        ),
+    )
+    incremental = (
+        IncrementalSearcher(searcher, refresh_interval=watermark_refresh_interval)
+        if watermark_refresh_interval
+        else None
+    )
+    return searcher, client, incremental, settings
+
+
+def _open_outbox():
+    path = os.environ.get("OUTBOX_PATH", OUTBOX_PATH)
+    return Outbox(path) if path else None
+
+
+def _open_task_map():
+    path = os.environ.get("TASK_MAP_PATH", TASK_MAP_PATH)
+    return TaskMap(path) if path else None
+
+
+def _open_history():
+    path = os.environ.get("HISTORY_PATH", HISTORY_PATH)
+    if not path:
+        return None
+
+    deal_percentile = float(os.environ.get("DEAL_PERCENTILE", 0)) or None
+    min_samples = int(
+        os.environ.get("DEAL_MIN_SAMPLES", AuctionHistory.DEFAULT_MIN_SAMPLES)
+    )
+    return AuctionHistory(
+        path, deal_percentile=deal_percentile, min_samples=min_samples
+    )
+
+
+def _worker_process(run_id, metrics_port=0):
+    """Entry point of a worker process: build the clients and drain one run."""
+    logging.basicConfig(level=logging.INFO)
+    searcher, client, incremental, settings = build_from_environment(
+        seen_items=SharedSeenItemStore(WORKQUEUE_PATH, legacy_path=SEEN_ITEMS_PATH),
+        metrics_port=metrics_port,
+    )
+    try:
+        return run_worker(
+            searcher,
+            client,
+            settings["max_time_remaining"],
+            WorkQueue(WORKQUEUE_PATH),
+            run_id,
+            settings["project_id"],
+            run_timeout=settings["run_timeout"],
+            incremental=incremental,
+        )
+    finally:
+        client.close()
+        searcher.transport.close()
+
+
+def run_workers(worker_count):
+    """Shard one run across ``worker_count`` local processes."""
+    run_id = f"local-{time.time_ns()}"
+    with multiprocessing.Pool(worker_count) as pool:
+        completed = pool.map(_worker_process, [run_id] * worker_count)
+    WorkQueue(WORKQUEUE_PATH).prune(run_id)
+    LOGGER.info(f"{worker_count} workers ran {sum(completed)} searches.")
+
+
+def work_from_environment():
+    """Join a run shared through the work queue every WORKER_RUN_INTERVAL seconds."""
+    searcher, client, incremental, settings = build_from_environment(
+        seen_items=SharedSeenItemStore(WORKQUEUE_PATH, legacy_path=SEEN_ITEMS_PATH)
+    )
+    queue = WorkQueue(WORKQUEUE_PATH)
+    interval = settings["worker_run_interval"]
+    try:
+        while True:
+            run_id = f"shared-{int(time.time() // interval)}"
+            run_worker(
+                searcher,
+                client,
+                settings["max_time_remaining"],
+                queue,
+                run_id,
+                settings["project_id"],
+                run_timeout=settings["run_timeout"],
+                summary_path=settings["summary_path"],
+                incremental=incremental,
+            )
+            queue.prune(run_id)
+            time.sleep(interval - time.time() % interval)
+    finally:
+        client.close()
+        searcher.transport.close()
+
+
+def run_from_environment(daemon=False):
+    """Build the clients from environment variables and search once, or keep polling."""
+    searcher, client, incremental, settings = build_from_environment(
+        task_map=_open_task_map()
+    )
+    try:
+        if daemon:
+            run_daemon(
+                searcher,
+                client,
+                settings["max_time_remaining"],
+                settings["project_id"],
+                run_timeout=settings["run_timeout"],
+                min_interval=settings["min_interval"],
+                max_interval=settings["max_interval"],
+                summary_path=settings["summary_path"],
+                incremental=incremental,
+                outbox=_open_outbox(),
+                history=_open_history(),
+                expired_tasks=settings["expired_tasks"],
+            )
+        else:
+            run_once(
+                searcher,
+                client,
+                settings["max_time_remaining"],
+                settings["project_id"],
+                run_timeout=settings["run_timeout"],
+                summary_path=settings["summary_path"],
+                incremental=incremental,
+                outbox=_open_outbox(),
+                history=_open_history(),
+                expired_tasks=settings["expired_tasks"],
+            )
+    finally:
+        client.close()
+        searcher.transport.close()
+
+
+def reconcile_from_environment():
+    """Build the client from environment variables and clean up the tasks of ended auctions."""
+    searcher, client, _, settings = build_from_environment(task_map=_open_task_map())
+    try:
+        clean_up_tasks(
+            client, settings["project_id"], settings["expired_tasks"] or "complete"
+        )
+    finally:
+        client.close()
+        searcher.transport.close()
+
+
+def main(argv=None):
+    """Load the environment and run, like the ``dealsteal`` command.
+
+    Without arguments the watchlist is searched once. ``--daemon`` keeps
+    polling it, ``--workers N`` shards one run across N local processes, and
+    ``--worker`` joins a run shared through the work queue every
+    WORKER_RUN_INTERVAL seconds, e.g. from several containers on one volume.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    initialize()
+
+    if "--workers" in argv:
+        run_workers(int(argv[argv.index("--workers") + 1]))
+    elif "--worker" in argv:
+        work_from_environment()
+    else:
+        run_from_environment(daemon="--daemon" in argv)
+
+
+if __name__ == "__main__":
+    main()
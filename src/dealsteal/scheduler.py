@@ -0,0 +1,189 @@
+import glob
+import heapq
+import itertools
+import logging
+import os
+import time
+
+from dealsteal.queries import QUERY_FILES, coalesce_queries, load_query_file
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryScheduler:
+    """Priority scheduler that decides when each watchlist search runs next.
+
+    Searches sit in a heap ordered by their next due time. After every poll the
+    interval is recomputed from the results: a search whose soonest auction ends
+    shortly, or that returns many listings, is polled again soon, while a search
+    without results backs off exponentially up to ``max_interval``. Query files
+    are re-read whenever their set or modification times change; a file that
+    cannot be read or parsed, e.g. while it is being saved, keeps the entries
+    it had before and is tried again on the next reload. Searches due
+    at the same time are handed out by priority, then by how soon their
+    auctions end, so the call budget is spent on the most urgent ones first.
+    """
+
+    DEFAULT_MIN_INTERVAL = 60
+    DEFAULT_MAX_INTERVAL = 3600
+    BACKOFF_FACTOR = 2
+
+    def __init__(
+        self,
+        pattern=QUERY_FILES,
+        min_interval=DEFAULT_MIN_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL,
+        clock=time.time,
+    ):
+        """Create the scheduler; query files are loaded on the first reload.
+
+        Args:
+            pattern (str, optional): Glob pattern of the query files. Defaults to store/item_queries/*.json.
+            min_interval (float, optional): Shortest time between two polls of a search in seconds. Defaults to 60.
+            max_interval (float, optional): Longest time between two polls of a search in seconds. Defaults to 3600.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.pattern = pattern
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self._queries = {}
+        self._intervals = {}
+        self._soonest_ends = {}
+        self._heap = []
+        self._tokens = {}
+        self._counter = itertools.count()
+        self._mtimes = None
+        self._file_entries = {}
+
+    def __len__(self):
+        return len(self._queries)
+
+    def reload_if_changed(self):
+        """Reload the query files if any was added, removed or modified.
+
+        New searches are due immediately, existing ones keep their schedule and
+        searches that disappeared are dropped.
+
+        Returns:
+            bool: True if the query files were reloaded.
+        """
+        mtimes = self._read_mtimes()
+        if mtimes == self._mtimes:
+            return False
+
+        file_entries = {}
+        for path in sorted(mtimes):
+            if self._mtimes and self._mtimes.get(path) == mtimes[path]:
+                file_entries[path] = self._file_entries[path]
+                continue
+            try:
+                file_entries[path] = load_query_file(path)
+            except (OSError, ValueError) as error:
+                LOGGER.error(f"Keeping the previous searches of {path}: {error}")
+                if path in self._file_entries:
+                    file_entries[path] = self._file_entries[path]
+                    mtimes[path] = self._mtimes[path]
+                else:
+                    del mtimes[path]
+
+        self._mtimes = mtimes
+        self._file_entries = file_entries
+        queries = {
+            query.key: query
+            for query in coalesce_queries(
+                [entry for entries in file_entries.values() for entry in entries]
+            )
+        }
+        now = self.clock()
+
+        for key in queries.keys() - self._queries.keys():
+            self._intervals[key] = self.min_interval
+            self._push(now, key)
+
+        for key in self._queries.keys() - queries.keys():
+            del self._intervals[key]
+            self._tokens.pop(key, None)
+            self._soonest_ends.pop(key, None)
+
+        self._queries = queries
+        LOGGER.info(f"Loaded {len(queries)} searches from {self.pattern}.")
+        return True
+
+    def seconds_until_next(self):
+        """Return how long until the next search is due, or None if there is none."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(self._heap[0][0] - self.clock(), 0)
+
+    def pop_due(self):
+        """Remove and return all searches that are due now.
+
+        Returns:
+            list: The due :class:`CoalescedQuery` objects, highest priority first,
+            then soonest ending auctions first.
+        """
+        now = self.clock()
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            del self._tokens[key]
+            due.append(self._queries[key])
+
+        return sorted(
+            due,
+            key=lambda query: (
+                -query.priority,
+                self._soonest_ends.get(query.key, float("inf")),
+            ),
+        )
+
+    def record_result(self, query, count, soonest_end=None):
+        """Schedule the next poll of ``query`` based on the auctions it returned.
+
+        Args:
+            query (CoalescedQuery): The search that just ran.
+            count (int): Number of auctions it returned.
+            soonest_end (datetime, optional): When the first of them ends. Defaults to None.
+
+        Returns:
+            float: Seconds until the search is polled again.
+        """
+        if query.key not in self._queries or query.key in self._tokens:
+            return None
+
+        now = self.clock()
+        if count and soonest_end is not None:
+            soonest_end = soonest_end.timestamp()
+            self._soonest_ends[query.key] = soonest_end
+            interval = min((soonest_end - now) / 2, self.max_interval / (1 + count))
+        else:
+            self._soonest_ends.pop(query.key, None)
+            interval = self._intervals[query.key] * self.BACKOFF_FACTOR
+
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        self._intervals[query.key] = interval
+        self._push(now + interval, query.key)
+        return interval
+
+    def _push(self, due_at, key):
+        token = next(self._counter)
+        self._tokens[key] = token
+        heapq.heappush(self._heap, (due_at, token, key))
+
+    def _drop_stale(self):
+        while self._heap and self._tokens.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def _read_mtimes(self):
+        mtimes = {}
+        for path in glob.glob(self.pattern):
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+        return mtimes
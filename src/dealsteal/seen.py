@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+LOGGER = logging.getLogger(__name__)
+
+SEEN_ITEMS_PATH = "store/items.txt"
+
+
+class SeenItemStore:
+    """Set of item IDs that were already turned into Todoist tasks.
+
+    The backing file is read once into a dict, so membership checks are O(1).
+    New entries are buffered and appended in batches. Each line holds an item
+    ID and, optionally, the auction end time separated by a tab; entries whose
+    auction has ended are dropped and the file is compacted, which keeps the
+    store bounded. Lines without an end time (the legacy format) are kept.
+    Items can be claimed while their task is being submitted, so repeats within
+    the same process are skipped before they are marked as seen.
+    """
+
+    DEFAULT_FLUSH_EVERY = 50
+
+    def __init__(
+        self, path: str = SEEN_ITEMS_PATH, flush_every: int = DEFAULT_FLUSH_EVERY
+    ):
+        """
+        Load the store from disk.
+
+        :param path: Path of the backing file.
+        :param flush_every: Number of buffered entries that triggers an append.
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self._items = {}
+        self._pending = []
+        self._claimed = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __enter__(self) -> "SeenItemStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def items(self) -> list[tuple[str, datetime | None]]:
+        """
+        Return every entry.
+
+        :return: ``(item_id, end_time)`` pairs, with None for entries without an end time.
+        """
+        with self._lock:
+            return list(self._items.items())
+
+    def claim(self, item_id: str) -> bool:
+        """
+        Reserve an item for submission.
+
+        :param item_id: The ID of the item.
+        :return: True if the item is neither seen nor claimed already.
+        """
+        with self._lock:
+            if item_id in self._items or item_id in self._claimed:
+                return False
+            self._claimed.add(item_id)
+            return True
+
+    def release(self, item_id: str) -> None:
+        """
+        Give up a claim, e.g. after the submission failed.
+
+        :param item_id: The ID of the item.
+        """
+        with self._lock:
+            self._claimed.discard(item_id)
+
+    def add(self, item_id: str, end_time: datetime | str | None = None) -> None:
+        """
+        Mark an item as seen, flushing to disk once enough entries are buffered.
+
+        :param item_id: The ID of the item.
+        :param end_time: Optional. When the auction ends, as a datetime or ISO 8601 string.
+        """
+        if end_time is not None:
+            end_time = _to_utc(end_time)
+
+        with self._lock:
+            self._claimed.discard(item_id)
+            if item_id in self._items:
+                return
+            self._items[item_id] = end_time
+            self._pending.append(item_id)
+            should_flush = len(self._pending) >= self.flush_every
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append all buffered entries to the backing file."""
+        with self._lock:
+            if not self._pending:
+                return
+            lines = [self._format_line(item_id) for item_id in self._pending]
+            self._pending = []
+            self._ensure_directory()
+            with open(self.path, "a") as file:
+                file.writelines(lines)
+
+    def evict_expired(self, now: datetime | None = None) -> int:
+        """
+        Drop entries whose auction has ended and rewrite the backing file.
+
+        :param now: Optional. Reference time, defaults to the current UTC time.
+        :return: The number of evicted entries.
+        """
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            expired = [
+                item_id
+                for item_id, end_time in self._items.items()
+                if end_time is not None and end_time <= now
+            ]
+            for item_id in expired:
+                del self._items[item_id]
+            if expired:
+                self._pending = []
+                self._rewrite()
+
+        if expired:
+            LOGGER.info(f"Evicted {len(expired)} ended auctions from {self.path}.")
+        return len(expired)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as file:
+            for line in file:
+                item_id, _, end_time = line.rstrip("\n").partition("\t")
+                if item_id:
+                    self._items[item_id] = _to_utc(end_time) if end_time else None
+
+        self.evict_expired()
+
+    def _rewrite(self) -> None:
+        self._ensure_directory()
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            file.writelines(self._format_line(item_id) for item_id in self._items)
+        os.replace(temporary_path, self.path)
+
+    def _format_line(self, item_id: str) -> str:
+        end_time = self._items.get(item_id)
+        if end_time is None:
+            return f"{item_id}\n"
+        return f"{item_id}\t{end_time.isoformat()}\n"
+
+    def _ensure_directory(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+def _to_utc(value: datetime | str) -> datetime:
+    """Convert an ISO 8601 string or datetime into an aware datetime, assuming UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
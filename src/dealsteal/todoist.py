@@ -1,47 +1,84 @@
 import logging
 import os
+import time
+import uuid
+from typing import Iterable
 
 import requests
 
+from dealsteal.metrics import MetricsRegistry, get_default_registry
+from dealsteal.seen import SeenItemStore
+from dealsteal.transport import HttpTransport, get_default_transport
+
 LOGGER = logging.getLogger(__name__)
 
+COMMAND_NAMESPACE = uuid.UUID("5b0c2f0e-6f1e-4b8e-9a51-3d0c6c1f7a2d")
+
 
 class TodoistClient:
-    def __init__(self, api_token: str):
+    SYNC_BATCH_SIZE = 100
+
+    def __init__(
+        self,
+        api_token: str,
+        seen_items: SeenItemStore = None,
+        transport: HttpTransport = None,
+        metrics: MetricsRegistry = None,
+        task_map=None,
+    ):
         """
         Initialize the Todoist client.
 
         :param api_token: Your Todoist API token.
+        :param seen_items: Optional. Store of already submitted item IDs, defaults to one backed by store/items.txt.
+        :param transport: Optional. Pooled HTTP transport, defaults to the shared one.
+        :param metrics: Optional. Registry for request and submit metrics, defaults to the shared, disabled one.
+        :param task_map: Optional. :class:`~dealsteal.reconcile.TaskMap` recording the task of each submitted item.
         """
         self.api_token = api_token
-        self.url = "https://api.todoist.com/rest/v2/tasks"
+        self.api_url = "https://api.todoist.com/rest/v2"
+        self.url = f"{self.api_url}/tasks"
+        self.sync_url = "https://api.todoist.com/sync/v9/sync"
         self.headers = {
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json",
         }
+        self.transport = transport or get_default_transport()
         self.items_file = "store/items.txt"
-
-    def _is_item_used(self, item_id: str) -> bool:
+        self.seen_items = (
+            seen_items if seen_items is not None else SeenItemStore(self.items_file)
+        )
+        self.metrics = metrics or get_default_registry()
+        self.task_map = task_map
+
+    def close(self) -> None:
+        """Flush buffered state, such as newly used item IDs, to disk."""
+        self.seen_items.flush()
+        if self.task_map is not None:
+            self.task_map.flush()
+
+    def is_item_used(self, item_id: str) -> bool:
         """
         Check if an item has already been used.
 
         :param item_id: The ID of the item to check.
         :return: True if the item has been used, False otherwise.
         """
-        if not os.path.exists(self.items_file):
-            return False
-        with open(self.items_file, "r") as file:
-            used_items = file.read().splitlines()
-        return item_id in used_items
+        return item_id in self.seen_items
 
-    def _mark_item_as_used(self, item_id: str) -> None:
+    def _mark_item_as_used(
+        self, item_id: str, end_time: str = None, task_id: str = None
+    ) -> None:
         """
-        Mark an item as used by appending its ID to the items file.
+        Mark an item as used so later runs skip it until its auction ends.
 
         :param item_id: The ID of the item to mark as used.
+        :param end_time: Optional. When the auction ends, after which the entry is evicted.
+        :param task_id: Optional. The task created for the item, recorded in the task map.
         """
-        with open(self.items_file, "a") as file:
-            file.write(f"{item_id}\n")
+        self.seen_items.add(item_id, end_time)
+        if self.task_map is not None and task_id:
+            self.task_map.add(item_id, task_id, end_time)
 
     def get_projects(self) -> list:
         """
@@ -49,8 +86,8 @@ class TodoistClient:
 
         :return: List of projects, or None if the request failed.
         """
-        projects_url = "https://api.todoist.com/rest/v2/projects"
-        response = requests.get(projects_url, headers=self.headers)
+        projects_url = f"{self.api_url}/projects"
+        response = self.transport.get(projects_url, headers=self.headers)
 
         if response.status_code == 200:
             return response.json()
@@ -67,8 +104,8 @@ class TodoistClient:
         :param task_id: The ID of the task.
         :return: Response JSON from Todoist API, or None if the request failed.
         """
-        task_url = f"https://api.todoist.com/rest/v2/tasks/{task_id}"
-        response = requests.get(task_url, headers=self.headers)
+        task_url = f"{self.url}/{task_id}"
+        response = self.transport.get(task_url, headers=self.headers)
 
         if response.status_code == 200:
             return response.json()
@@ -76,6 +113,74 @@ class TodoistClient:
             LOGGER.error(f"Failed to get task: {response.status_code}, {response.text}")
             return None
 
+    def get_tasks(self, project_id: str = None) -> list:
+        """
+        Get all active tasks in one request.
+
+        :param project_id: Optional. Only list the tasks of this project.
+        :return: List of tasks, or None if the request failed.
+        """
+        params = {"project_id": project_id} if project_id else None
+        response = None
+        started = time.perf_counter()
+        try:
+            response = self.transport.get(self.url, headers=self.headers, params=params)
+        except requests.exceptions.RequestException as error:
+            LOGGER.error(f"Failed to get tasks: {error}")
+            return None
+        finally:
+            self._record_request(
+                "todoist_tasks", response, time.perf_counter() - started
+            )
+
+        if response.status_code != 200:
+            LOGGER.error(
+                f"Failed to get tasks: {response.status_code}, {response.text}"
+            )
+            return None
+        return response.json()
+
+    def close_tasks(self, task_ids: Iterable[str], delete: bool = False) -> list:
+        """
+        Complete or delete many tasks through the Sync API, packing up to 100 per request.
+
+        :param task_ids: IDs of the tasks.
+        :param delete: Optional. Delete the tasks instead of completing them.
+        :return: IDs of the tasks that were completed or deleted.
+        """
+        command_type = "item_delete" if delete else "item_close"
+        verb = "delete" if delete else "complete"
+        task_ids = [str(task_id) for task_id in task_ids]
+        closed = []
+
+        for start in range(0, len(task_ids), self.SYNC_BATCH_SIZE):
+            commands = [
+                {
+                    "type": command_type,
+                    "uuid": str(
+                        uuid.uuid5(COMMAND_NAMESPACE, f"{command_type}:{task_id}")
+                    ),
+                    "args": {"id": task_id},
+                }
+                for task_id in task_ids[start : start + self.SYNC_BATCH_SIZE]
+            ]
+            data = self._sync(commands, f"{verb} {len(commands)} tasks")
+            if data is None:
+                continue
+
+            sync_status = data.get("sync_status", {})
+            for command in commands:
+                status = sync_status.get(command["uuid"])
+                if status == "ok":
+                    closed.append(command["args"]["id"])
+                else:
+                    LOGGER.error(
+                        f"Failed to {verb} task {command['args']['id']}: {status}"
+                    )
+
+        LOGGER.info(f"{verb.capitalize()}d {len(closed)} of {len(task_ids)} tasks.")
+        return closed
+
     def delete_task(self, task_id: str) -> bool:
         """
         Delete a task from Todoist by its ID.
@@ -83,8 +188,8 @@ class TodoistClient:
         :param task_id: The ID of the task.
         :return: True if the task was successfully deleted, False otherwise.
         """
-        task_url = f"https://api.todoist.com/rest/v2/tasks/{task_id}"
-        response = requests.delete(task_url, headers=self.headers)
+        task_url = f"{self.url}/{task_id}"
+        response = self.transport.delete(task_url, headers=self.headers)
 
         if response.status_code == 204:
             LOGGER.info("Task successfully deleted.")
@@ -102,6 +207,7 @@ class TodoistClient:
         due_date: str = None,
         project_id: str = None,
         item_id: str = None,
+        end_time: str = None,
     ) -> dict:
         """
         Submit a task to Todoist.
@@ -111,10 +217,12 @@ class TodoistClient:
         :param due_date: Optional. The due date for the task (e.g., "2025-01-08T12:00:00Z").
         :param project_id: Optional. The ID of the project to add the task to.
         :param item_id: Optional. The ID of the item to check if it was already used.
-        :return: Response JSON from Todoist API, or None if the task was not submitted.
+        :param end_time: Optional. When the item's auction ends, so it can be forgotten afterwards.
+        :return: Response JSON from Todoist API, or None if the task was not submitted or failed.
         """
-        if item_id and self._is_item_used(item_id):
+        if item_id and self.is_item_used(item_id):
             LOGGER.warning(f"Item {item_id} was already used. Task not submitted.")
+            self.metrics.inc("dealsteal_dedup_hits_total")
             return None
 
         data = {"content": title}
@@ -128,17 +236,207 @@ class TodoistClient:
         if project_id:
             data["project_id"] = project_id
 
-        response = requests.post(self.url, json=data, headers=self.headers)
+        response = None
+        started = time.perf_counter()
+        try:
+            response = self.transport.post(self.url, json=data, headers=self.headers)
+        except requests.exceptions.RequestException as error:
+            LOGGER.error(f"Failed to add task: {error}")
+            self.metrics.inc("dealsteal_todoist_submits_total", outcome="failed")
+            return None
+        finally:
+            self._record_request(
+                "todoist_tasks", response, time.perf_counter() - started
+            )
 
-        if response.status_code in [200, 204]:
-            LOGGER.info("Task successfully added.")
-            if item_id:
-                self._mark_item_as_used(item_id)
-        else:
+        if response.status_code not in [200, 204]:
             LOGGER.error(f"Failed to add task: {response.status_code}, {response.text}")
+            self.metrics.inc("dealsteal_todoist_submits_total", outcome="failed")
+            return None
+
+        LOGGER.info("Task successfully added.")
+        self.metrics.inc("dealsteal_todoist_submits_total", outcome="created")
+        result = response.json() if response.content else {}
+        if item_id:
+            self._mark_item_as_used(item_id, end_time, result.get("id"))
+        return result
+
+    def submit_tasks(self, tasks: Iterable[dict], rejected: dict = None) -> list:
+        """
+        Submit many tasks through the Todoist Sync API, packing up to 100 per request.
+
+        Each task is a dict with the keyword arguments of :meth:`submit_task`. Tasks
+        for already used items, and repeats of an item within the same call, are
+        skipped, as are items another worker sharing the seen store has claimed.
+        Only items whose command succeeded are marked as used; the others are
+        released so a later run can try again.
+
+        :param tasks: Iterable of task dicts.
+        :param rejected: Optional. Filled with the ``sync_status`` error of every task whose
+            command Todoist rejected, keyed by the task's position in ``tasks``.
+        :return: Created task IDs in input order, None for skipped or failed tasks.
+        """
+        results = []
+        pending = []
+
+        for task in tasks:
+            results.append(None)
+            item_id = task.get("item_id")
+            if item_id and (
+                self.is_item_used(item_id) or not self.seen_items.claim(item_id)
+            ):
+                LOGGER.warning(f"Item {item_id} was already used. Task not submitted.")
+                self.metrics.inc("dealsteal_dedup_hits_total")
+                continue
 
+            pending.append((len(results) - 1, task, self._build_item_add(task)))
+
+            if len(pending) >= self.SYNC_BATCH_SIZE:
+                self._send_item_adds(pending, results, rejected)
+                pending = []
+
+        if pending:
+            self._send_item_adds(pending, results, rejected)
+
+        return results
+
+    def _build_item_add(self, task: dict) -> dict:
+        """
+        Build a Sync API ``item_add`` command for a task.
+
+        :param task: Task dict with the keyword arguments of :meth:`submit_task`.
+        :return: The command with a fresh temp_id. Its uuid is derived from the item ID when
+            there is one, so Todoist ignores a repeated submission of the same item.
+        """
+        args = {"content": task["title"]}
+
+        if task.get("description"):
+            args["description"] = task["description"]
+
+        if task.get("due_date"):
+            args["due"] = {"date": task["due_date"]}
+
+        if task.get("project_id"):
+            args["project_id"] = task["project_id"]
+
+        return {
+            "type": "item_add",
+            "uuid": str(
+                uuid.uuid5(COMMAND_NAMESPACE, task["item_id"])
+                if task.get("item_id")
+                else uuid.uuid4()
+            ),
+            "temp_id": str(uuid.uuid4()),
+            "args": args,
+        }
+
+    def _send_item_adds(
+        self, pending: list, results: list, rejected: dict = None
+    ) -> None:
+        """
+        Send one batch of ``item_add`` commands and record the per-command outcome.
+
+        :param pending: List of (result index, task, command) tuples.
+        :param results: Result list to fill in with created task IDs.
+        :param rejected: Optional. Filled with the error of every rejected command, by result index.
+        """
+        commands = [command for _, _, command in pending]
+        data = self._sync(commands, f"add {len(commands)} tasks")
+        if data is None:
+            self.metrics.inc(
+                "dealsteal_todoist_submits_total", len(commands), outcome="failed"
+            )
+            self._release_items(task for _, task, _ in pending)
+            return
+
+        sync_status = data.get("sync_status", {})
+        temp_id_mapping = data.get("temp_id_mapping", {})
+        added = 0
+
+        for index, task, command in pending:
+            status = sync_status.get(command["uuid"])
+            if status != "ok":
+                LOGGER.error(f"Failed to add task {task['title']!r}: {status}")
+                self._release_items([task])
+                if rejected is not None:
+                    rejected[index] = status
+                continue
+
+            added += 1
+            results[index] = temp_id_mapping.get(command["temp_id"])
+            if task.get("item_id"):
+                self._mark_item_as_used(
+                    task["item_id"], task.get("end_time"), results[index]
+                )
+
+        LOGGER.info(f"{added} of {len(commands)} tasks successfully added.")
+        self.metrics.inc("dealsteal_todoist_submits_total", added, outcome="created")
+        self.metrics.inc(
+            "dealsteal_todoist_submits_total", len(commands) - added, outcome="failed"
+        )
+
+    def _sync(self, commands: list, action: str) -> dict:
+        """
+        Send a batch of Sync API commands in one request.
+
+        :param commands: The commands.
+        :param action: What the commands do, for log messages, e.g. "add 3 tasks".
+        :return: Response JSON with the per-command ``sync_status``, or None if the request failed.
+        """
+        response = None
+        started = time.perf_counter()
+        try:
+            # Every command carries a uuid, so Todoist drops repeated ones.
+            response = self.transport.post(
+                self.sync_url,
+                json={"commands": commands},
+                headers=self.headers,
+                retry=True,
+            )
+        except requests.exceptions.RequestException as error:
+            LOGGER.error(f"Failed to {action}: {error}")
+            return None
+        finally:
+            self._record_request(
+                "todoist_sync", response, time.perf_counter() - started
+            )
+
+        if response.status_code != 200:
+            LOGGER.error(f"Failed to {action}: {response.status_code}, {response.text}")
+            return None
         return response.json()
 
+    def _release_items(self, tasks: Iterable[dict]) -> None:
+        """
+        Release the claims on the items of tasks that were not added.
+
+        :param tasks: The tasks that failed.
+        """
+        for task in tasks:
+            if task.get("item_id"):
+                self.seen_items.release(task["item_id"])
+
+    def _record_request(self, endpoint: str, response, elapsed: float) -> None:
+        """
+        Record the outcome, latency and size of one Todoist API call.
+
+        :param endpoint: Label of the called endpoint.
+        :param response: The response, or None if the call failed.
+        :param elapsed: Wall time of the call in seconds.
+        """
+        if not self.metrics.enabled:
+            return
+
+        status = "error" if response is None else str(response.status_code)
+        self.metrics.inc("dealsteal_requests_total", endpoint=endpoint, status=status)
+        self.metrics.observe("dealsteal_request_seconds", elapsed, endpoint=endpoint)
+        if response is not None:
+            self.metrics.inc(
+                "dealsteal_response_bytes_total",
+                len(response.content),
+                endpoint=endpoint,
+            )
+
 
 if __name__ == "__main__":
     API_TOKEN = os.environ.get(
@@ -160,6 +458,7 @@ if __name__ == "__main__":
     ITEM_ID = "unique_item_id_123"  # Replace with your actual item ID if needed
 
     response = client.submit_task(TITLE, DESCRIPTION, DUE_DATE, PROJECT_ID, ITEM_ID)
+    client.close()
     LOGGER.info(response)
 
     # Example usage of get_projects
@@ -0,0 +1,195 @@
+import email.utils
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a request would start after the run deadline has passed."""
+
+
+class HttpTransport:
+    """Pooled HTTP session shared by the eBay and Todoist clients.
+
+    Connections are kept alive in a pool sized to the search concurrency, every
+    request gets an explicit timeout, and connection errors and 429/5xx
+    responses are retried with jittered exponential backoff (honouring
+    ``Retry-After``). Only idempotent methods are retried by default; a POST is
+    retried only when the caller says it is safe, e.g. a Sync API call whose
+    commands carry a uuid. An optional run deadline caps the timeout of each
+    call, and every wait between attempts, to the time left in the run.
+    """
+
+    DEFAULT_POOL_SIZE = 8
+    DEFAULT_TIMEOUT = (5, 30)
+    DEFAULT_RETRIES = 3
+    DEFAULT_BACKOFF_FACTOR = 0.5
+    DEFAULT_BACKOFF_JITTER = 0.5
+    MAX_BACKOFF = 120
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        backoff_jitter=DEFAULT_BACKOFF_JITTER,
+    ):
+        """Create the pooled session.
+
+        Args:
+            pool_size (int, optional): Maximum number of kept-alive connections per host. Defaults to 8.
+            timeout (float | tuple, optional): Default (connect, read) timeout in seconds. Defaults to (5, 30).
+            retries (int, optional): Number of retries on connection errors and 429/5xx responses. Defaults to 3.
+            backoff_factor (float, optional): Base of the exponential backoff in seconds. Defaults to 0.5.
+            backoff_jitter (float, optional): Maximum random seconds added to each backoff. Defaults to 0.5.
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.deadline = None
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def start_run(self, max_seconds=None):
+        """Start a run that must finish within ``max_seconds``.
+
+        Args:
+            max_seconds (float, optional): Run budget in seconds, None for no deadline. Defaults to None.
+        """
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+
+    def request(
+        self, method, url, timeout=None, retry=None, before_retry=None, **kwargs
+    ):
+        """Send a request through the pooled session, retrying it if that is safe.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            timeout (float | tuple, optional): Per-call timeout, defaults to the transport timeout.
+            retry (bool, optional): Whether the request may be sent again. Defaults to None,
+                which retries idempotent methods only.
+            before_retry (callable, optional): Called before every retry; returning False
+                gives up and returns the last response or error. Defaults to None.
+            **kwargs: Passed on to ``requests.Session.request``.
+
+        Returns:
+            requests.Response: The response, after retries.
+
+        Raises:
+            DeadlineExceeded: If the run deadline has already passed.
+        """
+        if retry is None:
+            retry = method.upper() in self.IDEMPOTENT_METHODS
+        attempts = self.retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 == attempts
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    timeout=self._clamp_timeout(timeout or self.timeout),
+                    **kwargs,
+                )
+            except DeadlineExceeded:
+                raise
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ):
+                if last_attempt or not self._wait(self._backoff(attempt), before_retry):
+                    raise
+                continue
+
+            if last_attempt or response.status_code not in self.RETRY_STATUSES:
+                return response
+            delay = _retry_after(response)
+            delay = self._backoff(attempt) if delay is None else delay
+            if not self._wait(delay, before_retry):
+                return response
+            response.close()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def _clamp_timeout(self, timeout):
+        if self.deadline is None:
+            return timeout
+
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Run deadline exceeded.")
+
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    def _backoff(self, attempt):
+        delay = self.backoff_factor * 2**attempt
+        return min(delay, self.MAX_BACKOFF) + random.uniform(0, self.backoff_jitter)
+
+    def _wait(self, delay, before_retry=None):
+        """Sleep before a retry, unless that would pass the run deadline or ``before_retry`` declines.
+
+        Returns:
+            bool: True if the request may be retried.
+        """
+        delay = min(delay, self.MAX_BACKOFF)
+        if self.deadline is not None and time.monotonic() + delay >= self.deadline:
+            return False
+        time.sleep(delay)
+        return before_retry is None or bool(before_retry())
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """Return the process-wide transport, creating it on first use.
+
+    Returns:
+        HttpTransport: The shared transport.
+    """
+    global _default_transport  # noqa: PLW0603
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
+
+
+def _retry_after(response):
+    """Read a ``Retry-After`` header in seconds, None if absent or unreadable."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
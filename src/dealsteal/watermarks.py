@@ -0,0 +1,253 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+
+from dealsteal.auction import Auction
+from dealsteal.ebay import IncompleteSearchError
+
+LOGGER = logging.getLogger(__name__)
+
+WATERMARK_PATH = "store/watermarks"
+
+
+class WatermarkStore:
+    """Per-search state for incremental searches, one JSON file per search.
+
+    For every search the store keeps when it was last fully refreshed, a
+    watermark per country (the latest listing start time seen there) and the
+    live auctions already known, so they can be served without asking eBay
+    again. Auctions are dropped once they have ended.
+    """
+
+    def __init__(self, path=WATERMARK_PATH):
+        """Create the store.
+
+        Args:
+            path (str, optional): Directory of the state files. Defaults to store/watermarks.
+        """
+        self.path = path
+
+    def load(self, key):
+        """Load the state of a search.
+
+        Args:
+            key (str | tuple): Identity of the search, e.g. ``CoalescedQuery.key``.
+
+        Returns:
+            dict: ``refreshed_at``, ``watermarks`` and ``auctions``, or None if nothing is stored.
+        """
+        path = self._file_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r") as file:
+                state = json.load(file)
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"Ignoring unreadable watermark file {path}: {error}")
+            return None
+
+        return {
+            "refreshed_at": datetime.fromisoformat(state["refreshed_at"]),
+            "watermarks": {
+                country: datetime.fromisoformat(start_time)
+                for country, start_time in state["watermarks"].items()
+            },
+            "auctions": {
+                record["item_id"]: _auction_from_record(record)
+                for record in state["auctions"]
+            },
+        }
+
+    def save(self, key, state):
+        """Store the state of a search, replacing the previous one.
+
+        Args:
+            key (str | tuple): Identity of the search.
+            state (dict): State in the format returned by :meth:`load`.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file_path(key)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(
+                {
+                    "refreshed_at": state["refreshed_at"].isoformat(),
+                    "watermarks": {
+                        country: start_time.isoformat()
+                        for country, start_time in state["watermarks"].items()
+                    },
+                    "auctions": [
+                        _auction_to_record(auction)
+                        for auction in state["auctions"].values()
+                    ],
+                },
+                file,
+            )
+        os.replace(temporary_path, path)
+
+    def _file_path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.path, f"{digest}.json")
+
+
+class IncrementalSearcher:
+    """Serves searches from local state, asking eBay only for new listings.
+
+    The first search, and every search after ``refresh_interval``, is a full
+    search that records every auction ending within ``max_time_remaining`` plus
+    ``refresh_interval`` and, per country, the latest listing start time seen.
+    That horizon covers every auction that can enter the window before the next
+    refresh, so later ones are not paged through. In between, each country
+    group is searched with ``StartTimeFrom`` set to its watermark, up to the
+    same horizon, so only listings started since are downloaded and parsed;
+    known auctions inside the ``max_time_remaining`` window come from the
+    stored state. Prices of known
+    auctions are as of when they were last fetched, and the periodic full
+    refresh picks up bids and listings a failed page may have missed.
+
+    ``min_price`` is never sent upstream: a listing that starts below it and is
+    bid above it later would otherwise be unknown until the next full refresh,
+    since it started before the watermark. Every listing is kept instead, and
+    ``min_price`` is checked locally against its last fetched price.
+
+    A search with a page that failed, or that the call budget refused, keeps
+    the auctions it did find but moves neither the watermarks nor the time of
+    the last full refresh, so nothing it missed is skipped later on.
+    """
+
+    DEFAULT_REFRESH_INTERVAL = 21_600
+
+    def __init__(self, searcher, store=None, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        """Wrap an eBay searcher.
+
+        Args:
+            searcher (EbayAuctionSearcher): Searcher used for full and incremental searches.
+            store (WatermarkStore, optional): Where state is kept. Defaults to one in store/watermarks.
+            refresh_interval (float, optional): Seconds between full searches. Defaults to 6 hours.
+        """
+        self.searcher = searcher
+        self.store = store or WatermarkStore()
+        self.refresh_interval = timedelta(seconds=refresh_interval)
+
+    def search(self, key, max_time_remaining=None, now=None, **search_kwargs):
+        """Search incrementally, like ``EbayAuctionSearcher.search_ebay_auctions``.
+
+        Args:
+            key (str | tuple): Identity of the search, e.g. ``CoalescedQuery.key``.
+            max_time_remaining (int, optional): Maximum time remaining for the auction in seconds. Defaults to None.
+            now (datetime, optional): Reference time. Defaults to the current UTC time.
+            **search_kwargs: Other arguments of ``search_ebay_auctions``.
+
+        Returns:
+            list: :class:`Auction` records within the window, ordered by country then end time.
+        """
+        now = now or datetime.now(timezone.utc)
+        countries = search_kwargs.get("countries") or self.searcher.EUROPEAN_COUNTRIES
+        min_price = search_kwargs.pop("min_price", None)
+        state = self.store.load(key)
+
+        full = state is None or now - state["refreshed_at"] >= self.refresh_interval
+        refreshed_at = now if full else state["refreshed_at"]
+        horizon = None
+        if max_time_remaining:
+            horizon = int(
+                (refreshed_at + self.refresh_interval - now).total_seconds()
+                + max_time_remaining
+            )
+        try:
+            auctions = self.searcher.search_ebay_auctions(
+                **search_kwargs,
+                min_price=None,
+                max_time_remaining=horizon,
+                start_time_from=None if full else state["watermarks"],
+                strict=True,
+            )
+            complete = True
+        except IncompleteSearchError as error:
+            LOGGER.warning(f"Keeping the watermarks of {key!r}: {error}")
+            auctions = error.auctions
+            complete = False
+
+        if full:
+            LOGGER.info(f"Full search for {key!r} found {len(auctions)} auctions.")
+        else:
+            LOGGER.info(f"Incremental search for {key!r} found {len(auctions)} new.")
+
+        if state is None and not complete:
+            return self._in_window(
+                auctions, countries, max_time_remaining, now, min_price
+            )
+        if full and complete:
+            state = {"refreshed_at": now, "watermarks": {}, "auctions": {}}
+
+        known = state["auctions"]
+        for auction in auctions:
+            known[auction.item_id] = auction
+            if not complete:
+                continue
+            start_time = _parse_start_time(auction.start_time)
+            if start_time is None:
+                continue
+            watermark = state["watermarks"].get(auction.country)
+            if watermark is None or start_time > watermark:
+                state["watermarks"][auction.country] = start_time
+
+        for country in countries:
+            state["watermarks"].setdefault(country, state["refreshed_at"])
+
+        for item_id in [
+            item_id for item_id, auction in known.items() if auction.end_time <= now
+        ]:
+            del known[item_id]
+
+        self.store.save(key, state)
+        return self._in_window(
+            known.values(), countries, max_time_remaining, now, min_price
+        )
+
+    def _in_window(self, auctions, countries, max_time_remaining, now, min_price=None):
+        positions = {country: position for position, country in enumerate(countries)}
+        results = []
+        for auction in auctions:
+            time_remaining = auction.end_time - now
+            if max_time_remaining and time_remaining.total_seconds() > (
+                max_time_remaining
+            ):
+                continue
+            if min_price and auction.price < float(min_price):
+                continue
+            auction.time_remaining = time_remaining
+            results.append(auction)
+
+        results.sort(
+            key=lambda auction: (
+                positions.get(auction.country, len(positions)),
+                auction.end_time,
+            )
+        )
+        return results
+
+
+def _parse_start_time(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _auction_to_record(auction):
+    record = asdict(auction)
+    record["end_time"] = auction.end_time.isoformat()
+    del record["time_remaining"]
+    return record
+
+
+def _auction_from_record(record):
+    end_time = datetime.fromisoformat(record["end_time"])
+    return Auction(
+        **{**record, "end_time": end_time, "time_remaining": timedelta(0)},
+    )
@@ -0,0 +1,345 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from dealsteal.seen import SeenItemStore, _to_utc
+
+LOGGER = logging.getLogger(__name__)
+
+WORKQUEUE_PATH = "store/workqueue.sqlite3"
+
+
+def connect(path=WORKQUEUE_PATH):
+    """Open a SQLite database that several processes can share.
+
+    Args:
+        path (str, optional): Database file. Defaults to store/workqueue.sqlite3.
+
+    Returns:
+        sqlite3.Connection: Connection in autocommit mode, usable from any thread.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(
+        path, timeout=30, isolation_level=None, check_same_thread=False
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+def worker_id():
+    """Return an ID for this process that is unique across containers."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """Lease-based queue of searches shared by worker processes through SQLite.
+
+    Every run has an ID; enqueueing the same run twice is a no-op, so several
+    containers can all enqueue the current run and then drain it together. A
+    worker claims one job at a time under a lease. Jobs whose lease ran out
+    without being completed, because their worker crashed or hung, are claimed
+    again by the next worker that asks.
+    """
+
+    DEFAULT_LEASE_SECONDS = 600
+
+    def __init__(
+        self, path=WORKQUEUE_PATH, lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.time
+    ):
+        """Open the queue, creating its table if needed.
+
+        Args:
+            path (str, optional): Database file. Defaults to store/workqueue.sqlite3.
+            lease_seconds (float, optional): How long a claimed job stays with its worker. Defaults to 600.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._connection = connect(path)
+        self._lock = threading.Lock()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " run_id TEXT, key TEXT, payload TEXT, position INTEGER,"
+            " owner TEXT, lease_until REAL, done INTEGER DEFAULT 0,"
+            " attempts INTEGER DEFAULT 0, created_at REAL,"
+            " PRIMARY KEY (run_id, key))"
+        )
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")
+        ]
+        if "created_at" not in columns:
+            self._connection.execute("ALTER TABLE jobs ADD COLUMN created_at REAL")
+
+    def enqueue(self, run_id, jobs):
+        """Add the jobs of a run, ignoring jobs the run already has.
+
+        Args:
+            run_id (str): ID of the run.
+            jobs (list): ``(key, payload)`` pairs in the order they should be claimed.
+
+        Returns:
+            int: Number of jobs added.
+        """
+        now = self.clock()
+        with self._lock:
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO jobs"
+                " (run_id, key, payload, position, created_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, key, json.dumps(payload), position, now)
+                    for position, (key, payload) in enumerate(jobs)
+                ],
+            )
+            return cursor.rowcount
+
+    def claim(self, run_id, owner):
+        """Lease the next open job of a run to ``owner``.
+
+        Args:
+            run_id (str): ID of the run.
+            owner (str): ID of the claiming worker.
+
+        Returns:
+            tuple: ``(key, payload)`` of the claimed job, or None if no job is open.
+        """
+        now = self.clock()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT key, payload, owner FROM jobs"
+                    " WHERE run_id = ? AND done = 0"
+                    " AND (lease_until IS NULL OR lease_until < ?)"
+                    " ORDER BY position LIMIT 1",
+                    (run_id, now),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                key, payload, previous_owner = row
+                self._connection.execute(
+                    "UPDATE jobs SET owner = ?, lease_until = ?, attempts = attempts + 1"
+                    " WHERE run_id = ? AND key = ?",
+                    (owner, now + self.lease_seconds, run_id, key),
+                )
+            finally:
+                self._connection.execute("COMMIT")
+
+        if previous_owner:
+            LOGGER.warning(f"Reclaimed {key!r} from expired lease of {previous_owner}.")
+        return key, json.loads(payload)
+
+    def complete(self, run_id, key, owner):
+        """Mark a job done, unless its lease has passed to another worker.
+
+        Args:
+            run_id (str): ID of the run.
+            key (str): Key of the job.
+            owner (str): ID of the worker that ran it.
+
+        Returns:
+            bool: True if the job was marked done.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET done = 1 WHERE run_id = ? AND key = ? AND owner = ?",
+                (run_id, key, owner),
+            )
+            return cursor.rowcount == 1
+
+    def open_jobs(self, run_id):
+        """Count the jobs of a run that are not done yet."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND done = 0", (run_id,)
+            ).fetchone()[0]
+
+    def prune(self, keep_run_id):
+        """Delete the jobs of runs enqueued before ``keep_run_id``.
+
+        Newer runs are kept, so a slow worker that finishes an old run never
+        deletes the run the other workers are draining already.
+        """
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM jobs WHERE run_id IN (SELECT run_id FROM jobs"
+                " GROUP BY run_id HAVING MIN(COALESCE(created_at, 0)) <"
+                " (SELECT MIN(created_at) FROM jobs WHERE run_id = ?))",
+                (keep_run_id,),
+            )
+
+
+class SharedSeenItemStore:
+    """Seen-item store in SQLite, shared by every worker process.
+
+    It offers the interface of :class:`~dealsteal.seen.SeenItemStore` plus
+    claims: before a task is submitted its item is claimed atomically, so only
+    one worker submits it, and the claim turns into a seen entry once Todoist
+    accepted the task. A worker that crashes in between leaves a claim behind
+    that others may take over after ``claim_seconds``; the Sync API command
+    uuid is derived from the item ID, so Todoist drops the repeat if the first
+    attempt did go through. When the table is created, the entries of a legacy
+    :class:`~dealsteal.seen.SeenItemStore` file are imported, so switching to
+    worker mode does not resubmit items that were already posted.
+    """
+
+    DEFAULT_CLAIM_SECONDS = 600
+
+    def __init__(
+        self,
+        path: str = WORKQUEUE_PATH,
+        owner: str = None,
+        claim_seconds: float = DEFAULT_CLAIM_SECONDS,
+        clock=time.time,
+        legacy_path: str = None,
+    ):
+        """
+        Open the store, creating its table if needed.
+
+        :param path: Database file, usually the one of the work queue.
+        :param owner: ID of this worker, defaults to :func:`worker_id`.
+        :param claim_seconds: How long an unfinished claim blocks other workers.
+        :param clock: Returns the current time in seconds.
+        :param legacy_path: Optional. Seen-item file imported when the table is created.
+        """
+        self.owner = owner or worker_id()
+        self.claim_seconds = claim_seconds
+        self.clock = clock
+        self._connection = connect(path)
+        self._lock = threading.Lock()
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            created = not self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'seen_items'"
+            ).fetchone()
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS seen_items ("
+                " item_id TEXT PRIMARY KEY, end_time TEXT, owner TEXT,"
+                " claimed_at REAL, seen INTEGER DEFAULT 0)"
+            )
+            if created and legacy_path and os.path.exists(legacy_path):
+                self._import(legacy_path)
+        finally:
+            self._connection.execute("COMMIT")
+
+    def __contains__(self, item_id: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM seen_items WHERE item_id = ? AND seen = 1", (item_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM seen_items WHERE seen = 1"
+            ).fetchone()[0]
+
+    def __enter__(self) -> "SharedSeenItemStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def claim(self, item_id: str) -> bool:
+        """
+        Reserve an item for submission by this worker.
+
+        :param item_id: The ID of the item.
+        :return: True if this worker may submit the item.
+        """
+        now = self.clock()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO seen_items (item_id, owner, claimed_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (item_id) DO UPDATE"
+                " SET owner = excluded.owner, claimed_at = excluded.claimed_at"
+                " WHERE seen = 0 AND (owner = excluded.owner OR claimed_at < ?)",
+                (item_id, self.owner, now, now - self.claim_seconds),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, item_id: str) -> None:
+        """
+        Give up an unfinished claim, e.g. after the submission failed.
+
+        :param item_id: The ID of the item.
+        """
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM seen_items WHERE item_id = ? AND owner = ? AND seen = 0",
+                (item_id, self.owner),
+            )
+
+    def add(self, item_id: str, end_time: datetime | str | None = None) -> None:
+        """
+        Mark an item as seen, completing its claim if there is one.
+
+        :param item_id: The ID of the item.
+        :param end_time: Optional. When the auction ends, as a datetime or ISO 8601 string.
+        """
+        if end_time is not None:
+            end_time = _to_utc(end_time).isoformat()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO seen_items (item_id, end_time, owner, claimed_at, seen)"
+                " VALUES (?, ?, ?, ?, 1) ON CONFLICT (item_id) DO UPDATE"
+                " SET end_time = excluded.end_time, seen = 1",
+                (item_id, end_time, self.owner, self.clock()),
+            )
+
+    def flush(self) -> None:
+        """Nothing to do, every change is committed immediately."""
+
+    def evict_expired(self, now: datetime | None = None) -> int:
+        """
+        Drop entries whose auction has ended, and claims abandoned for ``claim_seconds``.
+
+        :param now: Optional. Reference time, defaults to the current UTC time.
+        :return: The number of evicted entries.
+        """
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT item_id, end_time FROM seen_items WHERE end_time IS NOT NULL"
+            ).fetchall()
+            expired = [
+                (item_id,) for item_id, end_time in rows if _to_utc(end_time) <= now
+            ]
+            self._connection.executemany(
+                "DELETE FROM seen_items WHERE item_id = ?", expired
+            )
+            self._connection.execute(
+                "DELETE FROM seen_items WHERE seen = 0 AND claimed_at < ?",
+                (self.clock() - self.claim_seconds,),
+            )
+
+        if expired:
+            LOGGER.info(f"Evicted {len(expired)} ended auctions from the shared store.")
+        return len(expired)
+
+    def _import(self, legacy_path: str) -> None:
+        entries = SeenItemStore(legacy_path).items()
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO seen_items (item_id, end_time, owner, claimed_at, seen)"
+            " VALUES (?, ?, ?, ?, 1)",
+            [
+                (
+                    item_id,
+                    None if end_time is None else end_time.isoformat(),
+                    self.owner,
+                    self.clock(),
+                )
+                for item_id, end_time in entries
+            ],
+        )
+        LOGGER.info(f"Imported {len(entries)} seen items from {legacy_path}.")
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.dealsteal.auction import Auction
+
+NOW = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+
+class Clock:
+    """Settable time source for the components that take a ``clock``."""
+
+    def __init__(self, now=NOW.timestamp()):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """A :class:`Clock` standing at ``NOW``."""
+    return Clock()
+
+
+@pytest.fixture
+def make_auction():
+    """Factory of :class:`Auction` records ending relative to ``NOW``.
+
+    Keyword arguments other than ``ends_in`` and ``started_ago`` are passed on
+    to :class:`Auction`, e.g. ``currency``, ``country`` or ``category_id``.
+    """
+
+    def make(item_id, price=10.0, ends_in=3600, started_ago=None, **fields):
+        if started_ago is not None:
+            fields["start_time"] = (NOW - timedelta(seconds=started_ago)).isoformat()
+        return Auction(
+            **{
+                "item_id": str(item_id),
+                "title": str(item_id),
+                "country": "DE",
+                "price": price,
+                "currency": "EUR",
+                "end_time": NOW + timedelta(seconds=ends_in),
+                "time_remaining": timedelta(seconds=ends_in),
+                **fields,
+            }
+        )
+
+    return make
@@ -0,0 +1,34 @@
+from src.dealsteal.bench import compare_to_baseline, run_benchmarks, synthetic_response
+
+
+def test_synthetic_response_has_requested_size():
+    """Synthetic responses hold unique items built from the recorded fixture."""
+    response = synthetic_response(500)
+    items = response["findItemsAdvancedResponse"][0]["searchResult"][0]["item"]
+
+    assert len(items) == 500
+    assert len({item["itemId"][0] for item in items}) == 500
+
+
+def test_benchmarks_run_offline_and_flag_regressions():
+    """All benchmarks run without network access and regressions are reported."""
+    results = run_benchmarks(item_count=300, repeats=1)
+
+    assert set(results) == {
+        "extract_items",
+        "decode_response",
+        "filter_items_by_time",
+        "format_item",
+        "build_payload",
+        "todoist_dedup",
+    }
+    assert compare_to_baseline(results, results) == []
+
+    faster_baseline = {
+        "format_item": {
+            "items_per_sec": results["format_item"]["items_per_sec"] * 10,
+            "peak_bytes_per_item": results["format_item"]["peak_bytes_per_item"],
+        }
+    }
+    (regression,) = compare_to_baseline(results, faster_baseline)
+    assert regression.startswith("format_item")
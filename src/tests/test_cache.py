@@ -0,0 +1,35 @@
+from src.dealsteal.cache import ResponseCache
+
+
+def test_keys_ignore_payload_key_order():
+    """Payloads with the same content map to the same key."""
+    assert ResponseCache.make_key({"a": 1, "b": [1, 2]}) == ResponseCache.make_key(
+        {"b": [1, 2], "a": 1}
+    )
+
+
+def test_entries_expire_and_are_evicted_lru(clock):
+    """Entries expire after the TTL and the least recently used one is evicted."""
+    cache = ResponseCache(ttl=60, max_entries=2, clock=clock)
+
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    assert cache.get("a") == {"value": 1}
+    cache.set("c", {"value": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+
+    clock.now += 61
+    assert cache.get("a") is None
+
+
+def test_disk_backend_survives_restarts(tmp_path, clock):
+    """Entries written to disk are visible to a new cache until they expire."""
+    ResponseCache(ttl=60, path=str(tmp_path), clock=clock).set("a", [1, 2])
+
+    assert ResponseCache(ttl=60, path=str(tmp_path), clock=clock).get("a") == [1, 2]
+
+    clock.now += 61
+    assert ResponseCache(ttl=60, path=str(tmp_path), clock=clock).get("a") is None
+    assert list(tmp_path.iterdir()) == []
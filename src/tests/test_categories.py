@@ -0,0 +1,65 @@
+import pytest
+
+from src.dealsteal.categories import CategoryHistogram
+
+
+@pytest.fixture
+def auctions_in(make_auction):
+    """Factory of ``count`` auctions in one category."""
+
+    def make(category_id, count, name=None):
+        return [
+            make_auction(
+                f"{category_id}-{index}",
+                category=name or f"Category {category_id}",
+                category_id=category_id,
+            )
+            for index in range(count)
+        ]
+
+    return make
+
+
+def test_searches_are_routed_once_learned(tmp_path, auctions_in):
+    """Keywords are routed to their top categories once enough results are counted."""
+    histogram = CategoryHistogram(str(tmp_path / "categories.json"), min_samples=50)
+    histogram.record("GoPro  Hero", auctions_in("625", 30))
+    assert histogram.route("gopro hero") is None
+
+    histogram.record("gopro hero", auctions_in("625", 30) + auctions_in("11724", 15))
+    histogram.record("gopro hero", auctions_in("48446", 5) + auctions_in("1", 1))
+
+    assert histogram.route("gopro hero") == ["11724", "625"]
+    assert CategoryHistogram(histogram.path).route("gopro hero") == ["11724", "625"]
+
+
+def test_spread_out_results_are_not_routed(tmp_path, auctions_in):
+    """Keywords whose results span more categories than can be searched stay unrestricted."""
+    histogram = CategoryHistogram(None, min_samples=10)
+    histogram.record(
+        "lens", [auction for id in "12345" for auction in auctions_in(id, 10)]
+    )
+
+    assert histogram.route("lens") is None
+
+
+def test_histograms_expire(tmp_path, auctions_in, clock):
+    """An expired histogram is learned again from scratch."""
+    histogram = CategoryHistogram(
+        str(tmp_path / "categories.json"), min_samples=10, ttl_days=1, clock=clock
+    )
+    histogram.record("camera", auctions_in("625", 10))
+    assert histogram.route("camera") == ["625"]
+
+    clock.now += 2 * 86_400
+    assert histogram.route("camera") is None
+    assert CategoryHistogram(histogram.path, clock=clock).route("camera") is None
+
+
+def test_category_names_resolve_to_seen_ids(auctions_in):
+    """Category names resolve once a result from the category was seen."""
+    histogram = CategoryHistogram(None)
+    histogram.record("camera", auctions_in("625", 1, name="Digital Cameras"))
+
+    assert histogram.resolve(["digital cameras"]) == ["625"]
+    assert histogram.resolve(["Digital Cameras", "Lenses"]) is None
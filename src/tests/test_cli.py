@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.dealsteal.cli import build_parser, process_age
+
+
+def test_import_has_no_side_effects():
+    """Importing the package and the CLI configures nothing and loads no HTTP client."""
+    code = (
+        "import logging, sys; import dealsteal, dealsteal.cli; "
+        "print('requests' in sys.modules, bool(logging.getLogger().handlers))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": os.path.dirname(os.path.dirname(__file__))},
+    )
+
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_help_loads_no_http_client():
+    """Printing the usage imports nothing beyond the CLI itself."""
+    code = (
+        "import sys; from dealsteal.cli import main\n"
+        "try:\n    main(['--help'])\nexcept SystemExit:\n    pass\n"
+        "print('requests' in sys.modules, file=sys.stderr)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": os.path.dirname(os.path.dirname(__file__))},
+    )
+
+    assert result.stderr.split() == ["False"]
+
+
+def test_parser_accepts_subcommands():
+    parser = build_parser()
+
+    assert parser.parse_args(["daemon"]).command == "daemon"
+    assert parser.parse_args(["workers", "3"]).count == 3
+    with pytest.raises(SystemExit):
+        parser.parse_args([])
+
+
+def test_process_age_is_plausible():
+    age = process_age()
+
+    assert age is None or 0 <= age < 3600
+
+
+def test_max_time_remaining_has_a_default(monkeypatch, tmp_path):
+    from src.dealsteal.runner import DEFAULT_MAX_TIME_REMAINING, build_from_environment
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("MAX_TIME_REMAINING", raising=False)
+
+    searcher, client, _, settings = build_from_environment(metrics_port=0)
+    searcher.transport.close()
+
+    assert settings["max_time_remaining"] == DEFAULT_MAX_TIME_REMAINING
@@ -1,6 +1,12 @@
+import json
 import os
+import time
+from datetime import datetime, timedelta, timezone
 
-from src.dealsteal.ebay import EbayAuctionSearcher
+import pytest
+
+from src.dealsteal.cache import ResponseCache
+from src.dealsteal.ebay import EbayAuctionSearcher, IncompleteSearchError
 
 
 def test_ebay_access():
@@ -33,3 +39,400 @@ def test_ebay_access():
     # Validate search results
     assert auctions is not None, "Search returned None."
     assert len(auctions) > 0, "No auctions found."
+
+
+def _make_item(item_id, country, end_time, price="10.0"):
+    """Build a raw Finding API item with the list-wrapped layout eBay returns."""
+    return {
+        "itemId": [item_id],
+        "title": [f"Item {item_id}"],
+        "country": [country],
+        "location": [f"Somewhere, {country}"],
+        "viewItemURL": [f"https://www.ebay.com/itm/{item_id}"],
+        "galleryURL": [f"https://i.ebayimg.com/{item_id}.jpg"],
+        "primaryCategory": [{"categoryId": ["625"], "categoryName": ["Cameras"]}],
+        "condition": [{"conditionId": ["3000"], "conditionDisplayName": ["Used"]}],
+        "listingInfo": [
+            {
+                "listingType": ["Auction"],
+                "startTime": ["2025-01-01T00:00:00.000Z"],
+                "endTime": [end_time],
+            }
+        ],
+        "sellingStatus": [
+            {"currentPrice": [{"@currencyId": "EUR", "__value__": price}]}
+        ],
+        "shippingInfo": [
+            {"shippingServiceCost": [{"@currencyId": "EUR", "__value__": "5.0"}]}
+        ],
+        "sellerInfo": [
+            {
+                "sellerUserName": ["seller"],
+                "feedbackScore": ["100"],
+                "positiveFeedbackPercent": ["99.5"],
+            }
+        ],
+    }
+
+
+def _make_response(items):
+    """Wrap raw items in a findItemsAdvancedResponse document."""
+    return {
+        "findItemsAdvancedResponse": [
+            {"searchResult": [{"@count": str(len(items)), "item": items}]}
+        ]
+    }
+
+
+def _end_time_in(seconds):
+    end = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+    return end.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _located_in(payload):
+    return next(f["value"] for f in payload["itemFilter"] if f["name"] == "LocatedIn")
+
+
+def test_search_is_concurrent_and_ordered(monkeypatch):
+    """Country groups are searched concurrently but results keep the country order."""
+    searcher = EbayAuctionSearcher("token", "app", max_workers=4)
+    searcher.MAX_LOCATED_IN_VALUES = 1
+    countries = ["DE", "FR", "IT", "ES"]
+    delays = {"DE": 0.2, "FR": 0.05, "IT": 0.15, "ES": 0.0}
+
+    def fake_request(headers, payload, priority=0):
+        (country,) = _located_in(payload)
+        time.sleep(delays[country])
+        return _make_response([_make_item(country, country, _end_time_in(3600))])
+
+    monkeypatch.setattr(searcher, "_make_request", fake_request)
+
+    started = time.perf_counter()
+    auctions = searcher.search_ebay_auctions("camera", countries=countries)
+    elapsed = time.perf_counter() - started
+
+    assert [auction["item_id"] for auction in auctions] == countries
+    assert elapsed < sum(delays.values())
+
+
+def test_countries_are_packed_into_located_in_groups():
+    """All European countries fit into two evenly sized LocatedIn filters."""
+    searcher = EbayAuctionSearcher("token", "app")
+    groups = searcher._plan_country_groups(searcher.EUROPEAN_COUNTRIES)
+
+    assert len(groups) == 2
+    assert all(len(group) <= searcher.MAX_LOCATED_IN_VALUES for group in groups)
+    assert [country for group in groups for country in group] == (
+        searcher.EUROPEAN_COUNTRIES
+    )
+
+
+def test_overflowing_groups_are_paged_not_split(monkeypatch):
+    """A group with more results than fit on a page is paged through, never re-requested per country."""
+    searcher = EbayAuctionSearcher("token", "app")
+    calls = []
+
+    def fake_request(headers, payload, priority=0):
+        countries = _located_in(payload)
+        page_number = payload["paginationInput"].get("pageNumber", 1)
+        calls.append((countries[0], page_number))
+        response = _make_response(
+            [
+                _make_item(f"{country}-{page_number}", country, _end_time_in(3600))
+                for country in countries
+            ]
+        )
+        response["findItemsAdvancedResponse"][0]["paginationOutput"] = [
+            {"totalPages": ["2"]}
+        ]
+        return response
+
+    monkeypatch.setattr(searcher, "_make_request", fake_request)
+    auctions = searcher.search_ebay_auctions("camera")
+
+    groups = searcher._plan_country_groups(searcher.EUROPEAN_COUNTRIES)
+    assert sorted(calls) == sorted(
+        (group[0], page) for group in groups for page in (1, 2)
+    )
+    assert len(auctions) == 2 * len(searcher.EUROPEAN_COUNTRIES)
+
+
+def test_iter_auctions_fetches_pages_lazily(monkeypatch):
+    """Pages are fetched on demand and stop once items end past the cutoff."""
+    searcher = EbayAuctionSearcher("token", "app")
+    pages = {
+        1: [
+            _make_item("1", "DE", _end_time_in(60)),
+            _make_item("2", "DE", _end_time_in(120)),
+        ],
+        2: [
+            _make_item("3", "DE", _end_time_in(180)),
+            _make_item("4", "DE", _end_time_in(7200)),
+        ],
+        3: [_make_item("5", "DE", _end_time_in(9000))],
+    }
+    requested = []
+
+    def fake_request(headers, payload, priority=0):
+        page_number = payload["paginationInput"].get("pageNumber", 1)
+        requested.append(page_number)
+        assert payload["sortOrder"] == "EndTimeSoonest"
+        response = _make_response(pages[page_number])
+        response["findItemsAdvancedResponse"][0]["paginationOutput"] = [
+            {"totalPages": [str(len(pages))]}
+        ]
+        return response
+
+    monkeypatch.setattr(searcher, "_make_request", fake_request)
+    auctions = searcher.iter_auctions(
+        "camera", countries=["DE"], max_time_remaining=3600
+    )
+
+    assert requested == []
+    assert next(auctions)["item_id"] == "1"
+    assert requested == [1]
+    assert [auction["item_id"] for auction in auctions] == ["2", "3"]
+    assert requested == [1, 2]
+
+
+def test_cached_responses_are_not_requested_again():
+    """Repeated searches with the same payload are served from the cache."""
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        content = json.dumps(
+            _make_response([_make_item("1", "DE", _end_time_in(60))])
+        ).encode()
+
+    class FakeTransport:
+        calls = 0
+
+        def post(self, url, **kwargs):
+            self.calls += 1
+            return FakeResponse()
+
+    transport = FakeTransport()
+    searcher = EbayAuctionSearcher(
+        "token", "app", transport=transport, cache=ResponseCache()
+    )
+
+    first = searcher.search_ebay_auctions("camera", countries=["DE"])
+    second = searcher.search_ebay_auctions("camera", countries=["DE"])
+
+    assert transport.calls == 1
+    assert [auction["item_id"] for auction in second] == ["1"]
+    assert first[0]["end_time"] == second[0]["end_time"]
+
+
+def test_items_are_parsed_into_auction_records():
+    """Raw items become typed Auction records that still offer the dict view."""
+    searcher = EbayAuctionSearcher("token", "app")
+    items = [_make_item("1", "DE", "2030-01-08T12:00:00.000Z", price="12.5")]
+
+    (auction,) = searcher._filter_items_by_time(items, None)
+
+    assert auction.price == 12.5
+    assert auction.currency == "EUR"
+    assert auction.shipping_cost == 5.0
+    assert auction.feedback_score == 100
+    assert auction.end_time == datetime(2030, 1, 8, 12, tzinfo=timezone.utc)
+    assert auction["price"] == "12.5 EUR"
+    assert auction["end_time"] == "2030-01-08T12:00:00.000Z"
+    assert auction.to_dict()["category_id"] == "625"
+    assert not hasattr(auction, "__dict__")
+
+
+def test_time_filter_uses_one_clock_snapshot():
+    """The vectorized and scalar paths keep the same items for a given "now"."""
+    searcher = EbayAuctionSearcher("token", "app")
+    now = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    items = [
+        _make_item(
+            str(offset),
+            "DE",
+            (now + timedelta(minutes=offset)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        )
+        for offset in range(600)
+    ]
+
+    vectorized = searcher._filter_items_by_time(items, 3600, now=now)
+    searcher.VECTORIZE_THRESHOLD = len(items) + 1
+    scalar = searcher._filter_items_by_time(items, 3600, now=now)
+
+    assert [auction.item_id for auction in vectorized] == [
+        str(offset) for offset in range(61)
+    ]
+    assert [auction.item_id for auction in scalar] == [
+        auction.item_id for auction in vectorized
+    ]
+    assert vectorized[60].time_remaining == timedelta(hours=1)
+
+
+def test_low_budget_skips_later_country_groups(monkeypatch):
+    """When the call budget runs low, later country groups are skipped first."""
+
+    class Budget:
+        def __init__(self):
+            self.priorities = []
+
+        def try_acquire(self, priority=0):
+            self.priorities.append(priority)
+            return priority >= 0
+
+    class FakeResponse:
+        def __init__(self, payload):
+            self.payload = payload
+
+        def raise_for_status(self):
+            pass
+
+        @property
+        def content(self):
+            return json.dumps(
+                _make_response(
+                    [
+                        _make_item(country, country, _end_time_in(3600))
+                        for country in _located_in(self.payload)
+                    ]
+                )
+            ).encode()
+
+    class FakeTransport:
+        def post(self, url, json=None, **kwargs):
+            return FakeResponse(json)
+
+    budget = Budget()
+    searcher = EbayAuctionSearcher(
+        "token", "app", transport=FakeTransport(), budget=budget
+    )
+    searcher.MAX_LOCATED_IN_VALUES = 2
+
+    auctions = searcher.search_ebay_auctions(
+        "camera", countries=["DE", "FR", "IT", "ES"], max_workers=1
+    )
+
+    assert sorted(budget.priorities) == [-1, 0]
+    assert [auction.item_id for auction in auctions] == ["DE", "FR"]
+
+
+def test_strict_search_reports_failed_pages(monkeypatch):
+    """A strict search raises with the auctions it got when a group's page fails."""
+    searcher = EbayAuctionSearcher("token", "app", max_workers=1)
+    searcher.MAX_LOCATED_IN_VALUES = 1
+
+    def fake_request(headers, payload, priority=0):
+        (country,) = _located_in(payload)
+        if country == "FR":
+            return None
+        return _make_response([_make_item(country, country, _end_time_in(3600))])
+
+    monkeypatch.setattr(searcher, "_make_request", fake_request)
+
+    lenient = searcher.search_ebay_auctions("camera", countries=["DE", "FR"])
+    with pytest.raises(IncompleteSearchError) as raised:
+        searcher.search_ebay_auctions("camera", countries=["DE", "FR"], strict=True)
+
+    assert [auction.item_id for auction in lenient] == ["DE"]
+    assert [auction.item_id for auction in raised.value.auctions] == ["DE"]
+
+
+def test_retries_are_charged_to_the_budget(monkeypatch):
+    """Every attempt of a throttled search takes a call from the budget."""
+    from src.dealsteal.ratelimit import CallBudget
+    from src.dealsteal.transport import HttpTransport
+
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.headers = {}
+            self.content = json.dumps(_make_response([])).encode()
+
+        def raise_for_status(self):
+            pass
+
+        def close(self):
+            pass
+
+    statuses = [503, 503, 200]
+    transport = HttpTransport(backoff_factor=0, backoff_jitter=0)
+    monkeypatch.setattr(
+        transport.session,
+        "request",
+        lambda *args, **kwargs: FakeResponse(statuses.pop(0)),
+    )
+    budget = CallBudget(daily_limit=100, burst=2)
+    searcher = EbayAuctionSearcher("token", "app", transport=transport, budget=budget)
+
+    searcher.search_ebay_auctions("camera", countries=["DE"])
+
+    assert budget.used == 2
+    assert statuses == [200]
+
+
+def test_start_time_filter_is_sent_in_finding_format():
+    """StartTimeFrom is sent as a UTC Finding API timestamp."""
+    searcher = EbayAuctionSearcher("token", "app")
+    start_time = datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+    payload = searcher._build_payload(
+        "camera", ["DE", "FR"], None, None, None, None, start_time
+    )
+
+    assert {"name": "StartTimeFrom", "value": "2025-01-01T12:30:00.000Z"} in (
+        payload["itemFilter"]
+    )
+
+
+def test_decoded_responses_keep_every_parsed_field():
+    """Items reduced to the parsed fields give the same auctions as the full items."""
+    from src.dealsteal.bench import load_fixture
+
+    searcher = EbayAuctionSearcher("token", "app")
+    response = load_fixture()
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    full = searcher._filter_items_by_time(searcher._extract_items(response), None, now)
+    decoded = searcher._decode_response(json.dumps(response).encode())
+    slim = searcher._filter_items_by_time(searcher._extract_items(decoded), None, now)
+
+    assert slim == full
+    assert "autoPay" not in searcher._extract_items(decoded)[0]
+    assert searcher._total_pages(decoded) == searcher._total_pages(response)
+
+
+def test_searches_are_restricted_to_learned_categories(monkeypatch):
+    """Once a search's categories are learned, they are sent as categoryId."""
+    from src.dealsteal.categories import CategoryHistogram
+
+    searcher = EbayAuctionSearcher(
+        "token", "app", categories=CategoryHistogram(None, min_samples=2)
+    )
+    payloads = []
+
+    def fake_request(headers, payload, priority=0):
+        payloads.append(payload)
+        return _make_response(
+            [_make_item(str(index), "DE", _end_time_in(3600)) for index in range(2)]
+        )
+
+    monkeypatch.setattr(searcher, "_make_request", fake_request)
+
+    # Pages are learned as they arrive, also when the consumer stops early.
+    next(searcher.iter_auctions("camera", countries=["DE"]))
+    list(searcher.iter_auctions("camera", countries=["DE"]))
+    searcher.search_ebay_auctions("lens", countries=["DE"], categories=["cameras"])
+    searcher.search_ebay_auctions("lens", countries=["DE"], category_ids=[1, 2, 3, 4])
+
+    assert [payload.get("categoryId") for payload in payloads] == [
+        None,
+        ["625"],
+        ["625"],
+        ["1", "2", "3"],
+    ]
+    assert not any(
+        item_filter["name"] == "CategoryId"
+        for payload in payloads
+        for item_filter in payload["itemFilter"]
+    )
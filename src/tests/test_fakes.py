@@ -0,0 +1,50 @@
+from src.dealsteal.ebay import EbayAuctionSearcher
+from src.dealsteal.fakes import FakeServiceConfig, FakeServices
+from src.dealsteal.loadtest import run_load_test
+from src.dealsteal.seen import SeenItemStore
+from src.dealsteal.todoist import TodoistClient
+from src.dealsteal.transport import HttpTransport
+
+
+def test_clients_work_against_fake_services(tmp_path):
+    """Both clients can be pointed at the fakes and run their full API surface."""
+    transport = HttpTransport(backoff_factor=0, backoff_jitter=0)
+    searcher = EbayAuctionSearcher("token", "app", transport=transport)
+    client = TodoistClient(
+        "token",
+        seen_items=SeenItemStore(str(tmp_path / "items.txt")),
+        transport=transport,
+    )
+
+    with FakeServices(FakeServiceConfig(items_per_country=2)) as services:
+        services.point(searcher, client)
+
+        auctions = searcher.search_ebay_auctions("camera", countries=["DE", "FR"])
+        (task_id,) = client.submit_tasks([{"title": "camera", "item_id": "1"}])
+        assert client.get_projects() == [{"id": "1", "name": "Deals"}]
+        assert client.get_task(task_id)["content"] == "camera"
+        assert client.delete_task(task_id)
+
+        assert services.stats["calls"] == {
+            "POST /ebay/finding": 1,
+            "POST /todoist/sync/v9/sync": 1,
+            "GET /todoist/rest/v2/projects": 1,
+            "GET /todoist/rest/v2/tasks/{id}": 1,
+            "DELETE /todoist/rest/v2/tasks/{id}": 1,
+        }
+
+    assert sorted(auction.country for auction in auctions) == ["DE", "DE", "FR", "FR"]
+
+
+def test_load_test_reports_run_metrics():
+    """A small load test run reports wall time, calls, latency and memory."""
+    report = run_load_test(
+        queries=3,
+        seen_items=100,
+        config=FakeServiceConfig(items_per_country=1, error_rate=0.05),
+    )
+
+    assert report["calls"]["POST /ebay/finding"] >= 3
+    assert report["tasks_created"] > 0
+    assert 0 < report["latency_p50_ms"] <= report["latency_p99_ms"]
+    assert report["peak_rss_mib"] > 0
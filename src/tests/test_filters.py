@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from src.dealsteal.filters import (
+    VECTORIZE_THRESHOLD,
+    FilterError,
+    compile_rule,
+    evaluate_rules,
+)
+from src.dealsteal.queries import coalesce_queries
+
+
+def test_rule_combines_price_range_and_filters(make_auction):
+    rule = compile_rule(
+        {
+            "keywords": "gopro",
+            "max_price": 200,
+            "filters": {
+                "total_price": {"max": 150},
+                "feedback_score": {"min": 100},
+                "condition_id": {"in": ["3000"]},
+                "title": {"exclude": ["defe[ck]t", r"hero ?3\b"]},
+            },
+        }
+    )
+    good = {"shipping_cost": 5.0, "feedback_score": 500, "condition_id": "3000"}
+
+    assert rule.matches(make_auction(1, 140.0, **good))
+    assert not rule.matches(make_auction(2, 149.0, **good))
+    assert not rule.matches(make_auction(3, 100.0, **{**good, "feedback_score": None}))
+    assert not rule.matches(make_auction(4, 100.0, **{**good, "condition_id": "1000"}))
+    assert not rule.matches(make_auction(5, 100.0, title="GoPro Hero 3 DEFEKT", **good))
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"feedback": {"min": 1}},
+        {"title": {"min": 1}},
+        {"price": {"max": "cheap"}},
+        {"title": {"match": "("}},
+        {"price": 100},
+    ],
+)
+def test_invalid_filters_are_rejected(filters):
+    with pytest.raises(FilterError):
+        compile_rule({"keywords": "gopro", "filters": filters})
+
+
+def test_invalid_price_range_is_rejected():
+    with pytest.raises(FilterError):
+        compile_rule({"keywords": "gopro", "max_price": "cheap"})
+
+
+def test_batch_evaluation_matches_single_evaluation(make_auction):
+    """The NumPy path gives the same answers as checking auction by auction."""
+    generator = random.Random(0)
+    auctions = [
+        make_auction(
+            n,
+            generator.uniform(10, 300),
+            shipping_cost=generator.uniform(0, 20),
+            feedback_score=generator.choice([None, 5, 50, 5000]),
+            feedback_percentage=generator.choice([None, 95.0, 99.5]),
+            title=generator.choice(["GoPro HERO9", "GoPro Hero 3 defekt"]),
+        )
+        for n in range(VECTORIZE_THRESHOLD * 2)
+    ]
+    rules = [
+        compile_rule({"keywords": "gopro", "min_price": 50, "max_price": 250}),
+        compile_rule(
+            {
+                "keywords": "gopro",
+                "filters": {
+                    "total_price": {"max": 120},
+                    "feedback_percentage": {"min": 99},
+                    "title": {"exclude": "defekt"},
+                },
+            }
+        ),
+    ]
+
+    masks = evaluate_rules(rules, auctions)
+
+    for rule, mask in zip(rules, masks):
+        assert mask == [rule.matches(auction) for auction in auctions]
+        assert any(mask) and not all(mask)
+
+
+def test_entries_with_different_filters_share_one_search(make_auction):
+    entries = [
+        {"keywords": "gopro", "filters": {"title": {"match": "hero ?9"}}},
+        {"keywords": "gopro", "filters": {"feedback_score": {"min": 100}}},
+        {"keywords": "gopro", "filters": {"nonsense": {"min": 1}}},
+    ]
+
+    (query,) = coalesce_queries(entries)
+    auctions = [
+        make_auction(1, 10.0, title="GoPro Hero9", feedback_score=10),
+        make_auction(2, 10.0, title="GoPro Hero7", feedback_score=1000),
+        make_auction(3, 10.0, title="GoPro Hero7", feedback_score=10),
+    ]
+
+    assert len(query.entries) == 2
+    assert query.matches_any(auctions) == [True, True, False]
+    assert [
+        [auction.item_id for auction in matches]
+        for _, matches in query.fan_out(auctions)
+    ] == [["1"], ["2"]]
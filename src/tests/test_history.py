@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+from src.dealsteal.history import AuctionHistory
+
+NOW = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def _history(tmp_path, **kwargs):
+    return AuctionHistory(
+        str(tmp_path / "history.sqlite3"), clock=NOW.timestamp, **kwargs
+    )
+
+
+def test_quantiles_follow_recorded_prices(tmp_path, make_auction):
+    history = _history(tmp_path)
+
+    added = history.record("gopro", [make_auction(n, 100.0 + n) for n in range(100)])
+
+    assert added == 100
+    assert history.count("gopro", "EUR") == 100
+    assert abs(history.quantile("gopro", "EUR", 0.5) - 150) / 150 < 0.05
+    assert history.percentile("gopro", "EUR", 50.0) == 0
+    assert history.percentile("gopro", "EUR", 500.0) == 1
+    assert history.quantile("gopro", "USD", 0.5) is None
+
+
+def test_repeated_items_update_instead_of_counting_twice(tmp_path, make_auction):
+    history = _history(tmp_path)
+    history.record("gopro", [make_auction(1, 100.0), make_auction(2, 100.0)])
+
+    added = history.record("gopro", [make_auction(1, 200.0)])
+
+    assert added == 0
+    assert history.count("gopro", "EUR") == 2
+    assert history.percentile("gopro", "EUR", 150.0) == 0.5
+
+
+def test_statistics_survive_reopen_and_pruning(tmp_path, make_auction):
+    history = _history(tmp_path, retention_days=1)
+    history.record(
+        ("gopro", None),
+        [make_auction(1, 10.0, ends_in=-2 * 86_400), make_auction(2, 20.0)],
+    )
+
+    reopened = _history(tmp_path, retention_days=1)
+    assert reopened.count(("gopro", None), "EUR") == 2
+
+    assert reopened.prune() == 1
+    assert reopened.count(("gopro", None), "EUR") == 1
+    assert _history(tmp_path).count(("gopro", None), "EUR") == 1
+
+
+def test_only_cheap_outliers_are_deals_once_history_is_large_enough(
+    tmp_path, make_auction
+):
+    history = _history(tmp_path, deal_percentile=0.1, min_samples=10)
+    history.record("gopro", [make_auction(n, 100.0 + n) for n in range(5)])
+
+    assert history.is_deal("gopro", make_auction("new", 500.0))
+
+    history.record("gopro", [make_auction(n, 100.0 + n) for n in range(5, 50)])
+
+    assert history.is_deal("gopro", make_auction("new", 60.0))
+    assert not history.is_deal("gopro", make_auction("new", 130.0))
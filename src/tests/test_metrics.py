@@ -0,0 +1,112 @@
+import requests
+
+from src.dealsteal.ebay import EbayAuctionSearcher
+from src.dealsteal.fakes import FakeServiceConfig, FakeServices
+from src.dealsteal.metrics import MetricsRegistry, MetricsServer
+from src.dealsteal.seen import SeenItemStore
+from src.dealsteal.todoist import TodoistClient
+from src.dealsteal.transport import HttpTransport
+
+
+def test_disabled_registry_records_nothing():
+    """A disabled registry ignores every call."""
+    metrics = MetricsRegistry(enabled=False)
+
+    metrics.inc("dealsteal_requests_total", endpoint="ebay_finding")
+    metrics.observe("dealsteal_request_seconds", 0.1)
+    with metrics.span("run"):
+        pass
+
+    assert metrics.render_prometheus() == "\n"
+    assert metrics.summary()["counters"] == {}
+
+
+def test_prometheus_rendering():
+    """Counters and cumulative histogram buckets render in the text format."""
+    metrics = MetricsRegistry(buckets=(0.1, 1))
+
+    metrics.inc("dealsteal_requests_total", endpoint="ebay_finding", status="200")
+    metrics.inc("dealsteal_requests_total", endpoint="ebay_finding", status="200")
+    metrics.observe("dealsteal_request_seconds", 0.05, endpoint="ebay_finding")
+    metrics.observe("dealsteal_request_seconds", 0.5, endpoint="ebay_finding")
+    metrics.observe("dealsteal_request_seconds", 5, endpoint="ebay_finding")
+    text = metrics.render_prometheus()
+
+    assert "# TYPE dealsteal_requests_total counter" in text
+    assert 'dealsteal_requests_total{endpoint="ebay_finding",status="200"} 2' in text
+    assert (
+        'dealsteal_request_seconds_bucket{endpoint="ebay_finding",le="0.1"} 1' in text
+    )
+    assert 'dealsteal_request_seconds_bucket{endpoint="ebay_finding",le="1"} 2' in text
+    assert (
+        'dealsteal_request_seconds_bucket{endpoint="ebay_finding",le="+Inf"} 3' in text
+    )
+    assert 'dealsteal_request_seconds_count{endpoint="ebay_finding"} 3' in text
+
+
+def test_summary_covers_the_current_run(clock):
+    """The run summary reports spans and counter increases since the run started."""
+    metrics = MetricsRegistry(clock=clock)
+    metrics.inc("dealsteal_dedup_hits_total", 5)
+
+    metrics.start_run()
+    metrics.inc("dealsteal_dedup_hits_total", 2)
+    with metrics.span("submit"):
+        pass
+    clock.now += 3
+    summary = metrics.summary()
+
+    assert summary["duration_sec"] == 3
+    assert summary["counters"] == {"dealsteal_dedup_hits_total": 2}
+    assert summary["spans"]["submit"]["count"] == 1
+
+
+def test_server_exposes_metrics_and_summary():
+    """The metrics server serves Prometheus text and the JSON run summary."""
+    metrics = MetricsRegistry()
+    metrics.inc("dealsteal_cache_hits_total")
+    server = MetricsServer(metrics, host="127.0.0.1", port=0)
+    server.start()
+
+    try:
+        base_url = f"http://127.0.0.1:{server.port}"
+        text = requests.get(f"{base_url}/metrics", timeout=5).text
+        summary = requests.get(f"{base_url}/summary", timeout=5).json()
+    finally:
+        server.stop()
+
+    assert "dealsteal_cache_hits_total 1" in text
+    assert summary["counters"] == {"dealsteal_cache_hits_total": 1}
+
+
+def test_clients_record_searches_and_submissions(tmp_path):
+    """Searches and submissions are counted per endpoint, country and outcome."""
+    metrics = MetricsRegistry()
+    transport = HttpTransport(backoff_factor=0, backoff_jitter=0)
+    searcher = EbayAuctionSearcher("token", "app", transport=transport, metrics=metrics)
+    client = TodoistClient(
+        "token",
+        seen_items=SeenItemStore(str(tmp_path / "items.txt")),
+        transport=transport,
+        metrics=metrics,
+    )
+
+    with FakeServices(FakeServiceConfig(items_per_country=2)) as services:
+        services.point(searcher, client)
+        searcher.search_ebay_auctions("camera", countries=["DE", "FR"])
+        client.submit_tasks(
+            [{"title": "camera", "item_id": "1"}, {"title": "camera", "item_id": "1"}]
+        )
+
+    counters = metrics.summary()["counters"]
+    assert (
+        counters[
+            "dealsteal_requests_total{country=DE,FR,endpoint=ebay_finding,status=200}"
+        ]
+        == 1
+    )
+    assert counters["dealsteal_items_returned_total"] == 4
+    assert counters["dealsteal_items_kept_total"] == 4
+    assert counters["dealsteal_dedup_hits_total"] == 1
+    assert counters["dealsteal_todoist_submits_total{outcome=created}"] == 1
+    assert counters["dealsteal_response_bytes_total{endpoint=ebay_finding}"] > 0
@@ -0,0 +1,174 @@
+import json
+
+from src.dealsteal.fakes import FakeServiceConfig, FakeServices
+from src.dealsteal.outbox import Outbox
+from src.dealsteal.seen import SeenItemStore
+from src.dealsteal.todoist import TodoistClient
+from src.dealsteal.transport import HttpTransport
+
+
+def _task(item_id):
+    return {"title": f"Item {item_id}", "item_id": str(item_id)}
+
+
+class _Client:
+    SYNC_BATCH_SIZE = 2
+
+    def __init__(self, failures=0, used=(), invalid=()):
+        self.failures = failures
+        self.used = set(used)
+        self.invalid = set(invalid)
+        self.sent = []
+
+    def is_item_used(self, item_id):
+        return item_id in self.used
+
+    def submit_tasks(self, tasks, rejected=None):
+        if self.failures:
+            self.failures -= 1
+            return [None] * len(tasks)
+        self.sent.extend(task["item_id"] for task in tasks)
+        results = []
+        for position, task in enumerate(tasks):
+            if task["item_id"] in self.invalid:
+                rejected[position] = {"error": "Invalid project"}
+                results.append(None)
+            else:
+                self.used.add(task["item_id"])
+                results.append({"id": task["item_id"]})
+        return results
+
+
+def test_append_survives_reopen_and_skips_pending_items(tmp_path):
+    path = tmp_path / "outbox.jsonl"
+    outbox = Outbox(str(path))
+
+    assert outbox.append([_task(1), _task(2)]) == 2
+    assert outbox.append([_task(2), _task(3)]) == 1
+
+    assert len(Outbox(str(path))) == 3
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "outbox.jsonl"
+    Outbox(str(path)).append([_task(1), _task(2)])
+    with open(path, "a") as file:
+        file.write('{"id": 3, "task": {"item_')
+
+    outbox = Outbox(str(path))
+
+    assert len(outbox) == 2
+    outbox.append([_task(3)])
+    assert len(Outbox(str(path))) == 3
+
+
+def test_acknowledged_entries_are_not_replayed(tmp_path):
+    path = tmp_path / "outbox.jsonl"
+    outbox = Outbox(str(path), compact_after=10)
+    outbox.append([_task(1), _task(2), _task(3)])
+
+    outbox.acknowledge([1])
+
+    reopened = Outbox(str(path))
+    assert len(reopened) == 2
+    assert reopened.append([_task(1)]) == 1
+
+
+def test_compaction_rewrites_journal_with_pending_entries(tmp_path):
+    path = tmp_path / "outbox.jsonl"
+    outbox = Outbox(str(path), compact_after=2)
+    outbox.append([_task(1), _task(2), _task(3)])
+
+    outbox.acknowledge([1, 2])
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [{"id": 3, "task": _task(3)}]
+    assert len(Outbox(str(path))) == 1
+
+
+def test_flush_retries_until_delivered(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    outbox.append([_task(1), _task(2), _task(3)])
+    client = _Client(failures=2)
+
+    remaining = outbox.flush(client, attempts=4, backoff=0)
+
+    assert remaining == 0
+    assert sorted(client.sent) == ["1", "2", "3"]
+    assert len(Outbox(outbox.path)) == 0
+
+
+def test_flush_keeps_tasks_when_todoist_stays_down(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    outbox.append([_task(1), _task(2), _task(3)])
+    client = _Client(failures=100)
+
+    remaining = outbox.flush(client, attempts=3, backoff=0)
+
+    assert remaining == 3
+    # Each round stops at the first failed batch.
+    assert client.failures == 97
+    assert len(Outbox(outbox.path)) == 3
+
+
+def test_flush_acknowledges_already_used_items(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    outbox.append([_task(1), _task(2)])
+    client = _Client(used={"1"})
+
+    assert outbox.flush(client, backoff=0) == 0
+    assert client.sent == ["2"]
+
+
+def test_rejected_tasks_are_dead_lettered(tmp_path):
+    """A rejected task is not retried within a flush and moves aside after enough runs."""
+    path = tmp_path / "outbox.jsonl"
+    outbox = Outbox(str(path), max_rejections=2)
+    outbox.append([_task(1), _task(2)])
+    client = _Client(invalid={"1"})
+
+    assert outbox.flush(client, attempts=4, backoff=0) == 1
+    assert client.sent == ["1", "2"]
+
+    reopened = Outbox(str(path), max_rejections=2)
+    assert reopened.flush(client, attempts=4, backoff=0) == 0
+
+    assert client.sent == ["1", "2", "1"]
+    assert len(Outbox(str(path))) == 0
+    (dead,) = [json.loads(line) for line in open(reopened.dead_letter_path)]
+    assert dead["task"] == _task(1)
+    assert dead["error"] == {"error": "Invalid project"}
+
+
+def test_deliver_sends_only_the_new_tasks(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    outbox.append([_task(1)])
+    client = _Client()
+
+    assert outbox.deliver(client, [_task(1), _task(2)]) == 1
+    assert client.sent == ["2"]
+    assert len(outbox) == 1
+
+
+def test_tasks_outlive_a_todoist_outage(tmp_path):
+    """Tasks journaled while Todoist fails are delivered by a later flush."""
+    seen = SeenItemStore(str(tmp_path / "items.txt"))
+    client = TodoistClient(
+        "token",
+        seen_items=seen,
+        transport=HttpTransport(retries=0, backoff_factor=0, backoff_jitter=0),
+    )
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    outbox.append([_task(1), _task(2)])
+
+    with FakeServices(FakeServiceConfig(error_rate=1.0)) as services:
+        services.point(client=client)
+        assert outbox.flush(client, attempts=2, backoff=0) == 2
+    assert "1" not in seen
+
+    outbox = Outbox(outbox.path)
+    with FakeServices() as services:
+        services.point(client=client)
+        assert outbox.flush(client, backoff=0) == 0
+        assert services.stats["calls"] == {"POST /todoist/sync/v9/sync": 1}
+    assert "1" in seen and "2" in seen
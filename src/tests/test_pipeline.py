@@ -0,0 +1,182 @@
+import threading
+import time
+
+import pytest
+
+from src.dealsteal.metrics import MetricsRegistry
+from src.dealsteal.pipeline import SearchPipeline
+from src.dealsteal.queries import coalesce_queries
+
+
+def _build_task(auction, project_id=None):
+    return {"title": auction.title, "item_id": auction.item_id}
+
+
+class _Searcher:
+    max_workers = 2
+    metrics = MetricsRegistry(enabled=False)
+
+    def __init__(self, results, delay=0.0):
+        self.results = results
+        self.delay = delay
+        self.produced = 0
+
+    def iter_auctions(self, keywords, **kwargs):
+        result = self.results[keywords]
+        if isinstance(result, Exception):
+            raise result
+        for auction in result:
+            time.sleep(self.delay)
+            self.produced += 1
+            yield auction
+
+
+class _Client:
+    SYNC_BATCH_SIZE = 3
+    metrics = MetricsRegistry(enabled=False)
+
+    def __init__(self, searcher=None, delay=0.0):
+        self.searcher = searcher
+        self.delay = delay
+        self.batches = []
+        self.max_backlog = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def is_item_used(self, item_id):
+        return item_id == "used"
+
+    def submit_tasks(self, tasks, rejected=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.batches.append([task["item_id"] for task in tasks])
+            if self.searcher:
+                submitted = sum(len(batch) for batch in self.batches)
+                self.max_backlog = max(
+                    self.max_backlog, self.searcher.produced - submitted
+                )
+        return ["task" for _ in tasks]
+
+    def close(self):
+        self.closed = True
+
+
+def test_submissions_start_while_searches_run(make_auction):
+    """Full batches are submitted before the searches have finished."""
+    searcher = _Searcher({"gopro": [make_auction(n) for n in range(9)]}, delay=0.02)
+    client = _Client()
+    pipeline = SearchPipeline(searcher, client, _build_task)
+
+    stats = pipeline.run(coalesce_queries([{"keywords": "gopro"}]))
+
+    assert client.batches == [["0", "1", "2"], ["3", "4", "5"], ["6", "7", "8"]]
+    assert stats == {"auctions": 9, "tasks": 9, "submitted": 9}
+    assert client.closed
+
+
+def test_backpressure_bounds_the_backlog(make_auction):
+    """A slow submit stage throttles the searches instead of buffering everything."""
+    searcher = _Searcher({"gopro": [make_auction(n) for n in range(60)]})
+    client = _Client(searcher, delay=0.01)
+    pipeline = SearchPipeline(searcher, client, _build_task, queue_size=2)
+
+    pipeline.run(coalesce_queries([{"keywords": "gopro"}]))
+
+    assert sum(len(batch) for batch in client.batches) == 60
+    assert client.max_backlog <= 2 * 2 + 2 * client.SYNC_BATCH_SIZE
+
+
+def test_filtering_dedup_and_flush_on_failure(make_auction):
+    """Used, repeated and out-of-range items are dropped; a failed search still flushes the rest."""
+    searcher = _Searcher(
+        {
+            "gopro": [
+                make_auction("used"),
+                make_auction(1),
+                make_auction(1),
+                make_auction(2, 900.0),
+            ],
+            "iphone": RuntimeError("search failed"),
+        }
+    )
+    client = _Client()
+    pipeline = SearchPipeline(searcher, client, _build_task, flush_interval=0.01)
+    queries = coalesce_queries(
+        [{"keywords": "gopro", "max_price": 100}, {"keywords": "iphone"}]
+    )
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(queries)
+
+    assert client.batches == [["1"]]
+
+
+def test_history_records_searches_and_filters_non_deals(tmp_path, make_auction):
+    """With a history, every search is recorded and only cheap auctions become tasks."""
+    from src.dealsteal.history import AuctionHistory
+
+    history = AuctionHistory(
+        str(tmp_path / "history.sqlite3"), deal_percentile=0.2, min_samples=5
+    )
+    query = coalesce_queries([{"keywords": "gopro"}])[0]
+    history.record(query.key, [make_auction(n, 100.0 + n) for n in range(20)])
+    searcher = _Searcher(
+        {"gopro": [make_auction("cheap", 50.0), make_auction("dear", 150.0)]}
+    )
+    client = _Client()
+    pipeline = SearchPipeline(
+        searcher, client, _build_task, history=history, flush_interval=0.01
+    )
+
+    pipeline.run([query])
+
+    assert client.batches == [["cheap"]]
+    assert history.count(query.key, "EUR") == 22
+
+
+def test_searches_are_reported_without_keeping_their_results(make_auction):
+    """History gets page-sized chunks and on_searched only the count and soonest end."""
+
+    class _History:
+        def __init__(self):
+            self.chunks = []
+
+        def record(self, key, auctions):
+            self.chunks.append(len(auctions))
+
+        def is_deal(self, key, auction):
+            return True
+
+    auctions = [make_auction(n, ends_in=3600 - n) for n in range(120)]
+    history = _History()
+    searched = []
+    pipeline = SearchPipeline(
+        _Searcher({"gopro": auctions}), _Client(), _build_task, history=history
+    )
+
+    pipeline.run(
+        coalesce_queries([{"keywords": "gopro"}]),
+        on_searched=lambda *result: searched.append(result),
+    )
+
+    assert history.chunks == [50, 50, 20]
+    ((query, count, soonest_end),) = searched
+    assert (count, soonest_end) == (120, auctions[-1].end_time)
+
+
+def test_failing_filter_stage_does_not_hang_the_run(make_auction):
+    """An error while filtering is raised from run() once every stage has stopped."""
+
+    class _FailingClient(_Client):
+        def is_item_used(self, item_id):
+            raise RuntimeError("seen store unavailable")
+
+    searcher = _Searcher({"gopro": [make_auction(n) for n in range(20)]})
+    client = _FailingClient()
+    pipeline = SearchPipeline(searcher, client, _build_task, queue_size=2)
+
+    with pytest.raises(RuntimeError, match="seen store unavailable"):
+        pipeline.run(coalesce_queries([{"keywords": "gopro"}]))
+
+    assert searcher.produced == 20
+    assert client.closed
@@ -0,0 +1,47 @@
+import json
+from types import SimpleNamespace
+
+from src.dealsteal.queries import coalesce_queries, load_queries
+
+
+def test_load_queries_accepts_single_entries_and_lists(tmp_path):
+    """Query files may hold one entry or a list of entries."""
+    (tmp_path / "a.json").write_text(json.dumps({"keywords": "gopro"}))
+    (tmp_path / "b.json").write_text(
+        json.dumps([{"keywords": "iphone"}, {"keywords": "ipad"}])
+    )
+
+    entries = load_queries(str(tmp_path / "*.json"))
+
+    assert [entry["keywords"] for entry in entries] == ["gopro", "iphone", "ipad"]
+
+
+def test_compatible_entries_share_one_search():
+    """Entries with the same keywords merge into one search over the price union."""
+    entries = [
+        {"keywords": "GoPro  Hero", "min_price": 50, "max_price": 100},
+        {"keywords": "gopro hero", "min_price": 80, "max_price": 300},
+        {"keywords": "iphone", "min_price": 10, "max_price": None},
+        {"keywords": "iphone", "min_price": 20, "max_price": 30},
+    ]
+
+    gopro, iphone = coalesce_queries(entries)
+
+    assert (gopro.min_price, gopro.max_price) == (50, 300)
+    assert (iphone.min_price, iphone.max_price) == (10, None)
+
+    auctions = [SimpleNamespace(price=price) for price in (60.0, 150.0, 400.0)]
+    fanned_out = [
+        [auction.price for auction in matches] for _, matches in gopro.fan_out(auctions)
+    ]
+    assert fanned_out == [[60.0], [150.0]]
+
+
+def test_different_search_options_are_not_merged():
+    """Entries that restrict countries differently stay separate searches."""
+    entries = [
+        {"keywords": "gopro", "countries": ["DE"]},
+        {"keywords": "gopro", "countries": ["FR"]},
+    ]
+
+    assert len(coalesce_queries(entries)) == 2
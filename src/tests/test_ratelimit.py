@@ -0,0 +1,64 @@
+from src.dealsteal.ratelimit import CallBudget
+
+
+def test_calls_are_paced_over_the_day(clock):
+    """A full bucket allows a burst, after which calls refill at the daily rate."""
+    budget = CallBudget(daily_limit=8640, burst=3, clock=clock)
+
+    assert [budget.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    clock.now += 10
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.used == 4
+
+
+def test_daily_limit_resets_at_midnight(clock):
+    """No more than the daily limit is admitted until the next UTC day."""
+    budget = CallBudget(daily_limit=2, burst=10, clock=clock)
+
+    assert budget.try_acquire() and budget.try_acquire()
+    clock.now += 3600
+    assert not budget.try_acquire()
+
+    clock.now += 12 * 3600
+    assert budget.remaining == 2
+    assert budget.try_acquire()
+
+
+def test_low_priority_calls_keep_a_reserve(clock):
+    """Negative priorities stop while a reserve is left for the others."""
+    budget = CallBudget(daily_limit=10, burst=10, clock=clock)
+
+    admitted = 0
+    while budget.try_acquire(priority=-2):
+        admitted += 1
+
+    assert admitted == 8
+    assert budget.try_acquire(priority=0)
+
+
+def test_state_survives_restarts(tmp_path, clock):
+    """Usage is persisted, so a restarted process keeps counting the same day."""
+    path = str(tmp_path / "budget.json")
+    budget = CallBudget(daily_limit=100, burst=5, path=path, clock=clock)
+    for _ in range(5):
+        assert budget.try_acquire()
+
+    restarted = CallBudget(daily_limit=100, burst=5, path=path, clock=clock)
+
+    assert restarted.used == 5
+    assert not restarted.try_acquire()
+
+
+def test_budgets_sharing_a_file_share_the_quota(tmp_path, clock):
+    """Processes using the same file draw from one daily quota."""
+    path = str(tmp_path / "budget.json")
+    budgets = [
+        CallBudget(daily_limit=10, burst=10, path=path, clock=clock) for _ in range(3)
+    ]
+
+    admitted = sum(budget.try_acquire() for _ in range(10) for budget in budgets)
+
+    assert admitted == 10
+    assert all(budget.used == 10 for budget in budgets)
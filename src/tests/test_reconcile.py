@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from src.dealsteal.fakes import FakeServiceConfig, FakeServices
+from src.dealsteal.reconcile import TaskMap, reconcile_tasks
+from src.dealsteal.seen import SeenItemStore
+from src.dealsteal.todoist import TodoistClient
+from src.dealsteal.transport import HttpTransport
+
+NOW = datetime(2025, 1, 8, 12, tzinfo=timezone.utc)
+
+
+def test_task_map_persists_entries(tmp_path):
+    """Entries survive a reload, and removals rewrite the file."""
+    path = str(tmp_path / "tasks.txt")
+    task_map = TaskMap(path, flush_every=2)
+    task_map.add("1", "101", NOW)
+    task_map.add("2", "102")
+    task_map.add("3", "103", "2025-01-09T12:00:00Z")
+    task_map.flush()
+
+    assert sorted(TaskMap(path).tasks()) == [
+        ("1", "101", NOW),
+        ("2", "102", None),
+        ("3", "103", NOW + timedelta(days=1)),
+    ]
+
+    assert task_map.remove(["1", "4"]) == 1
+    assert sorted(item_id for item_id, _, _ in TaskMap(path).tasks()) == ["2", "3"]
+
+
+def test_expired_tasks_are_closed_in_one_sync_call(tmp_path):
+    """Tasks of ended auctions are completed together, and gone tasks are forgotten."""
+    task_map = TaskMap(str(tmp_path / "tasks.txt"))
+    client = TodoistClient(
+        "token",
+        seen_items=SeenItemStore(str(tmp_path / "items.txt")),
+        transport=HttpTransport(backoff_factor=0, backoff_jitter=0),
+        task_map=task_map,
+    )
+
+    with FakeServices(FakeServiceConfig()) as services:
+        services.point(client=client)
+        task_ids = client.submit_tasks(
+            [
+                {
+                    "title": f"item {index}",
+                    "item_id": str(index),
+                    "end_time": NOW + timedelta(hours=index - 3),
+                }
+                for index in range(6)
+            ]
+        )
+        assert len(task_map) == 6
+
+        # Completed by hand: forgotten without a command.
+        services.tasks.pop(task_ids[0])
+
+        assert reconcile_tasks(client, task_map, now=NOW) == 3
+        assert services.stats["calls"]["POST /todoist/sync/v9/sync"] == 2
+        assert services.stats["calls"]["GET /todoist/rest/v2/tasks"] == 1
+        assert sorted(services.tasks) == sorted(task_ids[4:])
+
+    assert sorted(item_id for item_id, _, _ in task_map.tasks()) == ["4", "5"]
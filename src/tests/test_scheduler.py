@@ -0,0 +1,90 @@
+import json
+import os
+from datetime import datetime, timezone
+
+from src.dealsteal.scheduler import QueryScheduler
+
+
+def _ending_in(clock, seconds):
+    return datetime.fromtimestamp(clock.now + seconds, tz=timezone.utc)
+
+
+def test_intervals_follow_soonest_end_and_back_off(tmp_path, clock):
+    """Searches with auctions ending soon are polled often, idle ones back off."""
+    (tmp_path / "q.json").write_text(
+        json.dumps([{"keywords": "gopro"}, {"keywords": "iphone"}])
+    )
+    scheduler = QueryScheduler(
+        str(tmp_path / "*.json"), min_interval=60, max_interval=3600, clock=clock
+    )
+
+    assert scheduler.reload_if_changed()
+    gopro, iphone = scheduler.pop_due()
+    assert scheduler.seconds_until_next() is None
+
+    assert scheduler.record_result(gopro, 1, _ending_in(clock, 600)) == 300
+    assert scheduler.record_result(iphone, 0) == 120
+    assert scheduler.seconds_until_next() == 120
+
+    clock.now += 120
+    (iphone,) = scheduler.pop_due()
+    assert scheduler.record_result(iphone, 0) == 240
+
+
+def test_query_files_hot_reload(tmp_path, clock):
+    """Changed query files are reloaded; removed searches are unscheduled."""
+    path = tmp_path / "q.json"
+    path.write_text(json.dumps({"keywords": "gopro"}))
+    scheduler = QueryScheduler(str(tmp_path / "*.json"), clock=clock)
+
+    assert scheduler.reload_if_changed()
+    assert not scheduler.reload_if_changed()
+
+    path.write_text(json.dumps({"keywords": "iphone"}))
+    os.utime(path, ns=(0, 10**18))
+    assert scheduler.reload_if_changed()
+    assert [query.keywords for query in scheduler.pop_due()] == ["iphone"]
+
+
+def test_broken_query_files_keep_their_previous_searches(tmp_path, clock):
+    """A half-saved file or an entry without keywords does not stop the reload."""
+    path = tmp_path / "q.json"
+    path.write_text(json.dumps({"keywords": "gopro"}))
+    scheduler = QueryScheduler(str(tmp_path / "*.json"), clock=clock)
+    scheduler.reload_if_changed()
+
+    path.write_text('{"keywords": "iph')
+    os.utime(path, ns=(0, 10**18))
+    (tmp_path / "new.json").write_text(
+        json.dumps([{"min_price": 5}, {"keywords": "x"}])
+    )
+
+    assert scheduler.reload_if_changed()
+    assert sorted(query.keywords for query in scheduler.pop_due()) == ["gopro", "x"]
+
+
+def test_due_searches_are_ordered_by_priority_and_urgency(tmp_path, clock):
+    """Due searches come out by priority, then by their soonest ending auction."""
+    (tmp_path / "q.json").write_text(
+        json.dumps(
+            [
+                {"keywords": "gopro"},
+                {"keywords": "iphone"},
+                {"keywords": "pixel", "priority": 2},
+            ]
+        )
+    )
+    scheduler = QueryScheduler(str(tmp_path / "*.json"), min_interval=60, clock=clock)
+    scheduler.reload_if_changed()
+    gopro, iphone, pixel = sorted(scheduler.pop_due(), key=lambda q: q.keywords)
+
+    scheduler.record_result(gopro, 1, _ending_in(clock, 7200))
+    scheduler.record_result(iphone, 1, _ending_in(clock, 3600))
+    scheduler.record_result(pixel, 0)
+    clock.now += 3600
+
+    assert [query.keywords for query in scheduler.pop_due()] == [
+        "pixel",
+        "iphone",
+        "gopro",
+    ]
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from src.dealsteal.seen import SeenItemStore
+
+
+def test_items_are_buffered_and_reloaded(tmp_path):
+    """Entries are appended in batches and survive a reload."""
+    path = tmp_path / "items.txt"
+    store = SeenItemStore(str(path), flush_every=2)
+
+    store.add("1")
+    assert "1" in store
+    assert not path.exists()
+
+    store.add("2")
+    assert path.read_text().splitlines() == ["1", "2"]
+
+    store.add("3")
+    store.flush()
+    assert {"1", "2", "3"} <= set(SeenItemStore(str(path))._items)
+
+
+def test_ended_auctions_are_evicted(tmp_path):
+    """Entries whose auction has ended are dropped and the file is compacted."""
+    path = tmp_path / "items.txt"
+    ended = datetime.now(timezone.utc) - timedelta(hours=1)
+    running = datetime.now(timezone.utc) + timedelta(hours=1)
+    path.write_text(f"legacy\nold\t{ended.isoformat()}\nlive\t{running.isoformat()}\n")
+
+    store = SeenItemStore(str(path))
+
+    assert "old" not in store
+    assert "legacy" in store
+    assert "live" in store
+    assert len(path.read_text().splitlines()) == 2
+
+    store.add("soon", "2000-01-01T00:00:00Z")
+    assert store.evict_expired() == 1
+    assert "soon" not in store
@@ -1,7 +1,11 @@
+import json
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 
+from src.dealsteal.seen import SeenItemStore
 from src.dealsteal.todoist import TodoistClient
 
 # Load environment variables
@@ -50,5 +54,86 @@ def test_task_lifecycle(todoist_client):
     print("Task deleted successfully.")
 
 
+class _SyncStubHandler(BaseHTTPRequestHandler):
+    """Minimal Todoist Sync API stand-in that fails commands for "bad" tasks."""
+
+    requests_received = []
+
+    def do_POST(self):  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        commands = body["commands"]
+        self.requests_received.append(commands)
+
+        sync_status = {}
+        temp_id_mapping = {}
+        for command in commands:
+            if command["args"]["content"] == "bad":
+                sync_status[command["uuid"]] = {"error": "INVALID_ARGUMENT_VALUE"}
+            else:
+                sync_status[command["uuid"]] = "ok"
+                temp_id_mapping[command["temp_id"]] = f"task-{command['temp_id']}"
+
+        payload = json.dumps(
+            {"sync_status": sync_status, "temp_id_mapping": temp_id_mapping}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sync_stub():
+    """Run the Sync API stub on a free local port."""
+    _SyncStubHandler.requests_received = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SyncStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/sync", _SyncStubHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_submit_tasks_batches_sync_commands(sync_stub, tmp_path):
+    """Tasks are packed into Sync API batches and only successes are marked used.
+
+    Commands Todoist rejected are reported apart from skipped tasks.
+    """
+    sync_url, handler = sync_stub
+    seen_items = SeenItemStore(str(tmp_path / "items.txt"))
+    seen_items.add("used")
+    client = TodoistClient("token", seen_items=seen_items)
+    client.sync_url = sync_url
+    client.SYNC_BATCH_SIZE = 2
+
+    rejected = {}
+    results = client.submit_tasks(
+        [
+            {"title": "one", "item_id": "1", "due_date": "2025-01-08T12:00:00Z"},
+            {"title": "bad", "item_id": "2"},
+            {"title": "again", "item_id": "1"},
+            {"title": "skipped", "item_id": "used"},
+            {"title": "three", "item_id": "3"},
+        ],
+        rejected=rejected,
+    )
+
+    assert [len(batch) for batch in handler.requests_received] == [2, 1]
+    assert handler.requests_received[0][0]["args"]["due"] == {
+        "date": "2025-01-08T12:00:00Z"
+    }
+    assert results[0].startswith("task-")
+    assert results[1:4] == [None, None, None]
+    assert results[4].startswith("task-")
+    assert rejected == {1: {"error": "INVALID_ARGUMENT_VALUE"}}
+    assert "1" in seen_items
+    assert "2" not in seen_items
+    assert "3" in seen_items
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,92 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.dealsteal.transport import DeadlineExceeded, HttpTransport
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 429 to the first request and 200 afterwards."""
+
+    protocol_version = "HTTP/1.1"
+    calls = 0
+    ports = set()
+    retry_after = "0"
+
+    def do_GET(self):  # noqa: N802
+        type(self).calls += 1
+        type(self).ports.add(self.client_address[1])
+        status = 429 if self.calls == 1 else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", self.retry_after)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    do_POST = do_GET  # noqa: N815
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    """Run the flaky server on a free local port."""
+    _FlakyHandler.calls = 0
+    _FlakyHandler.ports = set()
+    _FlakyHandler.retry_after = "0"
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_throttled_requests_are_retried_over_one_connection(flaky_server):
+    """A 429 is retried and later calls reuse the kept-alive connection."""
+    transport = HttpTransport(backoff_factor=0, backoff_jitter=0)
+
+    assert transport.get(flaky_server).status_code == 200
+    assert transport.get(flaky_server).status_code == 200
+    assert _FlakyHandler.calls == 3
+    assert len(_FlakyHandler.ports) == 1
+
+
+def test_run_deadline_caps_timeouts():
+    """Timeouts shrink to the time left in the run and fail once it is over."""
+    transport = HttpTransport(timeout=(5, 30))
+    transport.start_run(10)
+    assert all(part <= 10 for part in transport._clamp_timeout((5, 30)))
+
+    transport.start_run(0.01)
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        transport.get("http://127.0.0.1:9/")
+
+
+def test_posts_are_only_retried_when_marked_safe(flaky_server):
+    """A POST is sent once unless the caller allows a retry."""
+    transport = HttpTransport(backoff_factor=0, backoff_jitter=0)
+
+    assert transport.post(flaky_server).status_code == 429
+    assert _FlakyHandler.calls == 1
+
+    _FlakyHandler.calls = 0
+    assert transport.post(flaky_server, retry=True).status_code == 200
+    assert _FlakyHandler.calls == 2
+
+
+def test_retry_after_past_the_deadline_is_not_waited_for(flaky_server):
+    """A Retry-After longer than the time left returns the throttled response at once."""
+    _FlakyHandler.retry_after = "3600"
+    transport = HttpTransport(backoff_factor=0, backoff_jitter=0)
+    transport.start_run(5)
+
+    started = time.monotonic()
+    assert transport.get(flaky_server).status_code == 429
+    assert time.monotonic() - started < 1
+    assert _FlakyHandler.calls == 1
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+
+from src.dealsteal.watermarks import (
+    IncompleteSearchError,
+    IncrementalSearcher,
+    WatermarkStore,
+)
+
+NOW = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+
+class _Searcher:
+    EUROPEAN_COUNTRIES = ["DE", "FR"]
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def search_ebay_auctions(self, **kwargs):
+        self.calls.append(kwargs)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_only_new_listings_are_requested(tmp_path, make_auction):
+    """After a full search, only listings newer than each country's watermark are fetched.
+
+    Both searches stop at the auctions that can enter the window before the next refresh.
+    """
+    searcher = _Searcher(
+        [
+            make_auction("1", country="DE", started_ago=600, ends_in=60),
+            make_auction("2", country="DE", started_ago=300, ends_in=7200),
+        ],
+        [make_auction("3", country="FR", started_ago=10, ends_in=120)],
+    )
+    incremental = IncrementalSearcher(searcher, WatermarkStore(str(tmp_path)))
+
+    first = incremental.search("gopro", 3600, now=NOW, keywords="gopro")
+    second = incremental.search(
+        "gopro", 3600, now=NOW + timedelta(seconds=30), keywords="gopro"
+    )
+
+    assert searcher.calls[0]["start_time_from"] is None
+    assert searcher.calls[0]["max_time_remaining"] == 3600 + 21_600
+    assert searcher.calls[1]["max_time_remaining"] == 3600 + 21_600 - 30
+    assert searcher.calls[1]["start_time_from"] == {
+        "DE": NOW - timedelta(seconds=300),
+        "FR": NOW,
+    }
+    assert [auction.item_id for auction in first] == ["1"]
+    assert [auction.item_id for auction in second] == ["1", "3"]
+    assert second[0].time_remaining == timedelta(seconds=30)
+
+
+def test_known_listings_expire_and_refresh_is_periodic(tmp_path, make_auction):
+    """Ended auctions are dropped and a full search runs after the refresh interval."""
+    searcher = _Searcher(
+        [make_auction("1", country="DE", started_ago=600, ends_in=60)], [], []
+    )
+    incremental = IncrementalSearcher(
+        searcher, WatermarkStore(str(tmp_path)), refresh_interval=3600
+    )
+
+    incremental.search("gopro", None, now=NOW, keywords="gopro")
+    later = incremental.search(
+        "gopro", None, now=NOW + timedelta(seconds=120), keywords="gopro"
+    )
+    incremental.search("gopro", None, now=NOW + timedelta(hours=2), keywords="gopro")
+
+    assert later == []
+    assert searcher.calls[1]["start_time_from"] is not None
+    assert searcher.calls[2]["start_time_from"] is None
+
+
+def test_min_price_is_checked_locally(tmp_path, make_auction):
+    """Listings below min_price are kept and served once a refresh sees a higher bid."""
+    searcher = _Searcher(
+        [
+            make_auction("1", country="DE", started_ago=600, ends_in=60, price=5.0),
+            make_auction("2", country="DE", started_ago=600, ends_in=90),
+        ],
+        [
+            make_auction("1", country="DE", started_ago=600, ends_in=60, price=20.0),
+            make_auction("2", country="DE", started_ago=600, ends_in=90),
+        ],
+    )
+    incremental = IncrementalSearcher(
+        searcher, WatermarkStore(str(tmp_path)), refresh_interval=10
+    )
+
+    first = incremental.search("gopro", None, now=NOW, keywords="gopro", min_price=8)
+    later = incremental.search(
+        "gopro", None, now=NOW + timedelta(seconds=20), keywords="gopro", min_price=8
+    )
+
+    assert all(call["min_price"] is None for call in searcher.calls)
+    assert [auction.item_id for auction in first] == ["2"]
+    assert [auction.item_id for auction in later] == ["1", "2"]
+
+
+def test_failed_refresh_keeps_the_previous_state(tmp_path, make_auction):
+    """A refresh missing a page neither forgets known auctions nor moves the watermarks."""
+    searcher = _Searcher(
+        [
+            make_auction("1", country="DE", started_ago=600, ends_in=86_400),
+            make_auction("2", country="FR", started_ago=300, ends_in=86_400),
+        ],
+        IncompleteSearchError(
+            "page failed",
+            [make_auction("3", country="DE", started_ago=5, ends_in=86_400)],
+        ),
+        [],
+    )
+    store = WatermarkStore(str(tmp_path))
+    incremental = IncrementalSearcher(searcher, store, refresh_interval=3600)
+
+    incremental.search("gopro", None, now=NOW, keywords="gopro")
+    failed = incremental.search(
+        "gopro", None, now=NOW + timedelta(hours=2), keywords="gopro"
+    )
+    state = store.load("gopro")
+    incremental.search(
+        "gopro", None, now=NOW + timedelta(hours=2, seconds=30), keywords="gopro"
+    )
+
+    assert [auction.item_id for auction in failed] == ["1", "3", "2"]
+    assert state["refreshed_at"] == NOW
+    assert state["watermarks"] == {
+        "DE": NOW - timedelta(seconds=600),
+        "FR": NOW - timedelta(seconds=300),
+    }
+    assert searcher.calls[2]["start_time_from"] is None
@@ -0,0 +1,136 @@
+import json
+import threading
+
+from src.dealsteal.ebay import EbayAuctionSearcher
+from src.dealsteal.fakes import FakeServiceConfig, FakeServices
+from src.dealsteal.runner import run_worker
+from src.dealsteal.todoist import TodoistClient
+from src.dealsteal.transport import HttpTransport
+from src.dealsteal.workqueue import SharedSeenItemStore, WorkQueue
+
+
+def test_jobs_are_leased_once_and_reclaimed_after_expiry(tmp_path, clock):
+    """A leased job is invisible to other workers until its lease runs out."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"), lease_seconds=60, clock=clock)
+
+    assert queue.enqueue("run", [("a", {"n": 1}), ("b", {"n": 2})]) == 2
+    assert queue.enqueue("run", [("a", {"n": 1}), ("b", {"n": 2})]) == 0
+
+    assert queue.claim("run", "w1") == ("a", {"n": 1})
+    assert queue.claim("run", "w2") == ("b", {"n": 2})
+    assert queue.claim("run", "w2") is None
+    assert queue.complete("run", "b", "w2")
+
+    clock.now += 61
+    assert queue.claim("run", "w2") == ("a", {"n": 1})
+    assert not queue.complete("run", "a", "w1")
+    assert queue.complete("run", "a", "w2")
+    assert queue.open_jobs("run") == 0
+
+
+def test_prune_keeps_newer_runs(tmp_path, clock):
+    """Pruning after a slow run leaves the runs enqueued after it alone."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"), clock=clock)
+    for run_id in ("run-8", "run-9", "run-10"):
+        queue.enqueue(run_id, [("a", {"n": 1})])
+        clock.now += 600
+
+    queue.prune("run-9")
+
+    assert queue.open_jobs("run-8") == 0
+    assert queue.open_jobs("run-9") == 1
+    assert queue.open_jobs("run-10") == 1
+
+
+def test_items_are_claimed_by_one_worker(tmp_path, clock):
+    """Only one worker may submit an item; stale claims can be taken over."""
+    path = str(tmp_path / "queue.sqlite3")
+    first = SharedSeenItemStore(path, owner="w1", claim_seconds=60, clock=clock)
+    second = SharedSeenItemStore(path, owner="w2", claim_seconds=60, clock=clock)
+
+    assert first.claim("1")
+    assert not second.claim("1")
+    first.release("1")
+    assert second.claim("1")
+
+    clock.now += 61
+    assert first.claim("1")
+    first.add("1", "2099-01-01T00:00:00+00:00")
+    clock.now += 600
+    assert "1" in second
+    assert not second.claim("1")
+
+
+def test_legacy_seen_items_are_imported_once(tmp_path, clock):
+    """A new shared store starts with the items of the file store and evicts ended ones."""
+    legacy_path = tmp_path / "items.txt"
+    legacy_path.write_text(
+        "1\n2\t2099-01-01T00:00:00+00:00\n3\t2000-01-01T00:00:00+00:00\n"
+    )
+    path = str(tmp_path / "queue.sqlite3")
+
+    store = SharedSeenItemStore(
+        path, owner="w1", claim_seconds=60, clock=clock, legacy_path=str(legacy_path)
+    )
+    assert "1" in store and "2" in store and "3" not in store
+    assert not store.claim("2")
+
+    legacy_path.write_text("4\n")
+    assert "4" not in SharedSeenItemStore(path, legacy_path=str(legacy_path))
+
+    store.add("5", "2000-01-01T00:00:00+00:00")
+    assert store.claim("6")
+    clock.now += 61
+    assert store.evict_expired() == 1
+    assert "5" not in store
+    assert len(store) == 2
+
+
+def test_workers_share_a_run_without_duplicate_tasks(tmp_path):
+    """Concurrent workers drain one run and overlapping searches create each task once."""
+    pattern = tmp_path / "queries" / "*.json"
+    pattern.parent.mkdir()
+    (pattern.parent / "watchlist.json").write_text(
+        json.dumps(
+            [
+                {"keywords": "camera", "countries": ["DE"]},
+                {"keywords": "camera", "countries": ["DE", "FR"]},
+                {"keywords": "lens", "countries": ["DE"]},
+            ]
+        )
+    )
+    database = str(tmp_path / "queue.sqlite3")
+    completed = []
+
+    with FakeServices(FakeServiceConfig(items_per_country=4)) as services:
+
+        def work(owner):
+            transport = HttpTransport()
+            searcher = EbayAuctionSearcher("token", "app", transport=transport)
+            client = TodoistClient(
+                "token",
+                seen_items=SharedSeenItemStore(database, owner=owner),
+                transport=transport,
+            )
+            services.point(searcher, client)
+            completed.append(
+                run_worker(
+                    searcher,
+                    client,
+                    None,
+                    WorkQueue(database),
+                    "run",
+                    pattern=str(pattern),
+                )
+            )
+
+        workers = [threading.Thread(target=work, args=(f"w{n}",)) for n in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert services.stats["tasks"] == 4 + 6 + 4
+
+    assert sum(completed) == 3
+    assert WorkQueue(database).open_jobs("run") == 0